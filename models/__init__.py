@@ -7,9 +7,38 @@ import lazyimports
 
 # Local
 with lazyimports.lazy_imports(".block:Block",
-                              ".blockchain:Blockchain"):
+                              ".blockchain:Blockchain",
+                              ".ledger:Ledger",
+                              ".block_index:BlockIndex",
+                              ".chain_writer:ChainWriter",
+                              ".chain_writer:FsyncPolicy",
+                              ".compressed_file_cache:CompressedFileCache",
+                              ".transaction_store:TransactionStore",
+                              ".balance_ranking:BalanceRanking",
+                              ".transaction_history_index:"
+                              "TransactionHistoryIndex",
+                              ".miner:Miner",
+                              ".mempool:Mempool",
+                              ".stored_block:StoredBlock",
+                              ".block_record:BlockRecord",
+                              ".block_record:TransactionRecord"):
     from .block import Block
     from .blockchain import Blockchain
+    from .ledger import Ledger
+    from .block_index import BlockIndex
+    from .chain_writer import ChainWriter, FsyncPolicy
+    from .compressed_file_cache import CompressedFileCache
+    from .transaction_store import TransactionStore
+    from .balance_ranking import BalanceRanking
+    from .transaction_history_index import TransactionHistoryIndex
+    from .miner import Miner
+    from .mempool import Mempool
+    from .stored_block import StoredBlock
+    from .block_record import BlockRecord, TransactionRecord
 
 # Export classes
-__all__: List[str] = ["Block", "Blockchain"]
+__all__: List[str] = ["Block", "Blockchain", "Ledger", "BlockIndex",
+                       "ChainWriter", "FsyncPolicy", "CompressedFileCache",
+                       "TransactionStore", "BalanceRanking",
+                       "TransactionHistoryIndex", "Miner", "Mempool",
+                       "StoredBlock", "BlockRecord", "TransactionRecord"]
@@ -0,0 +1,134 @@
+# region Imports
+# Standard library
+import bisect
+import threading
+from typing import Any, Dict, List, Tuple, TYPE_CHECKING
+
+# Third party
+import numpy as np
+import numpy.typing as npt
+
+# Local
+if TYPE_CHECKING:
+    from .transaction_store import TransactionStore
+# endregion
+
+# region Balance ranking class
+
+
+class BalanceRanking:
+    """
+    Users of a transaction store ordered by balance, highest first.
+
+    The ranking is built from every balance once, and after that only the
+    users in rows added to the store since the last update are moved, each
+    with a binary search. Top-N lists cost O(N) and rank lookups
+    O(log users).
+    """
+
+    def __init__(self) -> None:
+        # Guards the ranking while it is updated or read
+        self.lock: threading.Lock = threading.Lock()
+        # (-balance, user ID) of every user, in order, so that users with
+        # the same balance are ranked by who appeared first
+        self.keys: List[Tuple[int, int]] = []
+        self.balances: Dict[int, int] = {}
+        # The user list of the store the ranking was built from, and how
+        # many of its rows have been applied. None until it is built.
+        self.users: List[str] | None = None
+        self.row_count: int = 0
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def is_built(self) -> bool:
+        return self.users is not None
+
+    # region Update
+    def update(self,
+               store: "TransactionStore",
+               undeducted_methods: Tuple[str, ...]) -> None:
+        """
+        Brings the ranking up to date with the store, building it first if
+        it has not been built from the store as it is now.
+
+        Args:
+            store (TransactionStore): The store to rank the users of.
+            undeducted_methods (Tuple[str, ...]): Methods whose sends are
+                not deducted from the sender's balance.
+        """
+        with self.lock:
+            store.get_balances(undeducted_methods)
+            users: List[str]
+            row_count: int
+            balances: npt.NDArray[Any]
+            users, row_count, balances = store.balances
+            if users is not self.users or row_count < self.row_count:
+                self.build(users, row_count, balances)
+                return
+            if row_count == self.row_count:
+                return
+            # Only users in the new rows can have a different balance
+            changed_user_ids: npt.NDArray[np.generic] = np.unique(
+                np.concatenate((
+                    store.get_column("senders")[self.row_count:row_count],
+                    store.get_column("receivers")[self.row_count:row_count])))
+            for user_id in changed_user_ids.tolist():
+                self.move(user_id, int(balances[user_id]))
+            self.row_count = row_count
+
+    def build(self,
+              users: List[str],
+              row_count: int,
+              balances: npt.NDArray[Any]) -> None:
+        print("Building the balance ranking...")
+        user_ids: npt.NDArray[np.intp] = np.arange(len(balances))
+        # Sorted by balance, highest first, and then by user ID
+        order: npt.NDArray[np.intp] = np.lexsort((user_ids, -balances))
+        self.keys = list(zip((-balances[order]).tolist(), order.tolist()))
+        self.balances = dict(zip(user_ids.tolist(), balances.tolist()))
+        self.users = users
+        self.row_count = row_count
+        print(f"Balance ranking built ({len(self.keys)} users).")
+
+    def move(self, user_id: int, balance: int) -> None:
+        old_balance: int | None = self.balances.get(user_id)
+        if old_balance == balance:
+            return
+        if old_balance is not None:
+            position: int = bisect.bisect_left(self.keys,
+                                               (-old_balance, user_id))
+            del self.keys[position]
+        bisect.insort(self.keys, (-balance, user_id))
+        self.balances[user_id] = balance
+    # endregion
+
+    # region Read
+    def get_top(self, n: int) -> List[Tuple[str, int]]:
+        """
+        Gets the `n` users with the highest balances and their balances,
+        highest first.
+        """
+        with self.lock:
+            users: List[str] = self.users or []
+            return [(users[user_id], -negative_balance)
+                    for negative_balance, user_id in self.keys[:max(n, 0)]]
+
+    def get_rank(self, user_id: int) -> Tuple[int, int] | None:
+        """
+        Gets the rank of a user, starting from 1, and their balance. Users
+        with the same balance share a rank.
+
+        Returns:
+            Tuple[int, int] | None: The rank and the balance, or None if the
+                user is not in the ranking.
+        """
+        with self.lock:
+            balance: int | None = self.balances.get(user_id)
+            if balance is None:
+                return None
+            # Everyone with a higher balance is ranked above the user
+            higher_count: int = bisect.bisect_left(self.keys, (-balance, -1))
+            return higher_count + 1, balance
+    # endregion
+# endregion
@@ -1,7 +1,9 @@
 # region Imports
 # Standard library
 import hashlib
+import struct
 import time
+from typing import List, Tuple, TYPE_CHECKING
 
 # Third party
 import lazyimports
@@ -26,37 +28,155 @@ except ImportError:
                 "sponsorblockchain.sponsorblockchain_type_aliases:BlockData"):
             from sponsorblockchain.sponsorblockchain_types import (
                 BlockData)
+try:
+    from .merkle import (serialize_block_data_item, calculate_merkle_root,
+                         get_merkle_proof)
+    from .miner import find_nonce
+    if TYPE_CHECKING:
+        from .miner import Miner
+except ImportError:
+    try:
+        from models.merkle import (serialize_block_data_item,
+                                   calculate_merkle_root, get_merkle_proof)
+        from models.miner import find_nonce
+        if TYPE_CHECKING:
+            from models.miner import Miner
+    except ImportError:
+        from sponsorblockchain.models.merkle import (
+            serialize_block_data_item, calculate_merkle_root,
+            get_merkle_proof)
+        from sponsorblockchain.models.miner import find_nonce
+        if TYPE_CHECKING:
+            from sponsorblockchain.models.miner import Miner
 # endregion
 
 # region Block class
+# Version, index and timestamp at the start of a version 3 header
+HEADER_FIELDS = struct.Struct("<Bqd")
+# Length of each string in a version 3 header
+STRING_LENGTH = struct.Struct("<H")
+
+
+def get_hash_prefix(index: int,
+                    timestamp: float,
+                    data: object,
+                    previous_block_hash: str,
+                    version: int,
+                    merkle_root: str | None) -> bytes:
+    """
+    Gets everything that is hashed before the nonce. Only version 1 blocks
+    hash their data, as its text.
+
+    Raises:
+        struct.error: If a version 3 block has an index that does not fit
+            in 64 bits.
+    """
+    if version >= 3:
+        # Fixed-width numbers and length-prefixed strings, so that two
+        # different headers are never encoded the same way
+        merkle_root_bytes: bytes = (merkle_root or "").encode()
+        previous_block_hash_bytes: bytes = previous_block_hash.encode()
+        return (HEADER_FIELDS.pack(version, index, timestamp) +
+                STRING_LENGTH.pack(len(merkle_root_bytes)) +
+                merkle_root_bytes +
+                STRING_LENGTH.pack(len(previous_block_hash_bytes)) +
+                previous_block_hash_bytes)
+    if version == 2:
+        # The data is covered by the Merkle root
+        return f"{version}{index}{timestamp}{
+            merkle_root}{previous_block_hash}".encode()
+    return f"{index}{timestamp}{data}{previous_block_hash}".encode()
 
 
 class Block:
+    """
+    Version 1 blocks hash their whole data. Version 2 blocks hash a Merkle
+    root over the entries of their data instead, so that one entry can be
+    shown to be in the block with a proof the size of log2(entries).
+    Version 3 blocks have the Merkle root too, and hash their header as
+    compact bytes instead of Python's string forms of its fields.
+    """
+    # No per-instance dictionary, since many blocks can be loaded at once
+    __slots__ = ("index", "timestamp", "data", "previous_block_hash",
+                 "nonce", "version", "merkle_root", "block_hash")
+
     def __init__(self,
                  index: int,
                  data: BlockData,
                  previous_block_hash: str,
                  timestamp: float = 0.0,
                  nonce: int = 0,
-                 block_hash: str | None = None) -> None:
+                 block_hash: str | None = None,
+                 version: int = 1,
+                 merkle_root: str | None = None) -> None:
         self.index: int = index
         self.timestamp: float = timestamp if timestamp else time.time()
         self.data: BlockData = data
         self.previous_block_hash: str = previous_block_hash
         self.nonce: int = nonce
+        self.version: int = version
+        self.merkle_root: str | None = merkle_root
+        if version >= 2 and merkle_root is None:
+            self.merkle_root = self.calculate_merkle_root()
         self.block_hash: str = (
             block_hash if block_hash else self.calculate_hash())
 
     def calculate_hash(self) -> str:
-        block_contents: str = f"{self.index}{self.timestamp}{
-            self.data}{self.previous_block_hash}{self.nonce}"
-        hash_string: str = hashlib.sha256(block_contents.encode()).hexdigest()
+        block_contents: bytes = (
+            self.get_hash_prefix() + str(self.nonce).encode())
+        hash_string: str = hashlib.sha256(block_contents).hexdigest()
         # print(f"block_hash: {hash_string}")
         return hash_string
 
-    def mine_block(self, difficulty: int) -> None:
+    def get_hash_prefix(self) -> bytes:
+        """
+        Gets everything that is hashed before the nonce, which is the same
+        for every nonce tried while mining. The nonce is hashed as decimal
+        digits.
+
+        Raises:
+            struct.error: If a version 3 block has an index that does not
+                fit in 64 bits.
+        """
+        return get_hash_prefix(self.index, self.timestamp, self.data,
+                               self.previous_block_hash, self.version,
+                               self.merkle_root)
+
+    def get_merkle_leaves(self) -> List[bytes]:
+        return [serialize_block_data_item(item) for item in self.data]
+
+    def calculate_merkle_root(self) -> str:
+        return calculate_merkle_root(self.get_merkle_leaves())
+
+    def get_merkle_proof(self, position: int) -> List[Tuple[str, str]]:
+        """
+        Gets the proof that the entry at `position` in the block data is
+        covered by the block's Merkle root.
+
+        Raises:
+            IndexError: If there is no entry at `position`.
+        """
+        return get_merkle_proof(self.get_merkle_leaves(), position)
+
+    def mine_block(self,
+                   difficulty: int,
+                   miner: "Miner | None" = None) -> None:
+        """
+        Finds a nonce from the current one on that gives a hash starting
+        with `difficulty` zeros.
+
+        Args:
+            difficulty (int): The number of leading zeros.
+            miner (Miner | None, optional): Spreads the search over several
+                processes. Default is None, which searches in this process.
+        """
         target: str = "0" * difficulty  # Create a string of zeros
-        while not self.block_hash.startswith(target):
-            self.nonce += 1
-            self.block_hash = self.calculate_hash()
+        if self.block_hash.startswith(target):
+            return
+        prefix: bytes = self.get_hash_prefix()
+        if miner is None:
+            self.nonce = find_nonce(prefix, difficulty, self.nonce + 1)
+        else:
+            self.nonce = miner.mine(prefix, difficulty, self.nonce + 1)
+        self.block_hash = self.calculate_hash()
 # endregion
@@ -0,0 +1,235 @@
+# region Imports
+# Standard library
+import os
+import mmap
+from array import array
+from pathlib import Path
+from typing import List, Tuple
+# endregion
+
+# region Block index class
+
+
+class BlockIndex:
+    """
+    Persistent index of where each block is stored in the blockchain file.
+
+    The index file next to the blockchain file holds one record per block,
+    ordered by height: the byte offset of the block's line and the length of
+    the line (including the line break). The records are also kept in memory,
+    so that finding a block never requires scanning the blockchain file.
+
+    Blocks are read without a lock while the index is being brought up to
+    date. Appended blocks are indexed in place, with the length of a line
+    stored before its offset, so readers that go by the number of offsets
+    never see a line without its length. A rebuild fills new records and
+    publishes them in one assignment.
+    """
+    # Offset and length, both unsigned 64-bit integers
+    RECORD_SIZE: int = 16
+
+    def __init__(self, blockchain_path: Path) -> None:
+        self.blockchain_path: Path = blockchain_path
+        self.index_path: Path = blockchain_path.with_name(
+            blockchain_path.stem + "_index.bin")
+        # Offsets and lengths, replaced together
+        self.records: Tuple[array[int], array[int]] = (array("Q"),
+                                                       array("Q"))
+        # Size and modification time of the blockchain file as of the last
+        # time the index was brought up to date
+        self.file_size: int = 0
+        self.file_mtime_ns: int = 0
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @property
+    def offsets(self) -> "array[int]":
+        return self.records[0]
+
+    @property
+    def lengths(self) -> "array[int]":
+        return self.records[1]
+
+    @property
+    def indexed_size(self) -> int:
+        """
+        The number of bytes of the blockchain file covered by the index.
+        """
+        offsets, lengths = self.records
+        if not offsets:
+            return 0
+        return offsets[-1] + lengths[-1]
+
+    # region Load
+    def load(self) -> None:
+        """
+        Loads the index file, or rebuilds it if it is missing or does not
+        match the blockchain file.
+        """
+        self.records = (array("Q"), array("Q"))
+        self.file_size = 0
+        self.file_mtime_ns = 0
+        if not os.path.exists(self.index_path):
+            print("Block index not found. It will be rebuilt.")
+            self.rebuild()
+            return
+        records: array[int] = array("Q")
+        with open(self.index_path, "rb") as file:
+            contents: bytes = file.read()
+        # Ignore a partially written record at the end
+        usable_size: int = (
+            len(contents) - len(contents) % self.RECORD_SIZE)
+        records.frombytes(contents[:usable_size])
+        self.records = (records[0::2], records[1::2])
+        if not self.matches_blockchain_file():
+            print("Block index does not match the blockchain file. "
+                  "It will be rebuilt.")
+            self.rebuild()
+            return
+        # Index blocks appended while the index was not being maintained
+        added: List[int] = self.index_lines(self.indexed_size, *self.records)
+        if added:
+            self.write_records(added)
+
+    def matches_blockchain_file(self) -> bool:
+        """
+        Checks cheaply that the indexed lines still start and end with line
+        breaks where the index says they do.
+        """
+        if not os.path.exists(self.blockchain_path):
+            return not self.offsets
+        if not self.offsets:
+            return True
+        file_size: int = os.stat(self.blockchain_path).st_size
+        end: int = self.indexed_size
+        if end > file_size:
+            return False
+        last_offset: int = self.offsets[-1]
+        with open(self.blockchain_path, "rb") as file:
+            file.seek(end - 1)
+            if file.read(1) != b"\n":
+                return False
+            if last_offset > 0:
+                file.seek(last_offset - 1)
+                if file.read(1) != b"\n":
+                    return False
+        return True
+
+    def rebuild(self) -> None:
+        """
+        Rebuilds the index from the blockchain file and rewrites the index
+        file.
+        """
+        # Readers keep using the old records until the new ones are done
+        offsets: array[int] = array("Q")
+        lengths: array[int] = array("Q")
+        self.file_size = 0
+        self.file_mtime_ns = 0
+        added: List[int] = []
+        if os.path.exists(self.blockchain_path):
+            added = self.index_lines(0, offsets, lengths)
+        directories: Path = self.index_path.parent
+        os.makedirs(directories, exist_ok=True)
+        with open(self.index_path, "wb") as file:
+            file.write(array("Q", added).tobytes())
+        self.records = (offsets, lengths)
+        print(f"Block index rebuilt ({len(offsets)} blocks).")
+
+    def index_lines(self,
+                    start: int,
+                    offsets: "array[int]",
+                    lengths: "array[int]") -> List[int]:
+        """
+        Indexes the complete lines of the blockchain file from byte offset
+        `start` onwards, appending them to `offsets` and `lengths`.
+
+        Returns:
+            List[int]: Offsets and lengths of the lines that were added,
+                flattened.
+        """
+        added: List[int] = []
+        with open(self.blockchain_path, "rb") as file:
+            file.seek(start)
+            offset: int = start
+            for line in file:
+                if not line.endswith(b"\n"):
+                    # A block that is still being written
+                    break
+                length: int = len(line)
+                lengths.append(length)
+                offsets.append(offset)
+                added.append(offset)
+                added.append(length)
+                offset += length
+            stat: os.stat_result = os.fstat(file.fileno())
+        self.file_size = stat.st_size
+        self.file_mtime_ns = stat.st_mtime_ns
+        return added
+    # endregion
+
+    # region Update
+    def refresh(self) -> None:
+        """
+        Brings the index up to date with the blockchain file. Blocks
+        appended to the file are indexed incrementally; any other change
+        rebuilds the index.
+        """
+        try:
+            stat: os.stat_result = os.stat(self.blockchain_path)
+        except FileNotFoundError:
+            if self.offsets or self.file_size:
+                self.rebuild()
+            return
+        if (stat.st_size == self.file_size and
+                stat.st_mtime_ns == self.file_mtime_ns):
+            return
+        end: int = self.indexed_size
+        if stat.st_size < end or (stat.st_size == end and
+                                  stat.st_mtime_ns != self.file_mtime_ns):
+            print("The blockchain file has changed. "
+                  "The block index will be rebuilt.")
+            self.rebuild()
+            return
+        if not self.matches_blockchain_file():
+            print("The blockchain file has changed. "
+                  "The block index will be rebuilt.")
+            self.rebuild()
+            return
+        added: List[int] = self.index_lines(end, *self.records)
+        if added:
+            self.write_records(added)
+
+    def write_records(self, values: List[int]) -> None:
+        with open(self.index_path, "ab") as file:
+            file.write(array("Q", values).tobytes())
+    # endregion
+
+    # region Read
+    def read_lines(self, start: int, stop: int) -> List[bytes]:
+        """
+        Reads the lines of the blocks from height `start` up to, but not
+        including, height `stop`, without line breaks.
+        """
+        # The records as of now, even if the index is rebuilt meanwhile
+        offsets, lengths = self.records
+        start = max(start, 0)
+        stop = min(stop, len(offsets))
+        if start >= stop:
+            return []
+        end: int = offsets[stop - 1] + lengths[stop - 1]
+        lines: List[bytes] = []
+        with open(self.blockchain_path, "rb") as file:
+            with mmap.mmap(file.fileno(), length=0,
+                           access=mmap.ACCESS_READ) as mapped_file:
+                if end > len(mapped_file):
+                    raise ValueError("The blockchain file is shorter than "
+                                     "the block index.")
+                for height in range(start, stop):
+                    offset: int = offsets[height]
+                    line: bytes = mapped_file[offset:offset + lengths[height]]
+                    lines.append(line.rstrip(b"\r\n"))
+        return lines
+    # endregion
+# endregion
@@ -0,0 +1,201 @@
+# region Imports
+# Standard library
+import hashlib
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+# Third party
+from pydantic_core import from_json
+
+# Local
+try:
+    from ..sponsorblockchain_types import (
+        BlockData, BlockDataAdapter, Transaction)
+    from .block import Block, get_hash_prefix
+    from .merkle import (calculate_merkle_root, serialize_block_data_item,
+                         serialize_transaction)
+except ImportError:
+    try:
+        from sponsorblockchain.sponsorblockchain_types import (
+            BlockData, BlockDataAdapter, Transaction)
+        from models.block import Block, get_hash_prefix
+        from models.merkle import (calculate_merkle_root,
+                                   serialize_block_data_item,
+                                   serialize_transaction)
+    except ImportError:
+        from sponsorblockchain.sponsorblockchain_types import (
+            BlockData, BlockDataAdapter, Transaction)
+        from sponsorblockchain.models.block import Block, get_hash_prefix
+        from sponsorblockchain.models.merkle import (
+            calculate_merkle_root, serialize_block_data_item,
+            serialize_transaction)
+# endregion
+
+# region Records
+
+
+class TransactionRecord(NamedTuple):
+    """
+    A transaction as a plain tuple, for reading many of them. Transaction
+    models are only made from it where they are needed.
+    """
+    sender: str
+    receiver: str
+    amount: int
+    method: str
+
+    def __str__(self) -> str:
+        # The same as str() of a Transaction model
+        return (f"sender={self.sender!r} receiver={self.receiver!r} "
+                f"amount={self.amount!r} method={self.method!r}")
+
+    @classmethod
+    def from_model(cls, transaction: Transaction) -> "TransactionRecord":
+        return cls(transaction.sender, transaction.receiver,
+                   transaction.amount, transaction.method)
+
+    def to_model(self) -> Transaction:
+        return Transaction(sender=self.sender,
+                           receiver=self.receiver,
+                           amount=self.amount,
+                           method=self.method)
+
+
+# Block data with each {"transaction": ...} entry as a TransactionRecord
+RecordData = Tuple[str | TransactionRecord, ...]
+
+
+class BlockRecord(NamedTuple):
+    """
+    A block as a plain tuple, for reading many of them. Unlike a Block, it
+    has no per-instance dictionary and cannot be changed.
+    """
+    index: int
+    timestamp: float
+    data: RecordData
+    previous_block_hash: str
+    nonce: int
+    block_hash: str
+    version: int = 1
+    merkle_root: str | None = None
+
+    @classmethod
+    def from_block(cls, block: Block) -> "BlockRecord":
+        return cls(block.index, block.timestamp, to_record_data(block.data),
+                   block.previous_block_hash, block.nonce, block.block_hash,
+                   block.version, block.merkle_root)
+
+    def to_block(self) -> Block:
+        return Block(index=self.index,
+                     timestamp=self.timestamp,
+                     data=to_block_data(self.data),
+                     previous_block_hash=self.previous_block_hash,
+                     nonce=self.nonce,
+                     block_hash=self.block_hash,
+                     version=self.version,
+                     merkle_root=self.merkle_root)
+
+    def calculate_hash(self) -> str:
+        """
+        Calculates the hash the Block would have, without building it.
+
+        Raises:
+            struct.error: If a version 3 block has an index that does not
+                fit in 64 bits.
+        """
+        # Only version 1 blocks hash their data, as text
+        data_text: str = (
+            format_record_data(self.data) if self.version < 2 else "")
+        block_contents: bytes = get_hash_prefix(
+            self.index, self.timestamp, data_text, self.previous_block_hash,
+            self.version, self.merkle_root) + str(self.nonce).encode()
+        return hashlib.sha256(block_contents).hexdigest()
+
+    def get_merkle_leaves(self) -> List[bytes]:
+        return [serialize_transaction(*item)
+                if isinstance(item, TransactionRecord)
+                else serialize_block_data_item(item) for item in self.data]
+
+    def calculate_merkle_root(self) -> str:
+        return calculate_merkle_root(self.get_merkle_leaves())
+# endregion
+
+# region Conversion
+
+
+def to_record_data(data: BlockData) -> RecordData:
+    """
+    Converts block data to record data.
+
+    Raises:
+        ValueError: If an entry is a dictionary with keys other than
+            "transaction", which records cannot hold.
+    """
+    record_data: List[str | TransactionRecord] = []
+    for item in data:
+        if isinstance(item, str):
+            record_data.append(item)
+        elif len(item) == 1 and "transaction" in item:
+            record_data.append(
+                TransactionRecord.from_model(item["transaction"]))
+        else:
+            raise ValueError("Only transactions can be converted to "
+                             "records.")
+    return tuple(record_data)
+
+
+def to_block_data(data: RecordData) -> BlockData:
+    """
+    Converts record data back to block data with Transaction models.
+    """
+    return [item if isinstance(item, str)
+            else {"transaction": item.to_model()} for item in data]
+
+
+def format_record_data(data: RecordData) -> str:
+    """
+    Formats record data the way str() formats the block data it stands for,
+    which is the text version 1 blocks hash.
+    """
+    return "[" + ", ".join(
+        f"{{'transaction': Transaction(sender={item.sender!r}, "
+        f"receiver={item.receiver!r}, amount={item.amount!r}, "
+        f"method={item.method!r})}}"
+        if isinstance(item, TransactionRecord) else repr(item)
+        for item in data) + "]"
+
+
+def parse_record_data(raw_data: bytes) -> RecordData:
+    """
+    Decodes block data stored as JSON straight into records, without making
+    Transaction models. Transactions that are not stored the way they are
+    written, with four fields of the right types, are validated with the
+    Transaction model instead, so that the same data is accepted.
+
+    Raises:
+        ValueError: If the data is not valid block data.
+    """
+    items: Any = from_json(raw_data)
+    if type(items) is list:
+        record_data: List[str | TransactionRecord] = []
+        for item in items:
+            if type(item) is str:
+                record_data.append(item)
+                continue
+            if type(item) is dict and len(item) == 1:
+                transaction: Any = item.get("transaction")
+                if type(transaction) is dict and len(transaction) == 4:
+                    fields: Dict[str, Any] = transaction
+                    sender: Any = fields.get("sender")
+                    receiver: Any = fields.get("receiver")
+                    amount: Any = fields.get("amount")
+                    method: Any = fields.get("method")
+                    if (type(sender) is str and type(receiver) is str and
+                            type(amount) is int and type(method) is str):
+                        record_data.append(TransactionRecord(
+                            sender, receiver, amount, method))
+                        continue
+            break
+        else:
+            return tuple(record_data)
+    return to_record_data(BlockDataAdapter.validate_python(items))
+# endregion
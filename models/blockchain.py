@@ -7,14 +7,22 @@
 import os
 import json
 import hashlib
+import struct
 import enum
+import itertools
+import contextlib
+import threading
+import multiprocessing
+import concurrent.futures
+from concurrent.futures import Future
 from pathlib import Path
-from io import TextIOWrapper
-from typing import Generator, Tuple, List, Any, cast
+from typing import (Generator, Tuple, List, Dict, Any, BinaryIO, TypedDict,
+                    NamedTuple, Collection, Sequence, cast)
 
 # Third party
 import lazyimports
-import pandas as pd
+import numpy as np
+import numpy.typing as npt
 from pydantic import ValidationError
 
 # Local
@@ -24,11 +32,35 @@ try:
     with lazyimports.lazy_imports(
             "..sponsorblockchain_type_aliases:Transaction",
             "..sponsorblockchain_type_aliases:BlockData",
-            "..sponsorblockchain_type_aliases:BlockModel"):
+            "..sponsorblockchain_type_aliases:BlockDataAdapter",
+            "..sponsorblockchain_type_aliases:BlockModel",
+            "..sponsorblockchain_type_aliases:ValidationCheckpoint"):
         from ..sponsorblockchain_types import (
-            BlockData, BlockModel, Transaction)
+            BlockData, BlockDataAdapter, BlockModel, Transaction,
+            ValidationCheckpoint)
     with lazyimports.lazy_imports("..models.block:Block"):
         from ..models.block import Block
+    with lazyimports.lazy_imports("..models.stored_block:StoredBlock"):
+        from ..models.stored_block import StoredBlock
+    with lazyimports.lazy_imports("..models.ledger:Ledger"):
+        from ..models.ledger import Ledger
+    with lazyimports.lazy_imports("..models.block_index:BlockIndex"):
+        from ..models.block_index import BlockIndex
+    with lazyimports.lazy_imports("..models.chain_writer:ChainWriter",
+                                  "..models.chain_writer:FsyncPolicy"):
+        from ..models.chain_writer import ChainWriter, FsyncPolicy
+    with lazyimports.lazy_imports("..models.miner:Miner"):
+        from ..models.miner import Miner
+    with lazyimports.lazy_imports(
+            "..models.transaction_store:TransactionStore"):
+        from ..models.transaction_store import TransactionStore
+    with lazyimports.lazy_imports(
+            "..models.balance_ranking:BalanceRanking"):
+        from ..models.balance_ranking import BalanceRanking
+    with lazyimports.lazy_imports(
+            "..models.transaction_history_index:TransactionHistoryIndex"):
+        from ..models.transaction_history_index import (
+            TransactionHistoryIndex)
 except ImportError:
     try:
         # Running the blockchain directly from a script
@@ -36,12 +68,35 @@ except ImportError:
         with lazyimports.lazy_imports(
                 "sponsorblockchain_type_aliases:Transaction",
                 "sponsorblockchain_type_aliases:BlockData",
-                "sponsorblockchain_type_aliases:BlockModel"):
+                "sponsorblockchain_type_aliases:BlockDataAdapter",
+                "sponsorblockchain_type_aliases:BlockModel",
+                "sponsorblockchain_type_aliases:ValidationCheckpoint"):
             from sponsorblockchain.sponsorblockchain_types import (
-                Transaction, BlockData,
-                BlockModel)
+                Transaction, BlockData, BlockDataAdapter,
+                BlockModel, ValidationCheckpoint)
         with lazyimports.lazy_imports("models.block:Block"):
             from models.block import Block
+        with lazyimports.lazy_imports("models.stored_block:StoredBlock"):
+            from models.stored_block import StoredBlock
+        with lazyimports.lazy_imports("models.ledger:Ledger"):
+            from models.ledger import Ledger
+        with lazyimports.lazy_imports("models.block_index:BlockIndex"):
+            from models.block_index import BlockIndex
+        with lazyimports.lazy_imports("models.chain_writer:ChainWriter",
+                                      "models.chain_writer:FsyncPolicy"):
+            from models.chain_writer import ChainWriter, FsyncPolicy
+        with lazyimports.lazy_imports("models.miner:Miner"):
+            from models.miner import Miner
+        with lazyimports.lazy_imports(
+                "models.transaction_store:TransactionStore"):
+            from models.transaction_store import TransactionStore
+        with lazyimports.lazy_imports(
+                "models.balance_ranking:BalanceRanking"):
+            from models.balance_ranking import BalanceRanking
+        with lazyimports.lazy_imports(
+                "models.transaction_history_index:TransactionHistoryIndex"):
+            from models.transaction_history_index import (
+                TransactionHistoryIndex)
     except ImportError:
         # Running the blockchain as a package
         transaction_import: str = (
@@ -49,15 +104,103 @@ except ImportError:
         block_data_transaction_dicts_import: str = (
             "sponsorblockchain.sponsorblockchain_type_aliases:"
             "BlockDataLegacy")
+        validation_checkpoint_import: str = (
+            "sponsorblockchain.sponsorblockchain_type_aliases:"
+            "ValidationCheckpoint")
         with lazyimports.lazy_imports(
                 transaction_import,
                 "sponsorblockchain.sponsorblockchain_type_aliases:BlockData",
+                "sponsorblockchain.sponsorblockchain_type_aliases:"
+                "BlockDataAdapter",
                 "sponsorblockchain.sponsorblockchain_type_aliases:BlockModel",
-                block_data_transaction_dicts_import):
+                block_data_transaction_dicts_import,
+                validation_checkpoint_import):
             from sponsorblockchain.sponsorblockchain_types import (
-                Transaction, BlockData, BlockModel)
+                Transaction, BlockData, BlockDataAdapter, BlockModel,
+                ValidationCheckpoint)
         with lazyimports.lazy_imports("sponsorblockchain.models.block:Block"):
             from sponsorblockchain.models.block import Block
+        with lazyimports.lazy_imports(
+                "sponsorblockchain.models.stored_block:StoredBlock"):
+            from sponsorblockchain.models.stored_block import StoredBlock
+        with lazyimports.lazy_imports(
+                "sponsorblockchain.models.ledger:Ledger"):
+            from sponsorblockchain.models.ledger import Ledger
+        with lazyimports.lazy_imports(
+                "sponsorblockchain.models.block_index:BlockIndex"):
+            from sponsorblockchain.models.block_index import BlockIndex
+        with lazyimports.lazy_imports(
+                "sponsorblockchain.models.chain_writer:ChainWriter",
+                "sponsorblockchain.models.chain_writer:FsyncPolicy"):
+            from sponsorblockchain.models.chain_writer import (
+                ChainWriter, FsyncPolicy)
+        with lazyimports.lazy_imports("sponsorblockchain.models.miner:Miner"):
+            from sponsorblockchain.models.miner import Miner
+        with lazyimports.lazy_imports(
+                "sponsorblockchain.models.transaction_store:TransactionStore"):
+            from sponsorblockchain.models.transaction_store import (
+                TransactionStore)
+        with lazyimports.lazy_imports(
+                "sponsorblockchain.models.balance_ranking:BalanceRanking"):
+            from sponsorblockchain.models.balance_ranking import (
+                BalanceRanking)
+        transaction_history_index_import: str = (
+            "sponsorblockchain.models.transaction_history_index:"
+            "TransactionHistoryIndex")
+        with lazyimports.lazy_imports(transaction_history_index_import):
+            from sponsorblockchain.models.transaction_history_index import (
+                TransactionHistoryIndex)
+# Records are checked with isinstance, which needs the class itself
+try:
+    from .block_record import (BlockRecord, TransactionRecord,
+                               format_record_data)
+except ImportError:
+    try:
+        from models.block_record import (BlockRecord, TransactionRecord,
+                                         format_record_data)
+    except ImportError:
+        from sponsorblockchain.models.block_record import (
+            BlockRecord, TransactionRecord, format_record_data)
+# endregion
+
+# region Chain tip
+
+
+class ChainTip(NamedTuple):
+    """
+    The last block of the chain as of one moment. A new tip is published in
+    one assignment after every append, so readers never see a mix of two.
+    """
+    block: Block | None
+    # The block serialized as it is stored in the blockchain file
+    block_json: str | None
+    chain_length: int
+    # Size, modification time, inode and device of the blockchain file
+    file_state: Tuple[int, int, int, int] | None
+# endregion
+
+# region Tx file validation
+
+
+class TransactionsValidation(NamedTuple):
+    """
+    The result of validating the transactions file against the blockchain
+    file, and how far both files had been validated.
+    """
+    message: str
+    is_valid: bool
+    # Size, modification time, inode and device of each file when they
+    # were validated
+    blockchain_file_state: Tuple[int, int, int, int] | None
+    transactions_file_state: Tuple[int, int, int, int] | None
+    # The state each file should be in if nothing but append_to_files has
+    # changed it since
+    expected_blockchain_file_state: Tuple[int, int, int, int] | None
+    expected_transactions_file_state: Tuple[int, int, int, int] | None
+    # The validated blocks and the size of the validated part of the
+    # transactions file
+    chain_length: int
+    transactions_size: int
 # endregion
 
 
@@ -65,9 +208,87 @@ class Blockchain:
     # region Chain init
     def __init__(self,
                  blockchain_path: str = "data/blockchain.json",
-                 transactions_path: str = "data/transactions.tsv") -> None:
+                 transactions_path: str = "data/transactions.tsv",
+                 fsync_policy: FsyncPolicy = FsyncPolicy.NONE,
+                 fsync_interval_ms: int = 50,
+                 fsync_max_blocks: int = 100,
+                 block_version: int = 1,
+                 mining_processes: int | None = None) -> None:
+        """
+        Args:
+            blockchain_path (str, optional): Path of the blockchain file.
+            transactions_path (str, optional): Path of the transactions
+                file.
+            fsync_policy (FsyncPolicy, optional): When appended blocks and
+                transactions are flushed to disk. Default is
+                FsyncPolicy.NONE, which leaves it to the operating system.
+            fsync_interval_ms (int, optional): With FsyncPolicy.GROUP, the
+                longest time an append waits to be flushed. Default is 50.
+            fsync_max_blocks (int, optional): With FsyncPolicy.GROUP, the
+                number of blocks that are flushed without waiting for
+                `fsync_interval_ms` to pass. Default is 100.
+            block_version (int, optional): The format of new blocks. 1
+                hashes the whole block data, 2 hashes a Merkle root over its
+                entries instead, and 3 also hashes the header as compact
+                bytes. Blocks already on the chain keep their format.
+                Default is 1.
+            mining_processes (int | None, optional): The number of
+                processes that mine blocks with a difficulty of 5 or more.
+                Default is None, which uses one per CPU.
+
+        Raises:
+            ValueError: If `block_version` is not a known format.
+        """
+        if block_version not in (1, 2, 3):
+            raise ValueError(f"Unknown block version: {block_version}")
+        self.block_version: int = block_version
+        # Started by the first block that is hard enough to need it
+        self.miner: Miner = Miner(processes=mining_processes)
         self.blockchain_path: Path = Path(blockchain_path)
         self.transactions_path: Path = Path(transactions_path)
+        # Owns the open blockchain and transactions files
+        self.chain_writer: ChainWriter = ChainWriter(
+            blockchain_path=self.blockchain_path,
+            transactions_path=self.transactions_path,
+            fsync_policy=fsync_policy,
+            fsync_interval_ms=fsync_interval_ms,
+            fsync_max_blocks=fsync_max_blocks)
+        # Where each block is in the blockchain file,
+        # kept up to date by append_to_files
+        self.block_index: BlockIndex = BlockIndex(self.blockchain_path)
+        # Per-user totals, kept up to date by append_to_files
+        self.ledger: Ledger = Ledger(self.transactions_path)
+        self.ledger.load()
+        # Columnar copy of the transactions on the chain, kept up to date by
+        # append_to_files and brought up to date with the blockchain file
+        # by sync_transaction_store
+        self.transaction_store: TransactionStore = TransactionStore(
+            self.blockchain_path.with_name(
+                self.blockchain_path.stem + "_transaction_store"))
+        # Users by balance for leaderboards, built on first use and then
+        # kept up to date by append_to_files
+        self.balance_ranking: BalanceRanking = BalanceRanking()
+        # The transactions of each user, built on first use and then kept
+        # up to date by append_to_files
+        self.transaction_history_index: TransactionHistoryIndex = (
+            TransactionHistoryIndex())
+        # Held by anything that appends to or rewrites the files, or brings
+        # the in-memory state up to date with them. Readers do not take it
+        # unless the files have been changed by someone else.
+        self.append_lock: threading.RLock = threading.RLock()
+        # Kept up to date by append_to_files and reloaded if the blockchain
+        # file is changed by someone else (see refresh_tip)
+        self.tip: ChainTip = ChainTip(block=None,
+                                      block_json=None,
+                                      chain_length=0,
+                                      file_state=None)
+        # The last result of validating the transactions file, reused until
+        # either file changes (see validate_transactions_file_incrementally)
+        self.transactions_validation: TransactionsValidation | None = None
+        # How much of the blockchain file is_chain_valid has validated
+        self.validation_checkpoint_path: Path = (
+            self.blockchain_path.with_name(
+                self.blockchain_path.stem + "_validated.json"))
         file_exists: bool = os.path.exists(blockchain_path)
         file_empty: bool = file_exists and os.stat(
             self.blockchain_path).st_size == 0
@@ -75,6 +296,7 @@ class Blockchain:
             directories: Path = self.blockchain_path.parent
             os.makedirs(directories, exist_ok=True)
             self.create_genesis_block()
+        self.sync_transaction_store()
 
     def create_genesis_block(self) -> None:
         # genesis_block = Block(0, "Genesis Block", "0")
@@ -85,75 +307,331 @@ class Blockchain:
             previous_block_hash="0"
         )
         self.write_block_to_file(genesis_block)
+
+    def close(self) -> None:
+        """
+        Commits everything that has been appended and closes the blockchain
+        and transactions files.
+        """
+        self.chain_writer.close()
+        self.miner.close()
     # endregion
 
     # region Block ops
-    def write_block_to_file(self, block: Block) -> None:
+    def serialize_block(self, block: Block) -> str:
         # Serialize block data to JSON
         block_data: BlockData = block.data
-        # Convert the block object to Pydantic model for serialization
-        block_model_instance = BlockModel(
+        # Convert the block object to Pydantic model for serialization.
+        # The data of a block has already been validated, so it is not
+        # validated again.
+        block_model_instance = BlockModel.model_construct(
             index=block.index,
             timestamp=block.timestamp,
             data=block_data,
             previous_block_hash=block.previous_block_hash,
             nonce=block.nonce,
-            block_hash=block.block_hash
+            block_hash=block.block_hash,
+            version=block.version,
+            merkle_root=block.merkle_root
         )
         # Serialize the block model instance to JSON
-        block_serialized: str = block_model_instance.model_dump_json()
-        with open(self.blockchain_path, "a") as file:
-            # Write the serialized block data to the file with a newline
-            file.write(block_serialized + "\n")
+        if block.version == 1:
+            return block_model_instance.model_dump_json(
+                exclude={"version", "merkle_root"})
+        return block_model_instance.model_dump_json()
+
+    def write_block_to_file(self, block: Block) -> None:
+        self.write_blocks_to_file([block])
         # print(f"Block {block.index} written to file.")
 
+    def write_blocks_to_file(self, blocks: List[Block]) -> None:
+        """
+        Appends blocks to the blockchain file with a single write.
+        """
+        self.append_to_files(blocks=blocks, transactions=[]).result()
+
+    def replace_blockchain_file(self, contents: bytes) -> None:
+        """
+        Replaces the blockchain file with `contents` and brings the block
+        index, the tip, the ledger and the transaction store up to date
+        with it. Appends wait until the file has been replaced, and readers
+        see either the old file or the new one.
+        """
+        temporary_path: Path = self.blockchain_path.with_suffix(".tmp")
+        with self.append_lock:
+            # The file cannot be replaced while it is open on Windows
+            self.chain_writer.release_files()
+            with open(temporary_path, "wb") as file:
+                file.write(contents)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary_path, self.blockchain_path)
+            self.block_index.rebuild()
+            self.refresh_tip()
+            self.ledger.load()
+            self.transactions_validation = None
+            # Rebuilt if the new chain does not start with the old one
+            self.sync_transaction_store()
+
+    def append_to_files(
+            self,
+            blocks: List[Block],
+            transactions: List[Tuple[float, str, str, int, str]]
+            ) -> Future[None]:
+        """
+        Appends transactions to the transactions file and blocks to the
+        blockchain file through the chain writer, and waits until they have
+        been written. The ledger, the block index and the tip are then
+        updated.
+
+        Args:
+            blocks (List[Block]): The blocks to append.
+            transactions (List[Tuple[float, str, str, int, str]]): The
+                timestamp, sender, receiver, amount and method of each
+                transaction to append.
+
+        Returns:
+            Future[None]: Resolved once the append has been committed under
+                the fsync policy. Wait for it after releasing the append
+                lock, so that appends from other threads can share the
+                flush.
+        """
+        with self.append_lock:
+            if transactions:
+                file_existed: bool = os.path.exists(self.transactions_path)
+                if not file_existed:
+                    self.create_transactions_file()
+                # Pick up changes made to the file by someone else first,
+                # so that they are not mistaken for these transactions
+                self.ledger.sync()
+            # Index anything written to the file by someone else first
+            self.block_index.refresh()
+            validation: TransactionsValidation | None = (
+                self.transactions_validation)
+            # Whether the files are as this process left them
+            files_expected: bool = (
+                validation is not None and
+                validation.expected_blockchain_file_state ==
+                self.get_blockchain_file_state() and
+                validation.expected_transactions_file_state ==
+                get_file_state(self.transactions_path))
+            # Serialize the blocks and transactions, one per line
+            blocks_serialized: List[str] = [
+                self.serialize_block(block) for block in blocks]
+            block_lines: str = "".join(
+                block_serialized + "\n"
+                for block_serialized in blocks_serialized)
+            transaction_lines: str = "".join(
+                f"{timestamp}\t{sender}\t{receiver}\t{amount}\t{method}\n"
+                for timestamp, sender, receiver, amount, method
+                in transactions)
+            committed: Future[None] = self.chain_writer.append(
+                block_lines=block_lines,
+                transaction_lines=transaction_lines,
+                block_count=len(blocks))
+            if transactions:
+                for _, sender, receiver, amount, method in transactions:
+                    self.ledger.add_transaction(
+                        sender, receiver, amount, method)
+                self.ledger.mark_synced()
+            # Index the new blocks
+            self.block_index.refresh()
+            if blocks:
+                self.tip = ChainTip(
+                    block=blocks[-1],
+                    block_json=blocks_serialized[-1],
+                    chain_length=len(self.block_index),
+                    file_state=self.get_blockchain_file_state())
+                if (self.transaction_store.chain_length + len(blocks) ==
+                        self.tip.chain_length):
+                    self.transaction_store.append(
+                        transactions=[
+                            transaction for block in blocks
+                            for transaction in self.get_block_transactions(
+                                block)],
+                        chain_length=self.tip.chain_length,
+                        last_block_hash=blocks[-1].block_hash)
+                else:
+                    # The store was behind before these blocks
+                    self.sync_transaction_store()
+                if self.balance_ranking.is_built():
+                    self.balance_ranking.update(self.transaction_store,
+                                                Ledger.UNDEDUCTED_METHODS)
+                if self.transaction_history_index.is_built():
+                    self.transaction_history_index.update(
+                        self.transaction_store)
+            if validation is not None and files_expected:
+                # The appended part is validated by the next validation
+                self.transactions_validation = validation._replace(
+                    expected_blockchain_file_state=(
+                        self.get_blockchain_file_state()),
+                    expected_transactions_file_state=get_file_state(
+                        self.transactions_path))
+        return committed
+
+    def check_transaction(self,
+                          transaction: Transaction,
+                          allow_huge_transaction: bool = False) -> str | None:
+        """
+        Checks that a transaction can be added to the blockchain.
+
+        Returns:
+            str | None: Why the transaction cannot be added, or None if it
+                can be added.
+        """
+        if transaction.sender == "":
+            return "Transaction sender is empty."
+        elif transaction.receiver == "":
+            return "Transaction receiver is empty."
+        elif transaction.amount == 0:
+            return "Transaction amount is 0."
+        elif (transaction.amount > 2147483647 and
+              not allow_huge_transaction):
+            return "Transaction amount is too large."
+        elif transaction.amount > 9223372036854775807:
+            # Balances and the transaction store use 64-bit integers
+            return "Transaction amount is too large."
+        elif transaction.amount > 2147483647:
+            print("WARNING: Transaction limit overridden.")
+        elif transaction.amount < -2147483648:
+            return "Transaction amount is too small."
+        return None
+
     def add_block(
             self,
             data: BlockData,
             difficulty: int = 0,
-            allow_huge_transaction: bool = False) -> None:
-        latest_block: None | Block = self.get_last_block()
-        new_block = Block(
-            index=(latest_block.index + 1) if latest_block else 0,
-            data=data,
-            previous_block_hash=(
-                latest_block.block_hash if latest_block else "0"))
-        if difficulty > 0:
-            new_block.mine_block(difficulty)
-        for item in new_block.data:
-            if isinstance(item, dict) and "transaction" in item:
-                print("Transaction found.")
-                transaction: Transaction = (
-                    item["transaction"])
-                if transaction.sender == "":
-                    print("Transaction sender is empty.")
-                    return
-                elif transaction.receiver == "":
-                    print("Transaction receiver is empty.")
-                    return
-                elif transaction.amount == 0:
-                    print("Transaction amount is 0.")
-                    return
-                elif (transaction.amount > 2147483647 and
-                      not allow_huge_transaction):
-                    print("Transaction amount is too large.")
-                    return
-                elif transaction.amount > 2147483647:
-                    print("WARNING: Transaction limit overridden.")
-                elif transaction.amount < -2147483648:
-                    print("Transaction amount is too small.")
-                    return
-                # TODO Add hash for each transaction
-                self.store_transaction(
-                    new_block.timestamp,
-                    transaction.sender,
-                    transaction.receiver,
-                    transaction.amount,
-                    transaction.method
-                )
-        self.write_block_to_file(new_block)
-
-    def load_block(self, json_block: str) -> Block:
+            allow_huge_transaction: bool = False) -> Tuple[Block, str]:
+        """
+        Adds a block to the end of the chain.
+
+        Returns:
+            Tuple[Block, str]: The block that was added and the block
+                serialized as it was written to the blockchain file.
+
+        Raises:
+            ValueError: If one of its transactions cannot be added. The block
+                is not added in that case.
+        """
+        # Nothing else may be appended between reading the last block and
+        # appending the new one, or both would claim the same index
+        with self.append_lock:
+            latest_block: None | Block = self.get_last_block()
+            new_block = Block(
+                index=(latest_block.index + 1) if latest_block else 0,
+                data=data,
+                previous_block_hash=(
+                    latest_block.block_hash if latest_block else "0"),
+                version=self.block_version)
+            if difficulty > 0:
+                new_block.mine_block(difficulty, self.miner)
+            transactions: List[Tuple[float, str, str, int, str]] = []
+            for item in new_block.data:
+                if isinstance(item, dict) and "transaction" in item:
+                    print("Transaction found.")
+                    transaction: Transaction = (
+                        item["transaction"])
+                    problem: str | None = self.check_transaction(
+                        transaction, allow_huge_transaction)
+                    if problem:
+                        print(problem)
+                        raise ValueError(problem)
+                    # TODO Add hash for each transaction
+                    transactions.append((new_block.timestamp,
+                                         transaction.sender,
+                                         transaction.receiver,
+                                         transaction.amount,
+                                         transaction.method))
+            # The block and its transactions are committed together
+            committed: Future[None] = self.append_to_files(
+                blocks=[new_block], transactions=transactions)
+            # The tip is the new block until the append lock is released
+            new_block_json: str | None = self.tip.block_json
+            if new_block_json is None:
+                new_block_json = self.serialize_block(new_block)
+        committed.result()
+        return new_block, new_block_json
+
+    def add_blocks(
+            self,
+            data_list: List[BlockData],
+            difficulty: int = 0,
+            allow_huge_transaction: bool = False) -> List[Block]:
+        """
+        Adds several blocks at once. Every transaction is checked before
+        anything is written, and then the blocks and their transactions are
+        appended with a single write per file.
+
+        Args:
+            data_list (List[BlockData]): The data of each block, in order.
+            difficulty (int, optional): Mining difficulty. Default is 0.
+            allow_huge_transaction (bool, optional): Allow transactions
+                larger than a 32-bit integer. Default is False.
+
+        Returns:
+            List[Block]: The blocks that were added.
+
+        Raises:
+            ValueError: If there is no data or if a transaction cannot be
+                added. No blocks are added in that case.
+        """
+        if len(data_list) == 0:
+            raise ValueError("No blocks to add.")
+        for position, data in enumerate(data_list):
+            for item in data:
+                if isinstance(item, dict) and "transaction" in item:
+                    problem: str | None = self.check_transaction(
+                        item["transaction"], allow_huge_transaction)
+                    if problem:
+                        raise ValueError(f"Block {position}: {problem}")
+        with self.append_lock:
+            latest_block: None | Block = self.get_last_block()
+            new_blocks: List[Block] = []
+            transactions: List[Tuple[float, str, str, int, str]] = []
+            for data in data_list:
+                new_block = Block(
+                    index=(latest_block.index + 1) if latest_block else 0,
+                    data=data,
+                    previous_block_hash=(
+                        latest_block.block_hash if latest_block else "0"),
+                    version=self.block_version)
+                if difficulty > 0:
+                    new_block.mine_block(difficulty, self.miner)
+                transactions.extend(self.get_block_transactions(new_block))
+                new_blocks.append(new_block)
+                latest_block = new_block
+            committed: Future[None] = self.append_to_files(
+                blocks=new_blocks, transactions=transactions)
+        committed.result()
+        print(f"{len(new_blocks)} blocks added.")
+        return new_blocks
+
+    @staticmethod
+    def get_block_transactions(
+            block: Block | StoredBlock
+    ) -> List[Tuple[float, str, str, int, str]]:
+        """
+        Gets the timestamp, sender, receiver, amount and method of each
+        transaction in a block. A stored block needs its timestamp decoded
+        and its data parsed.
+        """
+        timestamp: float = cast(float, block.timestamp)
+        transactions: List[Tuple[float, str, str, int, str]] = []
+        for item in block.data:
+            if isinstance(item, TransactionRecord):
+                transactions.append((timestamp, item.sender, item.receiver,
+                                     item.amount, item.method))
+            elif isinstance(item, dict) and "transaction" in item:
+                transaction: Transaction = item["transaction"]
+                transactions.append((timestamp,
+                                     transaction.sender,
+                                     transaction.receiver,
+                                     transaction.amount,
+                                     transaction.method))
+        return transactions
+
+    @staticmethod
+    def load_block(json_block: str) -> Block:
         # Deserialize JSON data using Pydantic
         block_model: BlockModel = (
             BlockModel.model_validate_json(json_block))
@@ -164,57 +642,219 @@ class Blockchain:
             data=block_data,
             previous_block_hash=block_model.previous_block_hash,
             nonce=block_model.nonce,
-            block_hash=block_model.block_hash
+            block_hash=block_model.block_hash,
+            version=block_model.version,
+            merkle_root=block_model.merkle_root
         )
         return block
 
+    def get_block(self, index: int) -> None | Block:
+        """
+        Gets the block at height `index` without scanning the blockchain
+        file.
+        """
+        # Blocks appended after the snapshot are not visible to this read
+        tip: ChainTip = self.get_tip()
+        if index < 0 or index >= tip.chain_length:
+            return None
+        line: bytes = self.block_index.read_lines(index, index + 1)[0]
+        return self.load_block(line.decode())
+
+    def get_blocks(self, start: int, stop: int) -> List[Block]:
+        """
+        Gets the blocks from height `start` up to, but not including,
+        height `stop`.
+        """
+        tip: ChainTip = self.get_tip()
+        lines: List[bytes] = self.block_index.read_lines(
+            start, min(stop, tip.chain_length))
+        return [self.load_block(line.decode()) for line in lines]
+
+    def iter_block_lines(
+            self,
+            start: int,
+            stop: int,
+            batch_size: int = 1000) -> Generator[bytes, None, None]:
+        """
+        Yields the blocks from height `start` up to, but not including,
+        height `stop` as they are stored in the blockchain file, without
+        line breaks. The blocks are read `batch_size` at a time, so the
+        whole range is never held in memory.
+
+        Blocks added after the generator has been created are not yielded.
+        """
+        stop = min(stop, self.get_tip().chain_length)
+        for batch_start in range(max(start, 0), stop, batch_size):
+            batch_stop: int = min(batch_start + batch_size, stop)
+            yield from self.block_index.read_lines(batch_start, batch_stop)
+
+    def iter_blocks(
+            self,
+            start: int = 0,
+            stop: int | None = None,
+            fields: Collection[str] | None = None,
+            parse_data: bool = True,
+            batch_size: int = 1000) -> Generator[StoredBlock, None, None]:
+        """
+        Yields the blocks from height `start` up to, but not including,
+        height `stop`, reading `batch_size` lines of the blockchain file at
+        a time. Only the header fields in `fields` are decoded, and the data
+        of a block is only decoded if it is accessed, so passes that only
+        need the headers never decode or validate transactions.
+
+        Blocks added after the generator has been created are not yielded.
+
+        Args:
+            start (int, optional): The height of the first block. Default
+                is 0.
+            stop (int | None, optional): The height to stop at. Default is
+                None, which is the end of the chain.
+            fields (Collection[str] | None, optional): The header fields to
+                decode, see StoredBlock. Default is None, which decodes all
+                of them.
+            parse_data (bool, optional): Whether transactions are validated
+                into Transaction models when the data is accessed. Default
+                is True.
+            batch_size (int, optional): The number of lines read at a time.
+                Default is 1000.
+
+        Raises:
+            ValueError: If a line is not a block. The blocks before it have
+                been yielded.
+        """
+        for line in self.iter_block_lines(
+                start,
+                self.get_tip().chain_length if stop is None else stop,
+                batch_size):
+            yield StoredBlock(line, fields, parse_data)
+
+    def find_block_height(self,
+                          block_hash: str,
+                          batch_size: int = 1000) -> int | None:
+        """
+        Finds the height of the block with the given hash. The chain is
+        searched backwards from the last block, since the blocks asked for
+        are usually recent ones.
+
+        Returns:
+            int | None: The height of the block, or None if no block on the
+                chain has the given hash.
+        """
+        block_hash_bytes: bytes = block_hash.encode()
+        stop: int = self.get_tip().chain_length
+        while stop > 0:
+            start: int = max(stop - batch_size, 0)
+            lines: List[bytes] = self.block_index.read_lines(start, stop)
+            for offset in range(len(lines) - 1, -1, -1):
+                line: bytes = lines[offset]
+                # Only decode the lines that can contain the hash, and only
+                # their headers
+                if block_hash_bytes not in line:
+                    continue
+                try:
+                    stored_block_hash: str | None = StoredBlock(
+                        line, fields=("block_hash",)).block_hash
+                except ValueError:
+                    continue
+                if stored_block_hash == block_hash:
+                    return start + offset
+            stop = start
+        return None
+
     # endregion
 
     # region Chain utils
     def get_chain_length(self) -> int:
-        # Open the blockchain file in read binary mode
-        # (faster than normal read)
-        with open(self.blockchain_path, "rb") as file:
-            # Count the number of lines and return the count
-            return sum(1 for _ in file)
+        return self.get_tip().chain_length
 
     def get_last_block(self) -> None | Block:
-        if not os.path.exists(self.blockchain_path):
-            return None
+        """
+        Gets the last block. It is kept in memory, so the blockchain file is
+        only read if it has been changed by someone else.
+        """
+        return self.get_tip().block
+
+    def get_last_block_json(self) -> None | str:
+        """
+        Gets the last block serialized as it is stored in the blockchain
+        file.
+        """
+        return self.get_tip().block_json
+
+    def get_tip(self) -> ChainTip:
+        """
+        Gets the current chain tip without taking the append lock, unless
+        the blockchain file has changed since the tip was published. That
+        happens while a block is being appended (the tip is then returned
+        once the append has finished), or if someone else changed the file.
+        """
+        tip: ChainTip = self.tip
+        if (tip.file_state is not None and
+                tip.file_state == self.get_blockchain_file_state()):
+            return tip
+        with self.append_lock:
+            self.refresh_tip()
+            return self.tip
+
+    def get_etag(self) -> str:
+        """
+        Gets a tag that changes whenever a block or a transaction is added:
+        the hash of the last block and the number of transactions.
+        """
+        tip: ChainTip = self.get_tip()
+        if not self.ledger.is_synced():
+            with self.append_lock:
+                self.ledger.sync()
+        last_block_hash: str = tip.block.block_hash if tip.block else "0"
+        return f"{last_block_hash}-{self.ledger.transaction_count}"
+
+    def get_blockchain_file_state(self) -> Tuple[int, int, int, int] | None:
+        return get_file_state(self.blockchain_path)
+
+    def refresh_tip(self) -> None:
+        """
+        Reloads the last block from the blockchain file if the file has
+        been changed, replaced or removed since the tip was last updated.
+        The append lock must be held.
+        """
+        file_state: Tuple[int, int, int, int] | None = (
+            self.get_blockchain_file_state())
+        if file_state is not None and file_state == self.tip.file_state:
+            return
         # Get the last line of the file
-        with open(self.blockchain_path, "rb") as file:
-            # Go to the second last byte
-            file.seek(-2, os.SEEK_END)
-            try:
-                # Seek backwards until a newline is found
-                # Move one byte at a time
-                while file.read(1) != b"\n":
-                    # Look two bytes back
-                    file.seek(-2, os.SEEK_CUR)
-            except OSError:
-                # Move to the start of the file
-                # if for example no newline is found
-                file.seek(0)
-            # Last non-empty line
-            last_line: str = file.readline().strip().decode()
-            try:
-                last_block_modelled: BlockModel = (
-                    BlockModel.model_validate_json(last_line))
-            except ValidationError as e:
-                print(f"Error loading block: {e}")
-                return None
-        # Convert to block
-        block_data: BlockData = last_block_modelled.data
-        block_data_parsed: BlockData = self.parse_block_data(block_data)
-        block = Block(
-            index=last_block_modelled.index,
-            timestamp=last_block_modelled.timestamp,
-            data=block_data_parsed,
-            previous_block_hash=last_block_modelled.previous_block_hash,
-            nonce=last_block_modelled.nonce,
-            block_hash=last_block_modelled.block_hash
-        )
-        return block
+        self.block_index.refresh()
+        chain_length: int = len(self.block_index)
+        if file_state is None or chain_length == 0:
+            self.tip = ChainTip(block=None,
+                                block_json=None,
+                                chain_length=chain_length,
+                                file_state=file_state)
+            return
+        last_line: str = self.block_index.read_lines(
+            chain_length - 1, chain_length)[0].decode()
+        block: Block | None = None
+        try:
+            last_block_modelled: BlockModel = (
+                BlockModel.model_validate_json(last_line))
+            # Convert to block
+            block_data: BlockData = last_block_modelled.data
+            block_data_parsed: BlockData = self.parse_block_data(block_data)
+            block = Block(
+                index=last_block_modelled.index,
+                timestamp=last_block_modelled.timestamp,
+                data=block_data_parsed,
+                previous_block_hash=last_block_modelled.previous_block_hash,
+                nonce=last_block_modelled.nonce,
+                block_hash=last_block_modelled.block_hash,
+                version=last_block_modelled.version,
+                merkle_root=last_block_modelled.merkle_root
+            )
+        except ValidationError as e:
+            print(f"Error loading block: {e}")
+        self.tip = ChainTip(block=block,
+                            block_json=last_line if block else None,
+                            chain_length=chain_length,
+                            file_state=file_state)
 
     def parse_block_data(self, block_data: Any) -> BlockData:
         """
@@ -240,6 +880,18 @@ class Blockchain:
             ValueError: If no valid transactions or strings are found in the
                 input data.
         """
+        if isinstance(block_data, list) and block_data and all(
+                (type(item) is str and item != "") or
+                (type(item) is dict and len(item) == 1 and
+                 not isinstance(item.get("transaction", ""), str))
+                for item in cast(List[Any], block_data)):
+            # Strings and transactions that are not serialized, which is
+            # what requests send, are validated in one pass
+            try:
+                return BlockDataAdapter.validate_python(block_data)
+            except ValidationError:
+                # Parsed item by item below, to say what is wrong
+                pass
         data_parsed: BlockData = []
         if not isinstance(block_data, list) and (
                 all(isinstance(item, (str, dict)) for item in block_data)):
@@ -318,69 +970,208 @@ class Blockchain:
     # endregion
 
     # region Chain valid
-    def is_chain_valid(self) -> bool:
+    def is_chain_valid(self,
+                       full: bool = False,
+                       parallel: bool = False,
+                       processes: int | None = None) -> bool:
+        """
+        Validates the hashes and the linkage of the blocks in the blockchain
+        file.
+
+        Blocks that were validated by an earlier call are not validated
+        again, as long as the part of the file they are in has not changed.
+
+        Args:
+            full (bool, optional): If True, the whole chain is validated,
+                starting from the genesis block. Default is False.
+            parallel (bool, optional): If True, the whole chain is validated
+                by a pool of worker processes, each taking a part of the
+                blockchain file. Default is False.
+            processes (int | None, optional): The number of worker
+                processes to use when `parallel` is True. Defaults to the
+                number of CPUs.
+        """
         # TODO Make force and repair parameters
         chain_validity = True
         if not os.path.exists(self.blockchain_path):
             chain_validity = False
+        elif parallel:
+            chain_validity = self.is_chain_valid_in_parallel(processes)
         else:
-            current_block: None | Block = None
-            previous_block: None | Block = None
+            checkpoint: ValidationCheckpoint | None = None
+            if not full:
+                checkpoint = self.load_validation_checkpoint()
+            current_block: None | Block | BlockRecord = None
+            previous_block_hash: str | None = None
             # Open the blockchain file
-            with open(self.blockchain_path, "r") as file:
+            with open(self.blockchain_path, "rb") as file:
+                # Size of the part of the file that has been validated
+                offset: int = 0
+                hasher = hashlib.sha256()
+                if checkpoint:
+                    if self.is_validation_checkpoint_intact(
+                            file, checkpoint, hasher):
+                        print(f"Blocks up to {checkpoint.index} have "
+                              "already been validated.")
+                        offset = checkpoint.offset
+                        previous_block_hash = checkpoint.block_hash
+                    else:
+                        print("The blockchain file has changed since it was "
+                              "last validated. The whole chain will be "
+                              "validated.")
+                        # Another validation may have removed it already
+                        with contextlib.suppress(FileNotFoundError):
+                            os.remove(self.validation_checkpoint_path)
+                        hasher = hashlib.sha256()
+                    file.seek(offset)
                 for line in file:
-                    if current_block:
-                        previous_block = current_block
-                    # Load the line as a block
-                    try:
-                        current_block = self.load_block(line)
-                    except json.JSONDecodeError:
-                        print("Invalid JSON in the blockchain file.")
-                        chain_validity = False
-                        break
-                    # Calculate the block_hash of the current block
-                    calculated_hash: str = current_block.calculate_hash()
-                    if current_block.block_hash != calculated_hash:
-                        print("\nCurrent block's \"block hash\": "
-                              f"{current_block.block_hash}")
-                        current_block_data: BlockData = (
-                            current_block.data)
-                        print(
-                            f"Current block's \"data\": {current_block_data}")
-                        print(f"Calculated hash:\t{calculated_hash}")
-                        print(f"Block {current_block.index}'s hash does "
-                              "not match the calculated hash. This could mean "
-                              "that a block has been tampered with.")
+                    error_message: str | None
+                    current_block, error_message = validate_block_line(
+                        line, previous_block_hash)
+                    if error_message or current_block is None:
+                        print(error_message)
                         chain_validity = False
                         break
-                    # else:
-                    #     print(f"Block {current_block.index}'s hash matches "
-                    #           "the calculated hash.")
-                    if previous_block:
-                        if (current_block.previous_block_hash
-                                != previous_block.block_hash):
-                            print("\n"
-                                  "Previous block's block "
-                                  f"hash:\t\t\t{previous_block.block_hash}")
-                            print("Current block's \"Previous hash\":\t"
-                                  f"{current_block.previous_block_hash}")
-                            print(f"Block {current_block.index} "
-                                  "\"Previous hash\" value does not "
-                                  "match the previous block's hash. This "
-                                  "could mean that a block is missing or "
-                                  "that one has been incorrectly inserted.")
-                            chain_validity = False
-                            break
-                        # else:
-                        #     print(f"Block {current_block.index} "
-                        #           "\"Previous hash\" value matches the "
-                        #           "previous block's hash.")
+                    previous_block_hash = current_block.block_hash
+                    offset += len(line)
+                    hasher.update(line)
+            if chain_validity and current_block:
+                self.save_validation_checkpoint(ValidationCheckpoint(
+                    index=current_block.index,
+                    block_hash=current_block.block_hash,
+                    offset=offset,
+                    digest=hasher.hexdigest()))
         if chain_validity:
             print("The blockchain is valid.")
             return True
         else:
             print("The blockchain is invalid.")
             return False
+
+    def is_chain_valid_in_parallel(self,
+                                   processes: int | None = None) -> bool:
+        """
+        Validates the whole chain by splitting the blockchain file into
+        ranges of lines and validating the ranges in worker processes. The
+        linkage between the last block of a range and the first block of the
+        next range is validated here. The first invalid block is reported
+        the same way as by a serial validation.
+        """
+        processes = processes or os.cpu_count() or 1
+        # More ranges than processes, so that a slow range does not hold up
+        # the others
+        chunks: List[Tuple[int, int]] = split_file_into_line_ranges(
+            self.blockchain_path, processes * 4)
+        print(f"Validating the blockchain in {len(chunks)} parts with "
+              f"{processes} processes...")
+        chain_validity: bool = True
+        previous_block_hash: str | None = None
+        last_block_index: int | None = None
+        offset: int = 0
+        hasher = hashlib.sha256()
+        # Forking the multi-threaded server could copy a lock that another
+        # thread holds into the workers, so they are spawned instead
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures: List[
+                concurrent.futures.Future[ChunkValidationResult]] = [
+                executor.submit(validate_line_range,
+                                str(self.blockchain_path), start, end)
+                for start, end in chunks]
+            # Hash the file for the checkpoint while the workers are busy
+            with open(self.blockchain_path, "rb") as file:
+                for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                    hasher.update(chunk)
+            for future in futures:
+                result: ChunkValidationResult = future.result()
+                first_block_index: int | None = result["first_block_index"]
+                error_message: str | None = result["error_message"]
+                # The first line of a range is checked for a hash mismatch
+                # before its linkage, like in a serial validation
+                if error_message and result["valid_line_count"] == 0:
+                    print(error_message)
+                    chain_validity = False
+                    break
+                if (first_block_index is not None and
+                        previous_block_hash is not None and
+                        result["first_previous_block_hash"]
+                        != previous_block_hash):
+                    print(previous_block_hash_error_message(
+                        block_index=first_block_index,
+                        block_previous_block_hash=str(
+                            result["first_previous_block_hash"]),
+                        previous_block_hash=previous_block_hash))
+                    chain_validity = False
+                    break
+                if error_message:
+                    print(error_message)
+                    chain_validity = False
+                    break
+                if result["last_block_hash"] is not None:
+                    previous_block_hash = result["last_block_hash"]
+                    last_block_index = result["last_block_index"]
+                offset += result["valid_size"]
+            if not chain_validity:
+                # Stop the ranges that have not been started yet
+                executor.shutdown(cancel_futures=True)
+        if (chain_validity and previous_block_hash is not None and
+                last_block_index is not None):
+            # The file may have grown while it was being validated
+            if offset == os.stat(self.blockchain_path).st_size:
+                self.save_validation_checkpoint(ValidationCheckpoint(
+                    index=last_block_index,
+                    block_hash=previous_block_hash,
+                    offset=offset,
+                    digest=hasher.hexdigest()))
+        return chain_validity
+
+    def load_validation_checkpoint(self) -> ValidationCheckpoint | None:
+        if not os.path.exists(self.validation_checkpoint_path):
+            return None
+        try:
+            with open(self.validation_checkpoint_path, "r") as file:
+                return ValidationCheckpoint.model_validate_json(file.read())
+        except FileNotFoundError:
+            # Removed by another validation since
+            return None
+        except ValidationError as e:
+            print(f"Error loading validation checkpoint: {e}")
+            return None
+
+    def save_validation_checkpoint(
+            self, checkpoint: ValidationCheckpoint) -> None:
+        temporary_path: Path = self.validation_checkpoint_path.with_suffix(
+            ".tmp")
+        # Validations running at the same time share the temporary file
+        with self.append_lock:
+            with open(temporary_path, "w") as file:
+                file.write(checkpoint.model_dump_json())
+            # Replace the old checkpoint in one step
+            os.replace(temporary_path, self.validation_checkpoint_path)
+
+    def is_validation_checkpoint_intact(
+            self,
+            file: BinaryIO,
+            checkpoint: ValidationCheckpoint,
+            hasher: "hashlib._Hash") -> bool:
+        """
+        Checks that the part of the blockchain file covered by the
+        checkpoint has not changed since it was validated, by comparing its
+        size and its digest. The bytes that are read are fed to `hasher`.
+        """
+        file_size: int = os.fstat(file.fileno()).st_size
+        if file_size < checkpoint.offset:
+            return False
+        file.seek(0)
+        remaining: int = checkpoint.offset
+        while remaining > 0:
+            chunk: bytes = file.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                return False
+            hasher.update(chunk)
+            remaining -= len(chunk)
+        return hasher.hexdigest() == checkpoint.digest
     # endregion
 
     # region Tx ops
@@ -391,12 +1182,21 @@ class Blockchain:
             receiver: str,
             amount: int,
             method: str) -> None:
-        file_existed: bool = os.path.exists(self.transactions_path)
-        if not file_existed:
-            self.create_transactions_file()
-        with open(self.transactions_path, "a") as file:
-            file.write(
-                f"{timestamp}\t{sender}\t{receiver}\t{amount}\t{method}\n")
+        self.store_transactions(
+            [(timestamp, sender, receiver, amount, method)])
+
+    def store_transactions(
+            self,
+            transactions: List[Tuple[float, str, str, int, str]]) -> None:
+        """
+        Appends transactions to the transactions file with a single write.
+
+        Args:
+            transactions (List[Tuple[float, str, str, int, str]]): The
+                timestamp, sender, receiver, amount and method of each
+                transaction.
+        """
+        self.append_to_files(blocks=[], transactions=transactions).result()
 
     def create_transactions_file(self) -> None:
         file_exists: bool = os.path.exists(self.transactions_path)
@@ -416,37 +1216,222 @@ class Blockchain:
         elif user_unhashed:
             user = hashlib.sha256(user_unhashed.encode()).hexdigest()
         # print(f"Getting balance for {user}...")
-        file_exists: bool = os.path.exists(self.transactions_path)
-        if not file_exists:
-            self.create_transactions_file()
-        balance = 0
-        transactions: pd.DataFrame = (
-            pd.read_csv(  # pyright: ignore[reportUnknownMemberType]
-                self.transactions_path,
-                sep="\t", dtype={"Amount": str}))
-        if not ((user in transactions["Sender"].values) or
-                (user in transactions["Receiver"].values)):
+        if not self.ledger.is_synced():
+            with self.append_lock:
+                file_exists: bool = os.path.exists(self.transactions_path)
+                if not file_exists:
+                    self.create_transactions_file()
+                # Apply transactions written to the file by someone else
+                self.ledger.sync()
+        balance: int | None = self.ledger.get_balance(str(user))
+        if balance is None:
             print(f"No transactions found for {user}.")
             return None
-        sent: int = 0
-        sent_transactions: pd.Series[str] = (transactions[
-            (transactions["Sender"] == user) &
-            (transactions["Method"] != "reaction") &
-            (transactions["Method"] != "reaction_network")
-        ]["Amount"])
-        for amount in sent_transactions:
-            sent += int(amount)
-        # print(f"Total amount sent by {user}: {sent}")
-        received: int = 0
-        received_transactions: pd.Series[str] = (transactions[
-            (transactions["Receiver"] == user)
-        ]["Amount"])
-        for amount in received_transactions:
-            received += int(amount)
-        # print(f"Total amount received by {user}: {received}")
-        balance: int = received - sent
         # print(f"Balance for {user}: {balance}")
         return balance
+
+    def get_balances(
+            self,
+            users: List[str] | None = None,
+            users_unhashed: List[str | int] | None = None
+    ) -> Dict[str, int | None]:
+        """
+        Gets the balances of many users at once from the transaction store.
+        Like get_balance, sends with the methods in
+        Ledger.UNDEDUCTED_METHODS are not deducted.
+
+        Args:
+            users (List[str] | None, optional): Hashed user IDs.
+            users_unhashed (List[str | int] | None, optional): Unhashed user
+                IDs, used instead of `users`.
+
+        Returns:
+            Dict[str, int | None]: The balance of each user, keyed by the ID
+                as given, or None for users without transactions.
+        """
+        keys: List[str]
+        hashed_users: List[str]
+        if users_unhashed is not None:
+            keys = [str(user) for user in users_unhashed]
+            hashed_users = [hashlib.sha256(key.encode()).hexdigest()
+                            for key in keys]
+        else:
+            keys = [str(user) for user in users or []]
+            hashed_users = keys
+        store: TransactionStore = self.get_transaction_store()
+        balances: npt.NDArray[Any] = store.get_balances(
+            Ledger.UNDEDUCTED_METHODS)
+        result: Dict[str, int | None] = {}
+        for key, user in zip(keys, hashed_users):
+            user_id: int | None = store.get_user_id(user)
+            result[key] = (
+                int(balances[user_id])
+                if user_id is not None and user_id < len(balances) else None)
+        return result
+
+    def iter_all_balances(
+            self,
+            batch_size: int = 1000
+    ) -> Generator[List[Tuple[str, int]], None, None]:
+        """
+        Yields the balance of every user with transactions, `batch_size`
+        users at a time. The balances are computed before the first batch
+        is yielded.
+        """
+        store: TransactionStore = self.get_transaction_store()
+        balances: npt.NDArray[Any] = store.get_balances(
+            Ledger.UNDEDUCTED_METHODS)
+        users: List[str] = store.users
+        for batch_start in range(0, len(balances), batch_size):
+            batch_stop: int = min(batch_start + batch_size, len(balances))
+            yield list(zip(users[batch_start:batch_stop],
+                           balances[batch_start:batch_stop].tolist()))
+
+    def get_top_balances(self, n: int) -> List[Tuple[str, int]]:
+        """
+        Gets the `n` users with the highest balances and their balances,
+        highest first.
+        """
+        self.balance_ranking.update(self.get_transaction_store(),
+                                    Ledger.UNDEDUCTED_METHODS)
+        return self.balance_ranking.get_top(n)
+
+    def get_rank(self,
+                 user: str | int | None = None,
+                 user_unhashed: str | int | None = None
+                 ) -> Tuple[int, int, int] | None:
+        """
+        Gets where a user is on the balance leaderboard.
+
+        Returns:
+            Tuple[int, int, int] | None: The user's rank, starting from 1,
+                their balance and the number of ranked users, or None if the
+                user has no transactions.
+        """
+        if user_unhashed is not None:
+            user = hashlib.sha256(str(user_unhashed).encode()).hexdigest()
+        elif isinstance(user, int):
+            user = hashlib.sha256(str(user).encode()).hexdigest()
+        store: TransactionStore = self.get_transaction_store()
+        self.balance_ranking.update(store, Ledger.UNDEDUCTED_METHODS)
+        user_id: int | None = store.get_user_id(str(user))
+        if user_id is None:
+            return None
+        rank: Tuple[int, int] | None = self.balance_ranking.get_rank(user_id)
+        if rank is None:
+            return None
+        return rank[0], rank[1], len(self.balance_ranking)
+
+    def get_user_transactions(
+            self,
+            user: str | int | None = None,
+            user_unhashed: str | int | None = None,
+            before: int | None = None,
+            limit: int = 50
+    ) -> List[Tuple[int, float, str, str, int, str]] | None:
+        """
+        Gets the transactions a user has sent or received, newest first.
+        Only the user's rows are read from the transaction store.
+
+        Args:
+            user (str | int | None, optional): Hashed user ID.
+            user_unhashed (str | int | None, optional): Unhashed user ID,
+                used instead of `user`.
+            before (int | None, optional): Only get transactions with a
+                lower position than this. Default is None, which starts from
+                the newest transaction.
+            limit (int, optional): The most transactions to get. Default is
+                50.
+
+        Returns:
+            List[Tuple[int, float, str, str, int, str]] | None: The
+                position on the chain, timestamp, sender, receiver, amount
+                and method of each transaction, or None if the user has no
+                transactions.
+        """
+        if user_unhashed is not None:
+            user = hashlib.sha256(str(user_unhashed).encode()).hexdigest()
+        elif isinstance(user, int):
+            user = hashlib.sha256(str(user).encode()).hexdigest()
+        store: TransactionStore = self.get_transaction_store()
+        self.transaction_history_index.update(store)
+        user_id: int | None = store.get_user_id(str(user))
+        if user_id is None:
+            return None
+        rows: npt.NDArray[np.int64] = (
+            self.transaction_history_index.get_user_rows(
+                user_id, before=before, limit=limit))
+        users: List[str] = store.users
+        methods: List[str] = store.methods
+        return list(zip(
+            rows.tolist(),
+            store.get_column("timestamps")[rows].tolist(),
+            [users[sender]
+             for sender in store.get_column("senders")[rows].tolist()],
+            [users[receiver]
+             for receiver in store.get_column("receivers")[rows].tolist()],
+            store.get_amounts(rows),
+            [methods[method]
+             for method in store.get_column("methods")[rows].tolist()]))
+
+    def get_transaction_store(self) -> TransactionStore:
+        """
+        Gets the columnar transaction store, brought up to date with the
+        blockchain file first if needed.
+        """
+        if (self.transaction_store.chain_length !=
+                self.get_tip().chain_length):
+            self.sync_transaction_store()
+        return self.transaction_store
+
+    def sync_transaction_store(self, batch_size: int = 1000) -> None:
+        """
+        Adds the transactions of blocks that are not in the transaction
+        store yet. The store is rebuilt if the blocks it covers are no longer
+        the start of the chain.
+        """
+        with self.append_lock:
+            store: TransactionStore = self.transaction_store
+            chain_length: int = self.get_tip().chain_length
+            if store.chain_length > chain_length:
+                print("The transaction store is ahead of the blockchain. "
+                      "It will be rebuilt.")
+                store.clear()
+            elif store.chain_length > 0:
+                last_block: None | StoredBlock = next(self.iter_blocks(
+                    store.chain_length - 1, store.chain_length,
+                    fields=("block_hash",)), None)
+                if (last_block is None or
+                        last_block.block_hash != store.last_block_hash):
+                    print("The transaction store does not match the "
+                          "blockchain. It will be rebuilt.")
+                    store.clear()
+            if store.chain_length == chain_length:
+                return
+            print(f"Adding blocks {store.chain_length} to {chain_length - 1} "
+                  "to the transaction store...")
+            for batch_start in range(store.chain_length, chain_length,
+                                     batch_size):
+                batch_stop: int = min(batch_start + batch_size, chain_length)
+                blocks: List[StoredBlock] = list(self.iter_blocks(
+                    batch_start, batch_stop,
+                    fields=("timestamp", "block_hash"),
+                    batch_size=batch_size))
+                store.append(
+                    transactions=[
+                        transaction for block in blocks
+                        for transaction in self.get_block_transactions(block)],
+                    chain_length=batch_stop,
+                    last_block_hash=cast(str, blocks[-1].block_hash))
+            print("The transaction store is up to date.")
+
+    def rebuild_transaction_store(self) -> None:
+        """
+        Rebuilds the transaction store from the blockchain file.
+        """
+        with self.append_lock:
+            self.transaction_store.clear()
+            self.sync_transaction_store()
     # endregion
 
     # region Tx file valid
@@ -456,11 +1441,123 @@ class Blockchain:
             repair: bool = False,
             force: bool = False) -> Tuple[str, bool]:
         """
+        Validates the transactions file against the blockchain file, see
+        `validate_transactions_file`. Nothing is appended to either file
+        until the validation has finished.
+
+        Without `repair` and `force`, the result is reused until either file
+        changes, and blocks appended since are validated incrementally.
+        """
+        with self.append_lock:
+            if not (repair or force):
+                return self.validate_transactions_file_incrementally()
+            message, is_valid = self.validate_transactions_file(
+                repair, force)
+            self.record_transactions_validation(message, is_valid)
+            return (message, is_valid)
+
+    def validate_transactions_file_incrementally(self) -> Tuple[str, bool]:
+        """
+        Validates the transactions file against the blockchain file. If
+        neither file has changed since the last validation, its result is
+        returned. If the last validation succeeded and nothing but
+        append_to_files has changed the files since, only the appended
+        blocks and transactions are compared. Otherwise both files are
+        validated in full. The append lock must be held.
+        """
+        tip: ChainTip = self.get_tip()
+        transactions_file_state: Tuple[int, int, int, int] | None = (
+            get_file_state(self.transactions_path))
+        validation: TransactionsValidation | None = (
+            self.transactions_validation)
+        if (validation is not None and
+                tip.file_state is not None and
+                validation.blockchain_file_state == tip.file_state and
+                validation.transactions_file_state ==
+                transactions_file_state):
+            return (validation.message, validation.is_valid)
+        message: str
+        is_valid: bool
+        if (validation is not None and validation.is_valid and
+                validation.expected_blockchain_file_state ==
+                tip.file_state and
+                validation.expected_transactions_file_state ==
+                transactions_file_state and
+                self.are_appended_transactions_valid(validation, tip)):
+            message = "The transactions file is valid."
+            is_valid = True
+        else:
+            message, is_valid = self.validate_transactions_file()
+        self.record_transactions_validation(message, is_valid)
+        return (message, is_valid)
+
+    def are_appended_transactions_valid(
+            self,
+            validation: TransactionsValidation,
+            tip: ChainTip) -> bool:
+        """
+        Checks that the transactions appended to the transactions file
+        since `validation` match the blocks appended to the blockchain file
+        since.
+        """
+        if tip.chain_length < validation.chain_length:
+            return False
+        with open(self.transactions_path, "rb") as file:
+            file.seek(validation.transactions_size)
+            appended_lines: List[bytes] = file.read().splitlines()
+        if not all(appended_lines):
+            # Empty lines end the transactions file for the full validation
+            return False
+        remaining_lines: Generator[bytes, None, None] = (
+            line for line in appended_lines)
+        for block in self.iter_blocks(validation.chain_length,
+                                      tip.chain_length,
+                                      fields=("timestamp",)):
+            for item in block.data:
+                if isinstance(item, TransactionRecord):
+                    line: bytes | None = next(remaining_lines, None)
+                    if line is None or not transaction_line_matches(
+                            cast(float, block.timestamp), item, line):
+                        return False
+        # Anything left over is extra data
+        return next(remaining_lines, None) is None
+
+    def record_transactions_validation(self,
+                                       message: str,
+                                       is_valid: bool) -> None:
+        """
+        Remembers the result of a validation of the transactions file along
+        with the current state of both files. The append lock must be held.
+        """
+        tip: ChainTip = self.get_tip()
+        transactions_file_state: Tuple[int, int, int, int] | None = (
+            get_file_state(self.transactions_path))
+        self.transactions_validation = TransactionsValidation(
+            message=message,
+            is_valid=is_valid,
+            blockchain_file_state=tip.file_state,
+            transactions_file_state=transactions_file_state,
+            expected_blockchain_file_state=tip.file_state,
+            expected_transactions_file_state=transactions_file_state,
+            chain_length=tip.chain_length,
+            transactions_size=(transactions_file_state[0]
+                               if transactions_file_state else 0))
+
+    def validate_transactions_file(
+            self,
+            repair: bool = False,
+            force: bool = False) -> Tuple[str, bool]:
+        """
         Validates the transactions file against the blockchain file.
 
         By default, the function will only validate the files and print
         the results. No changes will be made.
 
+        The transactions of both files are read into columns and compared
+        all at once, and the first row that differs is reported. Repairs
+        truncate the transactions file at that row and append the rest of
+        the chain's transactions after it.
+
         Returns:
             Tuple[str, bool]: A message indicating the result of the
             validation and a boolean indicating whether the file is
@@ -493,15 +1590,6 @@ class Blockchain:
             Default is False.
         """
 
-        def line_generator(
-                file: TextIOWrapper) -> Generator[Tuple[int, str], None, None]:
-            while True:
-                position: int = file.tell()
-                line: str = file.readline().strip()  # Read one line at a time
-                if not line:  # Break when EOF is reached
-                    break
-                yield position, line
-
         class Mode(enum.Enum):
             # See if the transactions file matches the blockchain
             VALIDATE = "validate"
@@ -516,19 +1604,18 @@ class Blockchain:
         mode: Mode = Mode.VALIDATE
         file_existed: bool = os.path.exists(self.transactions_path)
         file_empty: bool = False
-        tf_open_text_mode = "r"  # Allow reading only
         if file_existed:
             print("Transactions file found.")
             file_empty: bool = os.stat(
                 self.transactions_path).st_size == 0
             print(f"repair: {repair}")
             print(f"force: {force}")
-            if (repair or force):
-                tf_open_text_mode = "r+"  # Allow reading and writing
             if (file_empty) and (repair or force):
                 print("Transactions file is empty. It will be replaced.")
                 repair_messages.append("The transactions file was empty and "
                                        "has been replaced.")
+                # The file cannot be removed while it is open on Windows
+                self.chain_writer.release_files()
                 os.remove(self.transactions_path)
                 self.create_transactions_file()
                 mode = Mode.APPEND
@@ -546,239 +1633,534 @@ class Blockchain:
 
                 self.create_transactions_file()
                 mode = Mode.APPEND
-                tf_open_text_mode = "a+"  # Allow appending and reading
             else:
                 return_message = "Transaction file not found."
                 print(return_message)
                 print(finished_early_message)
                 return (return_message, False)
 
-        with open(self.blockchain_path, "r") as bcf, open(
-                self.transactions_path, tf_open_text_mode) as tf:
-            tf_lines: (
-                Generator[Tuple[int, str], None, None]) = (
-                    line_generator(tf))
-
-            # Read the first line (column headers)
-            tf_position: int | None = None
-            tf_line: str | None = None
-            tf_position, tf_line = next(tf_lines, (None, None))
-
-            # Read the second line
-            tf_position, tf_line = next(tf_lines, (None, None))
-            for line in bcf:
-                try:
-                    block: Block = self.load_block(line)
-                except json.JSONDecodeError:
-                    return_message = "Invalid JSON in the blockchain file."
+        # The transactions of the chain, in one pass over its blocks
+        try:
+            chain_columns: TransactionColumns = (
+                self.get_chain_transaction_columns())
+        except ValueError:
+            return_message = "Invalid JSON in the blockchain file."
+            print(return_message)
+            print(finished_early_message)
+            return (return_message, False)
+        chain_count: int = len(chain_columns.timestamps)
+        # Where to start appending the chain's transactions to the file
+        append_from: int = 0
+        if mode == Mode.VALIDATE:
+            file_columns: TransactionColumns
+            row_offsets: npt.NDArray[np.int64]
+            row_count: int
+            file_columns, row_offsets, row_count = (
+                read_transactions_file_columns(self.transactions_path))
+            # Rows before the first one that is not a transaction
+            read_count: int = len(file_columns.timestamps)
+            divergent_row: int | None = find_first_divergent_row(
+                chain_columns, file_columns,
+                min(chain_count, read_count))
+            if (divergent_row is None and
+                    read_count < min(chain_count, row_count)):
+                divergent_row = read_count
+            if divergent_row is not None:
+                replaced_message: str
+                if divergent_row >= read_count:
+                    return_message = "Invalid transaction format."
+                    replaced_message = ("The transactions file was invalid "
+                                        "and has been replaced.")
+                else:
+                    return_message = get_divergent_row_message(
+                        chain_columns, file_columns, divergent_row)
+                    replaced_message = ("Transaction data in the "
+                                        "transactions file did not match "
+                                        "the blockchain and has been "
+                                        "replaced.")
+                print(return_message)
+                if not (repair and force):
+                    print(finished_early_message)
+                    return (return_message, False)
+                print("Contents of the transactions file will be "
+                      "replaced.")
+                repair_messages.append(replaced_message)
+                self.chain_writer.release_files()
+                truncate_file(self.transactions_path,
+                              int(row_offsets[divergent_row]))
+                append_from = divergent_row
+            elif row_count < chain_count:
+                missing_transaction: str = str(TransactionRecord(
+                    *get_row(chain_columns, row_count)[1:]))
+                print("Expected data in the transactions file was not "
+                      "found.\n"
+                      "The following transaction was not found: "
+                      f"{missing_transaction}")
+                if not repair:
+                    return_message = "The transactions file is missing data."
+                    print(return_message)
+                    print(finished_early_message)
+                    return (return_message, False)
+                print("Data will be appended to the transactions file.")
+                repair_messages.append(
+                    "Data missing from the transactions file and has been "
+                    "added.The following transaction was not found: "
+                    f"{missing_transaction}")
+                append_from = row_count
+            elif row_count > chain_count:
+                if not (repair and force):
+                    return_message = (
+                        "Extra data found in the transactions file.")
                     print(return_message)
                     print(finished_early_message)
                     return (return_message, False)
-                data_list: BlockData = block.data
-                for item in data_list:
-                    if isinstance(item, dict) and "transaction" in item:
-                        bcf_transaction: Transaction = (
-                            item["transaction"])
-                        bcf_timestamp: float = block.timestamp
-                        bcf_transaction_sender: str
-                        bcf_transaction_receiver: str
-                        bcf_transaction_amount: int
-                        bcf_transaction_method: str
-                        bcf_transaction_sender = (
-                            bcf_transaction.sender)
-                        bcf_transaction_receiver = (
-                            bcf_transaction.receiver)
-                        bcf_transaction_amount = (
-                            bcf_transaction.amount)
-                        bcf_transaction_method = (
-                            bcf_transaction.method)
-                        if mode == Mode.VALIDATE:
-                            if tf_line is None:
-                                print("Expected data in the transactions file "
-                                      "was not found.\n"
-                                      "The following transaction "
-                                      f"was not found: {bcf_transaction}")
-                                if repair:
-                                    print("Data will be appended to the "
-                                          "transactions file.")
-                                    repair_messages.append(
-                                        "Data missing from the transactions "
-                                        "file and has been added."
-                                        "The following transaction "
-                                        f"was not found: {bcf_transaction}")
-                                    mode = Mode.APPEND
-                                else:
-                                    return_message = (
-                                        "The transactions file is missing "
-                                        "data.")
-                                    print(return_message)
-                                    print(finished_early_message)
-                                    return (return_message, False)
-                            else:
-                                tf_line_columns_list: (
-                                    List[str]) = tf_line.split("\t")
-                                column_count: int = len(tf_line_columns_list)
-                                if column_count != 5:
-                                    return_message = ("Invalid transaction "
-                                                      "format.")
-                                    print(return_message)
-                                    if repair and force:
-                                        print("Contents of the transactions "
-                                              "file will be replaced.")
-                                        repair_messages.append(
-                                            "The transactions file was "
-                                            "invalid and has been replaced.")
-                                        tf.truncate(tf_position)
-                                        mode = Mode.APPEND
-                                    else:
-                                        print(finished_early_message)
-                                        return (return_message, False)
-                                else:
-                                    tf_line_transaction_time = float(
-                                        tf_line_columns_list[0])
-
-                                    # I accidentally added None in some blocks,
-                                    # so I need to check for that
-                                    tf_line_transaction_sender: (
-                                        str | None) = (
-                                        None if tf_line_columns_list[1]
-                                        == "None"
-                                        else tf_line_columns_list[1])
-
-                                    tf_line_transaction_receiver: (
-                                        str | None) = (
-                                        None if tf_line_columns_list[2]
-                                        == "None"
-                                        else tf_line_columns_list[2])
-
-                                    tf_line_transaction_amount: int = int(
-                                        tf_line_columns_list[3])
-
-                                    tf_line_transaction_method: str = (
-                                        tf_line_columns_list[4])
-
-                                    # Check if the transaction in the
-                                    # blockchain matches the transaction in
-                                    # the file
-                                    if (
-                                        bcf_timestamp
-                                        == tf_line_transaction_time
-
-                                        and bcf_transaction_sender
-                                        == tf_line_transaction_sender
-
-                                        and bcf_transaction_receiver
-                                        == tf_line_transaction_receiver
-
-                                        and bcf_transaction_amount
-                                        == tf_line_transaction_amount
-
-                                        and bcf_transaction_method
-                                        == tf_line_transaction_method
-                                    ):
-                                        # print("Transaction found.")
-                                        pass
-                                    else:
-                                        return_message = (
-                                            "Transaction data in the "
-                                            "transactions file does not match "
-                                            "the blockchain.\n"
-                                            f"Timestamp: {bcf_timestamp} "
-                                            f"(blockchain, type: "
-                                            f"{type(bcf_timestamp)})\n"
-                                            "Timestamp: "
-                                            f"{tf_line_transaction_time} "
-                                            f"(transactions file, type: "
-                                            f"{type(
-                                                tf_line_transaction_time)})\n"
-                                            "Sender: "
-                                            f"{bcf_transaction_sender} "
-                                            f"(blockchain, type: "
-                                            f"{type(
-                                                bcf_transaction_sender)})\n"
-                                            "Sender: "
-                                            f"{tf_line_transaction_sender} "
-                                            f"(transactions file, type: "
-                                            f"{type(tf_line_transaction_sender
-                                                    )})\n"
-                                            "Receiver: "
-                                            f"{bcf_transaction_receiver} "
-                                            f"(blockchain, type: "
-                                            f"{type(
-                                                bcf_transaction_receiver)})\n"
-                                            "Receiver: "
-                                            f"{tf_line_transaction_receiver} "
-                                            f"(transactions file, type: "
-                                            f"{type(
-                                                tf_line_transaction_receiver
-                                            )})\n"
-                                            "Amount: "
-                                            f"{bcf_transaction_amount} "
-                                            f"(blockchain, type: "
-                                            f"{type(
-                                                bcf_transaction_amount)})\n"
-                                            "Amount: "
-                                            f"{tf_line_transaction_amount} "
-                                            f"(transactions file, type: "
-                                            f"{type(tf_line_transaction_amount
-                                                    )})\n"
-                                            "Method: "
-                                            f"{bcf_transaction_method} "
-                                            f"(blockchain, type: "
-                                            f"{type(
-                                                bcf_transaction_method)})\n"
-                                            "Method: "
-                                            f"{tf_line_transaction_method} "
-                                            f"(transactions file, type: "
-                                            f"{type(
-                                                tf_line_transaction_method)})")
-                                        print(return_message)
-                                        if repair and force:
-                                            print("Contents of the "
-                                                  "transactions file will be "
-                                                  "replaced.")
-                                            # print(f"position: {tf_position}")
-                                            repair_messages.append(
-                                                "Transaction data in the "
-                                                "transactions file did not "
-                                                "match the blockchain and has "
-                                                "been replaced.")
-                                            tf.truncate(tf_position)
-                                            mode = Mode.APPEND
-                                        else:
-                                            print(finished_early_message)
-                                            return (return_message, False)
-                        if mode == Mode.APPEND:
-                            self.store_transaction(
-                                block.timestamp,
-                                bcf_transaction_sender,
-                                bcf_transaction_receiver,
-                                bcf_transaction_amount,
-                                bcf_transaction_method
-                            )
-                        # Prepare the next line in the transactions file
-                        tf_position, tf_line = next(tf_lines, (None, None))
-            if (tf_line is not None) and (repair and force):
                 print("Extra data found in the transactions file. It will be "
                       "removed.")
-                print(f"A line containing extra data: {tf_line}")
                 repair_messages.append(
                     "Extra data was found in the transactions file and has "
                     "been removed.")
-
-                tf.truncate(tf_position)
-            elif tf_line is not None:
-                return_message = "Extra data found in the transactions file."
-                print(return_message)
-                print(finished_early_message)
-                return (return_message, False)
-            if repair_messages:
-                return_message = " ".join(repair_messages) + (
-                    " The transactions file is now valid.")
+                self.chain_writer.release_files()
+                truncate_file(self.transactions_path,
+                              int(row_offsets[chain_count]))
+                append_from = chain_count
             else:
-                return_message = "The transactions file is valid."
-            print(return_message)
-            return (return_message, True)
+                append_from = chain_count
+        if append_from < chain_count:
+            # One write for all of them
+            self.store_transactions(list(zip(
+                *(column[append_from:].tolist()
+                  for column in chain_columns))))
+        if repair_messages:
+            return_message = " ".join(repair_messages) + (
+                " The transactions file is now valid.")
+        else:
+            return_message = "The transactions file is valid."
+        print(return_message)
+        return (return_message, True)
+
+    def get_chain_transaction_columns(self) -> "TransactionColumns":
+        """
+        Gets the transactions of every block in the chain as columns, in one
+        pass over the blockchain file that only decodes the timestamp and
+        the data of each block.
+
+        Raises:
+            ValueError: If a block cannot be decoded.
+        """
+        timestamps: List[float] = []
+        records: List[TransactionRecord] = []
+        for block in self.iter_blocks(fields=("timestamp",)):
+            block_records: List[TransactionRecord] = [
+                item for item in block.data
+                if isinstance(item, TransactionRecord)]
+            timestamps.extend([cast(float, block.timestamp)] *
+                              len(block_records))
+            records.extend(block_records)
+        return make_transaction_columns(timestamps, records)
+
+
+# region File state
+
+
+def get_file_state(path: Path) -> Tuple[int, int, int, int] | None:
+    """
+    Gets the size, modification time, inode and device of a file, which
+    change when the file is changed or replaced.
+
+    Returns:
+        Tuple[int, int, int, int] | None: The state, or None if the file
+            does not exist.
+    """
+    try:
+        stat: os.stat_result = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino, stat.st_dev)
+# endregion
+
+# region Tx file valid helpers
+
+
+class TransactionColumns(NamedTuple):
+    """
+    Transactions with one array per field, in the order of the columns of
+    the transactions file.
+    """
+    timestamps: npt.NDArray[np.float64]
+    senders: npt.NDArray[np.object_]
+    receivers: npt.NDArray[np.object_]
+    amounts: npt.NDArray[Any]
+    methods: npt.NDArray[np.object_]
+
+
+def to_amount_array(amounts: Sequence[int]) -> npt.NDArray[Any]:
+    try:
+        return np.array(amounts, dtype=np.int64)
+    except OverflowError:
+        # Amounts that do not fit in 64 bits are kept as Python integers
+        return np.array(amounts, dtype=object)
+
+
+def make_transaction_columns(
+        timestamps: Sequence[float],
+        records: Sequence[TransactionRecord]) -> TransactionColumns:
+    senders: Sequence[str] = [record.sender for record in records]
+    receivers: Sequence[str] = [record.receiver for record in records]
+    amounts: Sequence[int] = [record.amount for record in records]
+    methods: Sequence[str] = [record.method for record in records]
+    return TransactionColumns(np.array(timestamps, dtype=np.float64),
+                              np.array(senders, dtype=object),
+                              np.array(receivers, dtype=object),
+                              to_amount_array(amounts),
+                              np.array(methods, dtype=object))
+
+
+def count_parsable_rows(time_column: Sequence[str],
+                        amount_column: Sequence[str]) -> int:
+    """
+    Counts the rows before the first one whose time or amount is not a
+    number.
+    """
+    for row, (time_value, amount_value) in enumerate(
+            zip(time_column, amount_column)):
+        try:
+            float(time_value)
+            int(amount_value)
+        except ValueError:
+            return row
+    return len(time_column)
+
+
+def read_transactions_file_columns(
+        path: Path
+) -> Tuple[TransactionColumns, npt.NDArray[np.int64], int]:
+    """
+    Reads the rows of the transactions file into columns in one go. Each
+    line is stripped, and the first empty line ends the rows like the end
+    of the file does.
+
+    Returns:
+        Tuple[TransactionColumns, npt.NDArray[np.int64], int]: The columns
+            of the rows before the first one that is not a transaction, the
+            byte offset in the file where each row starts, and the number of
+            rows.
+    """
+    with open(path, "rb") as file:
+        content: bytes = file.read()
+    # The column headers come first
+    header_size: int = content.find(b"\n") + 1 or len(content)
+    body: bytes = content[header_size:]
+    lines: List[str] = body.decode(errors="replace").split("\n")
+    stripped_lines: List[str] = list(map(str.strip, lines))
+    row_count: int
+    try:
+        row_count = stripped_lines.index("")
+    except ValueError:
+        row_count = len(stripped_lines)
+    del stripped_lines[row_count:]
+    # Characters are only bytes when they are all ASCII
+    line_sizes: npt.NDArray[np.int64] = np.fromiter(
+        map(len, lines if body.isascii() else body.split(b"\n")),
+        dtype=np.int64, count=row_count)
+    row_offsets: npt.NDArray[np.int64] = np.full(
+        row_count, header_size, dtype=np.int64)
+    row_offsets[1:] += np.cumsum(line_sizes[:-1] + 1)
+    # Only the rows before the first one without five fields are read
+    misshapen_rows: npt.NDArray[np.intp] = np.flatnonzero(np.fromiter(
+        map(str.count, stripped_lines, itertools.repeat("\t")),
+        dtype=np.int64, count=row_count) != 4)
+    read_count: int = (
+        int(misshapen_rows[0]) if len(misshapen_rows) else row_count)
+    fields: List[str] = (
+        "\t".join(stripped_lines[:read_count]).split("\t")
+        if read_count else [])
+    columns: List[List[str]] = [fields[column::5] for column in range(5)]
+    timestamps: List[float]
+    amounts: List[int]
+    try:
+        timestamps = list(map(float, columns[0]))
+        amounts = list(map(int, columns[3]))
+    except ValueError:
+        # Or before the first one whose numbers cannot be read
+        read_count = count_parsable_rows(columns[0], columns[3])
+        columns = [column[:read_count] for column in columns]
+        timestamps = list(map(float, columns[0]))
+        amounts = list(map(int, columns[3]))
+    return (TransactionColumns(np.array(timestamps, dtype=np.float64),
+                               np.array(columns[1], dtype=object),
+                               np.array(columns[2], dtype=object),
+                               to_amount_array(amounts),
+                               np.array(columns[4], dtype=object)),
+            row_offsets, row_count)
+
+
+def find_first_divergent_row(chain_columns: TransactionColumns,
+                             file_columns: TransactionColumns,
+                             count: int) -> int | None:
+    """
+    Compares the first `count` transactions of the chain and of the
+    transactions file.
+
+    Returns:
+        int | None: The first row that differs, or None if they all match.
+    """
+    if count == 0:
+        return None
+    differs: npt.NDArray[np.bool_] = np.zeros(count, dtype=np.bool_)
+    for chain_column, file_column in zip(chain_columns, file_columns):
+        differs |= chain_column[:count] != file_column[:count]
+    # Some rows have None as the sender or receiver, which no transaction
+    # in the chain has
+    differs |= file_columns.senders[:count] == "None"
+    differs |= file_columns.receivers[:count] == "None"
+    divergent_rows: npt.NDArray[np.intp] = np.flatnonzero(differs)
+    return int(divergent_rows[0]) if len(divergent_rows) else None
+
+
+def get_row(columns: TransactionColumns,
+            row: int) -> Tuple[float, str, str, int, str]:
+    """
+    Gets one row of the columns as Python values.
+    """
+    return cast(Tuple[float, str, str, int, str], tuple(
+        column[row:row + 1].tolist()[0] for column in columns))
+
+
+def get_divergent_row_message(chain_columns: TransactionColumns,
+                              file_columns: TransactionColumns,
+                              row: int) -> str:
+    """
+    Describes a row of the transactions file that does not match the
+    chain.
+    """
+    chain_values: Tuple[Any, ...] = get_row(chain_columns, row)
+    file_values: List[Any] = list(get_row(file_columns, row))
+    for column in (1, 2):
+        if file_values[column] == "None":
+            file_values[column] = None
+    message: str = ("Transaction data in the transactions file does not "
+                    "match the blockchain.\n"
+                    f"First row that differs: {row + 1} (line {row + 2} of "
+                    "the transactions file)")
+    for name, chain_value, file_value in zip(
+            ("Timestamp", "Sender", "Receiver", "Amount", "Method"),
+            chain_values, file_values):
+        message += (
+            f"\n{name}: {chain_value} (blockchain, type: "
+            f"{type(chain_value)})\n"
+            f"{name}: {file_value} (transactions file, type: "
+            f"{type(file_value)})")
+    return message
+
+
+def truncate_file(path: Path, size: int) -> None:
+    with open(path, "r+b") as file:
+        file.truncate(size)
+
+
+def transaction_line_matches(timestamp: float,
+                             transaction: TransactionRecord,
+                             line: bytes) -> bool:
+    """
+    Checks that a line of the transactions file holds the given transaction
+    of a block, the same way validate_transactions_file compares them.
+    """
+    columns: List[str] = line.decode().strip().split("\t")
+    if len(columns) != 5:
+        return False
+    try:
+        line_timestamp: float = float(columns[0])
+        line_amount: int = int(columns[3])
+    except ValueError:
+        return False
+    # Some blocks have None as the sender or receiver
+    line_sender: str | None = None if columns[1] == "None" else columns[1]
+    line_receiver: str | None = (
+        None if columns[2] == "None" else columns[2])
+    return (timestamp == line_timestamp and
+            transaction.sender == line_sender and
+            transaction.receiver == line_receiver and
+            transaction.amount == line_amount and
+            transaction.method == columns[4])
+# endregion
+
+# region Chain valid helpers
+
+
+class ChunkValidationResult(TypedDict):
+    """
+    The result of validating a range of lines of the blockchain file in a
+    worker process.
+    """
+    # Number and total size in bytes of the lines before the first invalid
+    # line (or of all lines if they are all valid)
+    valid_line_count: int
+    valid_size: int
+    # Index and "previous hash" of the first block in the range. Its linkage
+    # to the block before the range is validated by the caller.
+    first_block_index: int | None
+    first_previous_block_hash: str | None
+    # Index and hash of the last valid block in the range
+    last_block_index: int | None
+    last_block_hash: str | None
+    # Why the first invalid line is invalid, or None if all lines are valid
+    error_message: str | None
+
+
+def block_hash_error_message(block: Block | BlockRecord,
+                             calculated_hash: str) -> str:
+    # Shown the same way whichever way the block was loaded
+    block_data: str = (format_record_data(block.data)
+                       if isinstance(block, BlockRecord) else str(block.data))
+    return ("\nCurrent block's \"block hash\": "
+            f"{block.block_hash}\n"
+            f"Current block's \"data\": {block_data}\n"
+            f"Calculated hash:\t{calculated_hash}\n"
+            f"Block {block.index}'s hash does "
+            "not match the calculated hash. This could mean "
+            "that a block has been tampered with.")
+
+
+def previous_block_hash_error_message(block_index: int,
+                                      block_previous_block_hash: str,
+                                      previous_block_hash: str) -> str:
+    return ("\n"
+            "Previous block's block "
+            f"hash:\t\t\t{previous_block_hash}\n"
+            "Current block's \"Previous hash\":\t"
+            f"{block_previous_block_hash}\n"
+            f"Block {block_index} "
+            "\"Previous hash\" value does not "
+            "match the previous block's hash. This "
+            "could mean that a block is missing or "
+            "that one has been incorrectly inserted.")
+
+
+def load_block_line(line: bytes) -> Block | BlockRecord:
+    """
+    Loads a line of the blockchain file as a BlockRecord, without making
+    models of its transactions. Lines that records cannot hold as they are,
+    such as data entries with other keys or header fields BlockModel would
+    convert, are loaded as a Block instead, so that the same lines are
+    accepted.
+
+    Raises:
+        ValueError: If the line is not a valid block.
+    """
+    try:
+        return StoredBlock(line).to_record()
+    except ValueError:
+        return Blockchain.load_block(line.decode())
+
+
+def validate_block_line(
+        line: bytes,
+        previous_block_hash: str | None
+) -> Tuple[Block | BlockRecord | None, str | None]:
+    """
+    Validates one line of the blockchain file: that it is a block, that the
+    block's hash matches the calculated hash and, unless
+    `previous_block_hash` is None, that the block links to the previous
+    block.
+
+    Returns:
+        Tuple[Block | BlockRecord | None, str | None]: The block (None if
+            the line could not be loaded) and a message explaining why the
+            line is invalid (None if it is valid).
+    """
+    # Load the line as a block
+    try:
+        block: Block | BlockRecord = load_block_line(line)
+    except (json.JSONDecodeError, ValidationError, UnicodeDecodeError):
+        return None, "Invalid JSON in the blockchain file."
+    # Calculate the block_hash of the current block
+    try:
+        calculated_hash: str = block.calculate_hash()
+    except struct.error:
+        return block, f"Block {block.index} header cannot be hashed."
+    if block.block_hash != calculated_hash:
+        return block, block_hash_error_message(block, calculated_hash)
+    if (block.version >= 2 and
+            block.merkle_root != block.calculate_merkle_root()):
+        return block, (f"Block {block.index} Merkle root does not match "
+                       "its data.")
+    if (previous_block_hash is not None and
+            block.previous_block_hash != previous_block_hash):
+        return block, previous_block_hash_error_message(
+            block_index=block.index,
+            block_previous_block_hash=block.previous_block_hash,
+            previous_block_hash=previous_block_hash)
+    return block, None
+
+
+def validate_line_range(blockchain_path: str,
+                        start: int,
+                        end: int) -> ChunkValidationResult:
+    """
+    Validates the lines of the blockchain file from byte offset `start` up
+    to byte offset `end`, which must both be at the start of a line. Runs in
+    a worker process.
+    """
+    result: ChunkValidationResult = {
+        "valid_line_count": 0,
+        "valid_size": 0,
+        "first_block_index": None,
+        "first_previous_block_hash": None,
+        "last_block_index": None,
+        "last_block_hash": None,
+        "error_message": None
+    }
+    previous_block_hash: str | None = None
+    with open(blockchain_path, "rb") as file:
+        file.seek(start)
+        position: int = start
+        while position < end:
+            line: bytes = file.readline()
+            if not line:
+                break
+            block: Block | BlockRecord | None
+            error_message: str | None
+            block, error_message = validate_block_line(
+                line, previous_block_hash)
+            if position == start and block:
+                result["first_block_index"] = block.index
+                result["first_previous_block_hash"] = (
+                    block.previous_block_hash)
+            if error_message or not block:
+                result["error_message"] = error_message
+                break
+            previous_block_hash = block.block_hash
+            result["valid_line_count"] += 1
+            result["valid_size"] += len(line)
+            result["last_block_index"] = block.index
+            result["last_block_hash"] = block.block_hash
+            position += len(line)
+    return result
+
+
+def split_file_into_line_ranges(path: Path,
+                                range_count: int) -> List[Tuple[int, int]]:
+    """
+    Splits a file into about `range_count` byte ranges of similar size that
+    start and end on line boundaries.
+    """
+    file_size: int = os.stat(path).st_size
+    boundaries: List[int] = [0]
+    with open(path, "rb") as file:
+        for i in range(1, range_count):
+            position: int = max(file_size * i // range_count, boundaries[-1])
+            if position >= file_size:
+                break
+            if position > 0:
+                # Move to the start of the next line
+                file.seek(position - 1)
+                file.readline()
+                position = file.tell()
+            boundaries.append(position)
+    boundaries.append(file_size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:])
+            if end > start]
+# endregion
 
 
 if __name__ == "__main__":
@@ -0,0 +1,245 @@
+# region Imports
+# Standard library
+import os
+import enum
+import time
+import queue
+import threading
+from pathlib import Path
+from concurrent.futures import Future
+from typing import List, TextIO
+# endregion
+
+# region Fsync policy
+
+
+class FsyncPolicy(enum.Enum):
+    # Flush to disk after every append
+    ALWAYS = "always"
+    # Flush to disk once a group of appends is old enough or large enough
+    GROUP = "group"
+    # Leave flushing to disk to the operating system
+    NONE = "none"
+# endregion
+
+# region Chain writer
+
+
+class AppendRequest:
+    def __init__(self,
+                 block_lines: str,
+                 transaction_lines: str,
+                 block_count: int,
+                 release_files: bool = False) -> None:
+        self.block_lines: str = block_lines
+        self.transaction_lines: str = transaction_lines
+        self.block_count: int = block_count
+        # Close the files after the request instead of appending
+        self.release_files: bool = release_files
+        # Resolved once the lines are in the files
+        self.written: Future[None] = Future()
+        # Resolved once the lines have been committed under the fsync policy
+        self.committed: Future[None] = Future()
+
+
+class ChainWriter:
+    """
+    Long-lived writer that owns the open blockchain and transactions files.
+
+    Appends are queued and applied in order by a background thread. A caller
+    waits until its own append has been written, and can then wait until it
+    has been committed, which depending on the fsync policy means written,
+    or written and flushed to disk. With the group policy, appends that
+    arrive close together share one flush.
+    """
+
+    def __init__(self,
+                 blockchain_path: Path,
+                 transactions_path: Path,
+                 fsync_policy: FsyncPolicy = FsyncPolicy.NONE,
+                 fsync_interval_ms: int = 50,
+                 fsync_max_blocks: int = 100) -> None:
+        self.blockchain_path: Path = blockchain_path
+        self.transactions_path: Path = transactions_path
+        self.fsync_policy: FsyncPolicy = fsync_policy
+        self.fsync_interval: float = fsync_interval_ms / 1000
+        self.fsync_max_blocks: int = fsync_max_blocks
+        self.blockchain_file: TextIO | None = None
+        self.transactions_file: TextIO | None = None
+        self.requests: queue.Queue[AppendRequest | None] = queue.Queue()
+        # Held while a request is queued, so that none is queued after the
+        # writer thread has been told to stop
+        self.queue_lock = threading.Lock()
+        self.closed: bool = False
+        self.thread = threading.Thread(target=self.run,
+                                       name="ChainWriter",
+                                       daemon=True)
+        self.thread.start()
+
+    # region Public
+    def append(self,
+               block_lines: str,
+               transaction_lines: str,
+               block_count: int) -> Future[None]:
+        """
+        Appends lines to the transactions file and then to the blockchain
+        file, and waits until they have been written.
+
+        Args:
+            block_lines (str): Serialized blocks, each ending with a newline.
+            transaction_lines (str): Transactions, each ending with a
+                newline.
+            block_count (int): The number of blocks in `block_lines`.
+
+        Returns:
+            Future[None]: Resolved once the lines have been committed. Its
+                result raises OSError if they could not be flushed to disk.
+
+        Raises:
+            OSError: If the files could not be written.
+            RuntimeError: If the writer has been closed.
+        """
+        request = AppendRequest(block_lines, transaction_lines, block_count)
+        self.queue(request)
+        request.written.result()
+        return request.committed
+
+    def release_files(self) -> None:
+        """
+        Commits everything that has been appended and closes the files, so
+        that they can be removed or replaced. They are opened again by the
+        next append.
+
+        Raises:
+            RuntimeError: If the writer has been closed.
+        """
+        request = AppendRequest("", "", 0, release_files=True)
+        self.queue(request)
+        request.committed.result()
+
+    def close(self) -> None:
+        """
+        Commits everything that has been appended, closes the files and
+        stops the writer thread. Appends after that raise RuntimeError.
+        """
+        with self.queue_lock:
+            if not self.closed:
+                self.closed = True
+                self.requests.put(None)
+        self.thread.join()
+
+    def queue(self, request: AppendRequest) -> None:
+        with self.queue_lock:
+            if self.closed:
+                raise RuntimeError("The chain writer has been closed.")
+            self.requests.put(request)
+    # endregion
+
+    # region Writer thread
+    def run(self) -> None:
+        # Appends that have been written but not yet committed
+        uncommitted: List[AppendRequest] = []
+        uncommitted_blocks: int = 0
+        fsync_deadline: float | None = None
+        while True:
+            timeout: float | None = None
+            if fsync_deadline is not None:
+                timeout = max(fsync_deadline - time.monotonic(), 0)
+            try:
+                request: AppendRequest | None = self.requests.get(
+                    timeout=timeout)
+            except queue.Empty:
+                # The oldest uncommitted append has waited long enough
+                self.commit(uncommitted)
+                uncommitted = []
+                uncommitted_blocks = 0
+                fsync_deadline = None
+                continue
+            if request is None or request.release_files:
+                self.commit(uncommitted)
+                uncommitted = []
+                uncommitted_blocks = 0
+                fsync_deadline = None
+                self.close_files()
+                if request is None:
+                    break
+                request.committed.set_result(None)
+                continue
+            try:
+                self.write(request)
+            except Exception as e:
+                print(f"ERROR: Error appending to the blockchain files: {e}")
+                request.written.set_exception(e)
+                request.committed.set_exception(e)
+                continue
+            request.written.set_result(None)
+            uncommitted.append(request)
+            uncommitted_blocks += request.block_count
+            if self.fsync_policy == FsyncPolicy.GROUP:
+                if fsync_deadline is None:
+                    fsync_deadline = time.monotonic() + self.fsync_interval
+                if (uncommitted_blocks < self.fsync_max_blocks and
+                        time.monotonic() < fsync_deadline):
+                    continue
+            self.commit(uncommitted)
+            uncommitted = []
+            uncommitted_blocks = 0
+            fsync_deadline = None
+
+    def write(self, request: AppendRequest) -> None:
+        # Transactions are written first, like they always have been, so
+        # a block is never on disk without its transactions
+        if request.transaction_lines:
+            self.transactions_file = self.open_file(
+                self.transactions_file, self.transactions_path)
+            self.transactions_file.write(request.transaction_lines)
+            self.transactions_file.flush()
+        if request.block_lines:
+            self.blockchain_file = self.open_file(
+                self.blockchain_file, self.blockchain_path)
+            self.blockchain_file.write(request.block_lines)
+            self.blockchain_file.flush()
+
+    def commit(self, requests: List[AppendRequest]) -> None:
+        if not requests:
+            return
+        try:
+            if self.fsync_policy != FsyncPolicy.NONE:
+                for file in (self.transactions_file, self.blockchain_file):
+                    if file is not None:
+                        os.fsync(file.fileno())
+        except OSError as e:
+            print(f"ERROR: Error flushing the blockchain files to disk: {e}")
+            for request in requests:
+                request.committed.set_exception(e)
+            return
+        for request in requests:
+            request.committed.set_result(None)
+
+    def open_file(self, file: TextIO | None, path: Path) -> TextIO:
+        """
+        Returns the open file for `path`, opening it again if it has been
+        closed, removed or replaced since it was opened.
+        """
+        if file is not None:
+            try:
+                path_stat: os.stat_result = os.stat(path)
+                file_stat: os.stat_result = os.fstat(file.fileno())
+                if (path_stat.st_ino == file_stat.st_ino and
+                        path_stat.st_dev == file_stat.st_dev):
+                    return file
+            except FileNotFoundError:
+                pass
+            file.close()
+        directories: Path = path.parent
+        os.makedirs(directories, exist_ok=True)
+        return open(path, "a")
+
+    def close_files(self) -> None:
+        for file in (self.transactions_file, self.blockchain_file):
+            if file is not None:
+                file.close()
+        self.transactions_file = None
+        self.blockchain_file = None
+    # endregion
+# endregion
@@ -0,0 +1,93 @@
+# region Imports
+# Standard library
+import os
+import gzip
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict
+# endregion
+
+# region Compressed file cache
+
+
+class CompressedFileCache:
+    """
+    Gzip-compressed copies of files, for sending to clients that accept
+    gzip. A copy is made once per version of a file, identified by a tag
+    (the ETag of the file), and reused until the tag changes.
+
+    Each copy has the tag in its name, so a new copy never replaces a file
+    that may still be being sent (which is not possible on Windows).
+    """
+
+    def __init__(self, cache_directory: Path) -> None:
+        self.cache_directory: Path = cache_directory
+        # Path of the current compressed copy of each file
+        self.compressed_paths: Dict[Path, Path] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def get(self, path: Path, tag: str) -> Path:
+        """
+        Gets the compressed copy of `path` for version `tag`, compressing
+        the file first if there is no copy for that version.
+
+        Args:
+            path (Path): The file to compress.
+            tag (str): Identifies the current version of the file. Only
+                characters that are valid in file names may be used.
+
+        Returns:
+            Path: The path of the compressed copy.
+        """
+        compressed_path: Path = self.cache_directory / (
+            f"{path.name}-{tag}.gz")
+        if self.compressed_paths.get(path) == compressed_path:
+            return compressed_path
+        with self.lock:
+            if not os.path.exists(compressed_path):
+                print(f"Compressing {path.name}...")
+                os.makedirs(self.cache_directory, exist_ok=True)
+                temporary_path: Path = compressed_path.with_suffix(".tmp")
+                with open(path, "rb") as file, gzip.open(
+                        temporary_path, "wb", compresslevel=6) as gzip_file:
+                    # Leave out a line that is still being written
+                    remaining: int = self.get_complete_lines_size(file)
+                    file.seek(0)
+                    while remaining > 0:
+                        chunk: bytes = file.read(min(remaining, 1024 * 1024))
+                        if not chunk:
+                            break
+                        gzip_file.write(chunk)
+                        remaining -= len(chunk)
+                os.replace(temporary_path, compressed_path)
+                print(f"{path.name} compressed.")
+            self.compressed_paths[path] = compressed_path
+            self.remove_old_copies(path, compressed_path)
+        return compressed_path
+
+    @staticmethod
+    def get_complete_lines_size(file: BinaryIO) -> int:
+        """
+        Gets the size of the file up to and including its last line break.
+        """
+        end: int = file.seek(0, os.SEEK_END)
+        while end > 0:
+            start: int = max(end - 64 * 1024, 0)
+            file.seek(start)
+            chunk: bytes = file.read(end - start)
+            line_break: int = chunk.rfind(b"\n")
+            if line_break != -1:
+                return start + line_break + 1
+            end = start
+        return 0
+
+    def remove_old_copies(self, path: Path, compressed_path: Path) -> None:
+        for old_path in self.cache_directory.glob(f"{path.name}-*.gz"):
+            if old_path == compressed_path:
+                continue
+            try:
+                os.remove(old_path)
+            except OSError:
+                # Still being sent, it is removed with the next copy
+                pass
+# endregion
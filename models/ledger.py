@@ -0,0 +1,171 @@
+# region Imports
+# Standard library
+import os
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+# Third party
+import pandas as pd
+# endregion
+
+# region Ledger class
+
+
+class Ledger:
+    """
+    In-memory per-user totals of sent and received coins.
+
+    The totals are built from the transactions file once and then kept up to
+    date as transactions are stored, so that balances can be answered without
+    reading the transactions file again.
+    """
+    # Sends with these methods are not deducted from the sender's balance
+    UNDEDUCTED_METHODS: Tuple[str, ...] = ("reaction", "reaction_network")
+
+    def __init__(self, transactions_path: Path) -> None:
+        self.transactions_path: Path = transactions_path
+        self.sent: Dict[str, int] = {}
+        self.received: Dict[str, int] = {}
+        self.transaction_count: int = 0
+        # Size and modification time of the transactions file
+        # as of the last transaction applied to the ledger
+        self.file_size: int = 0
+        self.file_mtime_ns: int = 0
+
+    def clear(self) -> None:
+        self.sent = {}
+        self.received = {}
+        self.transaction_count = 0
+        self.file_size = 0
+        self.file_mtime_ns = 0
+
+    def load(self) -> None:
+        """
+        Rebuilds the ledger from the transactions file.
+        """
+        self.clear()
+        if not os.path.exists(self.transactions_path):
+            return
+        print("Loading balances from the transactions file...")
+        with open(self.transactions_path, "rb") as file:
+            contents: bytes = file.read()
+            self.file_mtime_ns = os.fstat(file.fileno()).st_mtime_ns
+        self.file_size = len(contents)
+        if contents.count(b"\n") < 2:
+            # Only the column headers (or nothing at all)
+            print("Balances loaded.")
+            return
+        transactions: pd.DataFrame
+        try:
+            transactions = read_transactions(contents, amount_dtype="int64")
+        except OverflowError:
+            # Amounts that do not fit in 64 bits, which were allowed as huge
+            # transactions, are summed as Python integers
+            transactions = read_transactions(contents, amount_dtype=str)
+            transactions["Amount"] = (
+                transactions["Amount"].map(int).astype(object))
+        deducted: pd.Series[bool] = ~transactions["Method"].isin(
+            self.UNDEDUCTED_METHODS)
+        # Every sender is known to the ledger, even if none of their
+        # sends are deducted
+        self.sent = dict.fromkeys(transactions["Sender"].unique(), 0)
+        sent_totals: pd.Series[int] = (
+            transactions[deducted].groupby("Sender")["Amount"].sum())
+        for sender, total in sent_totals.items():
+            self.sent[str(sender)] = int(total)
+        received_totals: pd.Series[int] = (
+            transactions.groupby("Receiver")["Amount"].sum())
+        self.received = {str(receiver): int(total)
+                         for receiver, total in received_totals.items()}
+        self.transaction_count = len(transactions)
+        print(f"Balances loaded ({self.transaction_count} transactions).")
+
+    def is_synced(self) -> bool:
+        """
+        Checks cheaply whether the transactions file is unchanged since the
+        ledger was last brought up to date with it.
+        """
+        try:
+            stat: os.stat_result = os.stat(self.transactions_path)
+        except FileNotFoundError:
+            return False
+        return (stat.st_size == self.file_size and
+                stat.st_mtime_ns == self.file_mtime_ns)
+
+    def sync(self) -> None:
+        """
+        Brings the ledger up to date with changes made to the transactions
+        file outside of `add_transaction`. Lines appended to the file are
+        applied incrementally; any other change rebuilds the ledger.
+        """
+        try:
+            stat: os.stat_result = os.stat(self.transactions_path)
+        except FileNotFoundError:
+            if self.file_size != 0:
+                self.clear()
+            return
+        if (stat.st_size == self.file_size and
+                stat.st_mtime_ns == self.file_mtime_ns):
+            return
+        if stat.st_size <= self.file_size:
+            print("The transactions file has changed. "
+                  "Balances will be reloaded.")
+            self.load()
+            return
+        with open(self.transactions_path, "rb") as file:
+            file.seek(self.file_size)
+            tail: bytes = file.read()
+            self.file_mtime_ns = os.fstat(file.fileno()).st_mtime_ns
+        # Only apply complete lines
+        tail = tail[:tail.rfind(b"\n") + 1]
+        lines: list[bytes] = tail.splitlines()
+        if self.file_size == 0 and lines:
+            # Skip the column headers
+            lines = lines[1:]
+        for line in lines:
+            columns: list[bytes] = line.split(b"\t")
+            if len(columns) != 5:
+                print(f"Skipping invalid line in the transactions file: "
+                      f"{line!r}")
+                continue
+            self.add_transaction(sender=columns[1].decode(),
+                                 receiver=columns[2].decode(),
+                                 amount=int(columns[3]),
+                                 method=columns[4].decode())
+        self.file_size += len(tail)
+
+    def add_transaction(self,
+                        sender: str,
+                        receiver: str,
+                        amount: int,
+                        method: str) -> None:
+        deducted: int = 0 if method in self.UNDEDUCTED_METHODS else amount
+        self.sent[sender] = self.sent.get(sender, 0) + deducted
+        self.received[receiver] = self.received.get(receiver, 0) + amount
+        self.transaction_count += 1
+
+    def mark_synced(self) -> None:
+        """
+        Records the current size and modification time of the transactions
+        file, after the ledger has been updated with `add_transaction` for
+        everything written to it.
+        """
+        stat: os.stat_result = os.stat(self.transactions_path)
+        self.file_size = stat.st_size
+        self.file_mtime_ns = stat.st_mtime_ns
+
+    def get_balance(self, user: str) -> int | None:
+        if user not in self.sent and user not in self.received:
+            return None
+        return self.received.get(user, 0) - self.sent.get(user, 0)
+
+
+def read_transactions(contents: bytes, amount_dtype: Any) -> pd.DataFrame:
+    return pd.read_csv(  # pyright: ignore[reportUnknownMemberType]
+        BytesIO(contents),
+        sep="\t",
+        dtype={"Sender": str, "Receiver": str,
+               "Amount": amount_dtype, "Method": str},
+        keep_default_na=False)
+# endregion
@@ -0,0 +1,208 @@
+# region Imports
+# Standard library
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Tuple, TYPE_CHECKING
+
+# Local
+if TYPE_CHECKING:
+    from .block import Block
+    from .blockchain import Blockchain
+    from ..sponsorblockchain_types import BlockData
+# endregion
+
+# region Receipt
+
+
+class Receipt:
+    """
+    What a caller gets for data submitted to the mempool. The block is
+    resolved once the data has been sealed into a block and committed.
+    """
+
+    def __init__(self,
+                 data: "BlockData",
+                 allow_huge_transaction: bool) -> None:
+        self.receipt_id: str = uuid.uuid4().hex
+        self.data: "BlockData" = data
+        self.allow_huge_transaction: bool = allow_huge_transaction
+        self.transaction_count: int = sum(
+            1 for item in data
+            if isinstance(item, dict) and "transaction" in item)
+        self.submitted_at: float = time.monotonic()
+        # Where the data starts in the block data
+        self.position: int | None = None
+        self.block: "Future[Block]" = Future()
+        # The block serialized as it was written, once it has been sealed
+        self.block_json: str | None = None
+
+    def get_status(self) -> str:
+        if not self.block.done():
+            return "pending"
+        return "failed" if self.block.exception() else "sealed"
+# endregion
+
+# region Mempool
+
+
+class Mempool:
+    """
+    Queue of validated block data that a background assembler seals into
+    blocks. A block is sealed once `max_transactions` transactions are
+    waiting, or once the oldest submission has waited `max_delay_ms`, so
+    that data submitted close together shares one block, one append and one
+    hash.
+
+    The data of one submission always ends up in the same block.
+    """
+
+    def __init__(self,
+                 blockchain: "Blockchain",
+                 max_transactions: int = 100,
+                 max_delay_ms: int = 200,
+                 difficulty: int = 0,
+                 receipt_limit: int = 10_000) -> None:
+        """
+        Args:
+            blockchain (Blockchain): The blockchain to add the blocks to.
+            max_transactions (int, optional): The number of transactions
+                that seals a block without waiting. Other entries do not
+                count towards it. Default is 100.
+            max_delay_ms (int, optional): The longest time submitted data
+                waits to be sealed. Default is 200.
+            difficulty (int, optional): Mining difficulty of the sealed
+                blocks. Default is 0.
+            receipt_limit (int, optional): The number of sealed or failed
+                receipts kept for polling. Default is 10000.
+        """
+        self.blockchain: "Blockchain" = blockchain
+        self.max_transactions: int = max_transactions
+        self.max_delay: float = max_delay_ms / 1000
+        self.difficulty: int = difficulty
+        self.receipt_limit: int = receipt_limit
+        self.submissions: queue.Queue[Receipt | None] = queue.Queue()
+        # Guards the queue against submissions after close
+        self.submissions_lock: threading.Lock = threading.Lock()
+        self.closed: bool = False
+        # Receipts by ID, oldest first
+        self.receipts: OrderedDict[str, Receipt] = OrderedDict()
+        self.receipts_lock: threading.Lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run,
+                                       name="MempoolAssembler",
+                                       daemon=True)
+        self.thread.start()
+
+    # region Public
+    def submit(self,
+               data: "BlockData",
+               allow_huge_transaction: bool = False) -> Receipt:
+        """
+        Checks the transactions in the data like add_block does, and queues
+        the data to be sealed into a block.
+
+        Raises:
+            ValueError: If a transaction cannot be added. Nothing is queued
+                in that case.
+            RuntimeError: If the mempool has been closed.
+        """
+        for item in data:
+            if isinstance(item, dict) and "transaction" in item:
+                problem: str | None = self.blockchain.check_transaction(
+                    item["transaction"], allow_huge_transaction)
+                if problem:
+                    raise ValueError(problem)
+        receipt = Receipt(data, allow_huge_transaction)
+        with self.submissions_lock:
+            # Nothing would seal the data once the assembler has stopped
+            if self.closed:
+                raise RuntimeError("The mempool has been closed.")
+            with self.receipts_lock:
+                self.receipts[receipt.receipt_id] = receipt
+                # Forget the oldest receipts that are no longer pending
+                while len(self.receipts) > self.receipt_limit:
+                    oldest: Receipt = next(iter(self.receipts.values()))
+                    if not oldest.block.done():
+                        break
+                    self.receipts.popitem(last=False)
+            self.submissions.put(receipt)
+        return receipt
+
+    def get_receipt(self, receipt_id: str) -> Receipt | None:
+        with self.receipts_lock:
+            return self.receipts.get(receipt_id)
+
+    def close(self) -> None:
+        """
+        Seals everything that has been submitted and stops the assembler.
+        Submissions after that raise RuntimeError.
+        """
+        with self.submissions_lock:
+            if not self.closed:
+                self.closed = True
+                self.submissions.put(None)
+        self.thread.join()
+    # endregion
+
+    # region Assembler thread
+    def run(self) -> None:
+        pending: List[Receipt] = []
+        pending_transactions: int = 0
+        closing: bool = False
+        while not closing:
+            timeout: float | None = None
+            if pending:
+                timeout = max(
+                    pending[0].submitted_at + self.max_delay -
+                    time.monotonic(), 0)
+            try:
+                receipt: Receipt | None = self.submissions.get(
+                    timeout=timeout)
+            except queue.Empty:
+                # The oldest submission has waited long enough
+                self.seal(pending)
+                pending = []
+                pending_transactions = 0
+                continue
+            if receipt is None:
+                closing = True
+            else:
+                pending.append(receipt)
+                pending_transactions += receipt.transaction_count
+                if pending_transactions < self.max_transactions:
+                    continue
+            self.seal(pending)
+            pending = []
+            pending_transactions = 0
+
+    def seal(self, receipts: List[Receipt]) -> None:
+        if not receipts:
+            return
+        data: "BlockData" = []
+        for receipt in receipts:
+            receipt.position = len(data)
+            data.extend(receipt.data)
+        try:
+            # The transactions were checked when they were submitted, with
+            # the limits each submission asked for
+            added: "Tuple[Block, str]" = self.blockchain.add_block(
+                data=data,
+                difficulty=self.difficulty,
+                allow_huge_transaction=any(
+                    receipt.allow_huge_transaction for receipt in receipts))
+            block, block_json = added
+        except Exception as e:
+            print(f"ERROR: Error sealing a block from the mempool: {e}")
+            for receipt in receipts:
+                receipt.block.set_exception(e)
+            return
+        print(f"Sealed block {block.index} with {len(receipts)} "
+              f"submissions ({len(data)} entries).")
+        for receipt in receipts:
+            receipt.block_json = block_json
+            receipt.block.set_result(block)
+    # endregion
+# endregion
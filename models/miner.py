@@ -0,0 +1,198 @@
+# region Imports
+# Standard library
+import os
+import hashlib
+import threading
+import multiprocessing
+import concurrent.futures
+from multiprocessing.context import BaseContext
+from multiprocessing.synchronize import Event
+from typing import List, Set, Tuple
+# endregion
+
+# region Nonce search
+# How many nonces are tried between checks for cancellation
+CANCEL_CHECK_INTERVAL: int = 4096
+# Below this difficulty a block is mined faster in the calling process than
+# it takes to hand the work to the pool
+PARALLEL_MIN_DIFFICULTY: int = 5
+
+# Set in each worker process of a Miner, to stop every worker once one of
+# them has found a nonce
+cancel_event: Event | None = None
+
+
+def init_worker(event: Event) -> None:
+    global cancel_event
+    cancel_event = event
+
+
+def meets_difficulty(digest: bytes, difficulty: int) -> bool:
+    """
+    Checks that the hex form of `digest` starts with `difficulty` zeros,
+    without converting it to hex.
+    """
+    zero_bytes, zero_half_byte = divmod(difficulty, 2)
+    if digest[:zero_bytes] != bytes(zero_bytes):
+        return False
+    return not zero_half_byte or digest[zero_bytes] < 16
+
+
+def search_nonces(prefix: bytes,
+                  difficulty: int,
+                  start: int,
+                  stop: int) -> int | None:
+    """
+    Tries the nonces from `start` up to, but not including, `stop`. The hash
+    state after the prefix is calculated once and copied for each nonce.
+
+    Args:
+        prefix (bytes): Everything that is hashed before the nonce.
+        difficulty (int): The number of leading zeros the hex hash needs.
+        start (int): The first nonce to try.
+        stop (int): The nonce to stop at.
+
+    Returns:
+        int | None: The first nonce that meets the difficulty, or None if
+            there is none in the range or the search has been cancelled.
+    """
+    prefix_hash = hashlib.sha256(prefix)
+    for batch_start in range(start, stop, CANCEL_CHECK_INTERVAL):
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        for nonce in range(batch_start,
+                           min(batch_start + CANCEL_CHECK_INTERVAL, stop)):
+            nonce_hash = prefix_hash.copy()
+            nonce_hash.update(str(nonce).encode())
+            if meets_difficulty(nonce_hash.digest(), difficulty):
+                return nonce
+    return None
+
+
+def find_nonce(prefix: bytes,
+               difficulty: int,
+               start: int = 0,
+               chunk_size: int = 1 << 20) -> int:
+    """
+    Finds the first nonce from `start` that meets the difficulty, in the
+    calling process.
+    """
+    chunk_start: int = start
+    while True:
+        nonce: int | None = search_nonces(prefix, difficulty, chunk_start,
+                                          chunk_start + chunk_size)
+        if nonce is not None:
+            return nonce
+        chunk_start += chunk_size
+
+
+def get_found_nonces(
+        futures: Set[concurrent.futures.Future[int | None]]) -> List[int]:
+    nonces: List[int] = []
+    for future in futures:
+        nonce: int | None = future.result()
+        if nonce is not None:
+            nonces.append(nonce)
+    return nonces
+# endregion
+
+# region Miner class
+
+
+class Miner:
+    """
+    Proof-of-work search over a pool of worker processes.
+
+    The nonces are handed out in chunks, and as soon as one worker finds a
+    nonce the others are told to stop. The pool is started by the first
+    search that needs it and kept for later ones.
+    """
+
+    def __init__(self,
+                 processes: int | None = None,
+                 chunk_size: int = 1 << 16) -> None:
+        """
+        Args:
+            processes (int | None, optional): The number of worker
+                processes. Default is None, which uses one per CPU.
+            chunk_size (int, optional): The number of nonces a worker tries
+                before asking for more. Default is 65536.
+        """
+        self.processes: int = processes or os.cpu_count() or 1
+        self.chunk_size: int = chunk_size
+        self.executor: concurrent.futures.ProcessPoolExecutor | None = None
+        self.cancel_event: Event | None = None
+        # One search at a time, since they share the cancel event
+        self.lock: threading.Lock = threading.Lock()
+
+    def mine(self, prefix: bytes, difficulty: int, start: int = 0) -> int:
+        """
+        Finds a nonce from `start` that meets the difficulty. Low
+        difficulties, and miners with one process, are searched in the
+        calling process.
+
+        Args:
+            prefix (bytes): Everything that is hashed before the nonce.
+            difficulty (int): The number of leading zeros the hex hash
+                needs.
+            start (int, optional): The first nonce to try. Default is 0.
+
+        Returns:
+            int: The nonce. If several workers find one at the same time,
+                the lowest of them.
+        """
+        if self.processes == 1 or difficulty < PARALLEL_MIN_DIFFICULTY:
+            return find_nonce(prefix, difficulty, start)
+        with self.lock:
+            executor: concurrent.futures.ProcessPoolExecutor
+            cancel_event: Event
+            executor, cancel_event = self.start()
+            futures: Set[concurrent.futures.Future[int | None]] = set()
+            done: Set[concurrent.futures.Future[int | None]] = set()
+            next_start: int = start
+            found: List[int] = []
+            try:
+                while not found:
+                    # Two chunks per worker, so none of them sits idle
+                    while len(futures) < self.processes * 2:
+                        futures.add(executor.submit(
+                            search_nonces, prefix, difficulty, next_start,
+                            next_start + self.chunk_size))
+                        next_start += self.chunk_size
+                    done, futures = concurrent.futures.wait(
+                        futures,
+                        return_when=concurrent.futures.FIRST_COMPLETED)
+                    found += get_found_nonces(done)
+            finally:
+                # Stop the other workers and wait for them, so that the
+                # event can be cleared for the next search
+                cancel_event.set()
+                done, futures = concurrent.futures.wait(futures)
+                cancel_event.clear()
+            found += get_found_nonces(done)
+            return min(found)
+
+    def start(self) -> Tuple[concurrent.futures.ProcessPoolExecutor, Event]:
+        if self.executor is None or self.cancel_event is None:
+            # Forking the multi-threaded server could copy a lock that
+            # another thread holds into the workers, so they are spawned
+            # instead
+            context: BaseContext = multiprocessing.get_context("spawn")
+            self.cancel_event = context.Event()
+            self.executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=context,
+                initializer=init_worker,
+                initargs=(self.cancel_event,))
+        return self.executor, self.cancel_event
+
+    def close(self) -> None:
+        """
+        Stops the worker processes.
+        """
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+            self.executor = None
+            self.cancel_event = None
+# endregion
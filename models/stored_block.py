@@ -0,0 +1,208 @@
+# region Imports
+# Standard library
+import json
+from typing import Any, Collection, Dict, List, Tuple, cast
+
+# Third party
+from pydantic_core import from_json
+
+# Local
+try:
+    from ..sponsorblockchain_types import BlockDataAdapter
+    from .block import Block
+    from .block_record import BlockRecord, RecordData, parse_record_data
+except ImportError:
+    try:
+        from sponsorblockchain.sponsorblockchain_types import (
+            BlockDataAdapter)
+        from models.block import Block
+        from models.block_record import (
+            BlockRecord, RecordData, parse_record_data)
+    except ImportError:
+        from sponsorblockchain.sponsorblockchain_types import (
+            BlockDataAdapter)
+        from sponsorblockchain.models.block import Block
+        from sponsorblockchain.models.block_record import (
+            BlockRecord, RecordData, parse_record_data)
+# endregion
+
+# region Stored block
+# Every field of a stored block except its data
+HEADER_FIELDS: Tuple[str, ...] = ("index", "timestamp", "previous_block_hash",
+                                  "nonce", "block_hash", "version",
+                                  "merkle_root")
+# Fields that only blocks of later versions have
+OPTIONAL_FIELDS: Dict[str, Any] = {"version": 1, "merkle_root": None}
+# The types each header field is decoded as when BlockModel would take it
+# as it is, without converting it
+HEADER_FIELD_TYPES: Dict[str, Tuple[type, ...]] = {
+    "index": (int,), "timestamp": (float, int),
+    "previous_block_hash": (str,), "nonce": (int,), "block_hash": (str,),
+    "version": (int,), "merkle_root": (str, type(None))}
+# Blocks are stored starting with their index and timestamp, followed by
+# their data and then the previous block hash
+LINE_START: bytes = b'{"index":'
+DATA_KEY: bytes = b'"data":'
+AFTER_DATA_KEY: bytes = b'"previous_block_hash":'
+
+
+def split_block_line(line: bytes) -> Tuple[Dict[str, Any], bytes]:
+    """
+    Splits a line of the blockchain file into its decoded header and its
+    data as raw JSON. The data is cut out of the line without decoding it.
+    A line that is laid out differently is decoded whole.
+
+    Raises:
+        ValueError: If the line is not a JSON object.
+    """
+    data_start: int = line.find(DATA_KEY)
+    # The last match, since the data can contain the key as text
+    data_end: int = line.rfind(AFTER_DATA_KEY)
+    if line.startswith(LINE_START) and 0 < data_start < data_end:
+        raw_data: bytes = line[data_start + len(DATA_KEY):data_end].strip()
+        if raw_data.startswith(b"[") and raw_data.endswith(b","):
+            try:
+                header: Any = from_json(line[:data_start] + line[data_end:])
+            except ValueError:
+                header = None
+            # Nothing else may have been cut out with the data
+            if isinstance(header, dict) and all(
+                    field in header for field in HEADER_FIELDS
+                    if field not in OPTIONAL_FIELDS):
+                return header, raw_data[:-1].rstrip()
+    block: Any = from_json(line)
+    if not isinstance(block, dict):
+        raise ValueError("The line is not a block.")
+    return block, json.dumps(block.pop("data", None)).encode()
+
+
+class StoredBlock:
+    """
+    A block as it is stored in the blockchain file, decoded only as far as
+    it is used. The header fields that are asked for are decoded when the
+    block is read, and the data is kept as raw JSON until it is accessed.
+    """
+    # No per-instance dictionary, since every scan over the chain makes one
+    # per block
+    __slots__ = ("line", "parse_data", "raw_data", "is_exact", "index",
+                 "timestamp", "previous_block_hash", "nonce", "block_hash",
+                 "version", "merkle_root", "decoded_data")
+
+    def __init__(self,
+                 line: bytes,
+                 fields: Collection[str] | None = None,
+                 parse_data: bool = True) -> None:
+        """
+        Args:
+            line (bytes): The line of the blockchain file, without the line
+                break.
+            fields (Collection[str] | None, optional): The header fields to
+                decode. The others are None. Default is None, which decodes
+                all of them.
+            parse_data (bool, optional): If True, the data is decoded into
+                record data, with each transaction validated into a
+                TransactionRecord, when it is accessed. If False, the data
+                is left as it was decoded from JSON. Default is True.
+
+        Raises:
+            ValueError: If the line is not a block, or a field that was asked
+                for is missing.
+        """
+        self.line: bytes = line
+        self.parse_data: bool = parse_data
+        header: Dict[str, Any]
+        header, self.raw_data = split_block_line(line)
+        # Whether the header holds only block fields, each of a type
+        # BlockModel takes as it is. Booleans are not taken as numbers.
+        self.is_exact: bool = all(
+            type(value) in HEADER_FIELD_TYPES.get(field, ())
+            for field, value in header.items())
+        decoded: Dict[str, Any] = {}
+        for field in HEADER_FIELDS if fields is None else fields:
+            if field == "data":
+                continue
+            if field in header:
+                decoded[field] = header[field]
+            elif field in OPTIONAL_FIELDS:
+                decoded[field] = OPTIONAL_FIELDS[field]
+            else:
+                raise ValueError(f"The block has no {field}.")
+        self.index: int | None = decoded.get("index")
+        # Stored as the float the block was hashed with, even when whole
+        self.timestamp: float | None = (
+            float(decoded["timestamp"]) if "timestamp" in decoded else None)
+        self.previous_block_hash: str | None = decoded.get(
+            "previous_block_hash")
+        self.nonce: int | None = decoded.get("nonce")
+        self.block_hash: str | None = decoded.get("block_hash")
+        self.version: int | None = decoded.get("version")
+        self.merkle_root: str | None = decoded.get("merkle_root")
+        self.decoded_data: RecordData | List[Any] | None = None
+
+    @property
+    def data(self) -> RecordData:
+        """
+        The data of the block, decoded the first time it is accessed.
+
+        Raises:
+            ValueError: If the data is not valid block data.
+        """
+        if self.decoded_data is None:
+            self.decoded_data = (
+                parse_record_data(self.raw_data)
+                if self.parse_data else from_json(self.raw_data))
+        return self.decoded_data
+
+    def check_header(self) -> None:
+        if (self.index is None or self.timestamp is None or
+                self.previous_block_hash is None or self.nonce is None or
+                self.block_hash is None or self.version is None):
+            raise ValueError("Every header field is needed to build the "
+                             "block.")
+
+    def to_block(self) -> Block:
+        """
+        Builds the Block, with Transaction models in its data. Every header
+        field must have been decoded.
+
+        Raises:
+            ValueError: If a header field has not been decoded, or the data
+                is not valid block data.
+        """
+        self.check_header()
+        return Block(index=cast(int, self.index),
+                     timestamp=cast(float, self.timestamp),
+                     data=BlockDataAdapter.validate_json(self.raw_data),
+                     previous_block_hash=cast(str, self.previous_block_hash),
+                     nonce=cast(int, self.nonce),
+                     block_hash=cast(str, self.block_hash),
+                     version=cast(int, self.version),
+                     merkle_root=self.merkle_root)
+
+    def to_record(self) -> BlockRecord:
+        """
+        Builds the BlockRecord. Every header field must have been decoded,
+        and the data must be parsed. The header must be exact, see
+        `is_exact`, so that the record has the values a BlockModel would.
+
+        Raises:
+            ValueError: If a header field has not been decoded, the header is
+                not exact, the data is not parsed, or it is not valid block
+                data that records can hold.
+        """
+        self.check_header()
+        if not self.is_exact:
+            raise ValueError("The header has fields that are not block "
+                             "fields or not of their types.")
+        if not self.parse_data:
+            raise ValueError("The data is needed as records to build the "
+                             "record.")
+        return BlockRecord(cast(int, self.index),
+                           cast(float, self.timestamp),
+                           self.data,
+                           cast(str, self.previous_block_hash),
+                           cast(int, self.nonce),
+                           cast(str, self.block_hash),
+                           cast(int, self.version),
+                           self.merkle_root)
+# endregion
@@ -0,0 +1,141 @@
+# region Imports
+# Standard library
+import bisect
+import threading
+from typing import Dict, List, TYPE_CHECKING
+
+# Third party
+import numpy as np
+import numpy.typing as npt
+
+# Local
+if TYPE_CHECKING:
+    from .transaction_store import TransactionStore
+# endregion
+
+# region Transaction history index class
+
+
+class TransactionHistoryIndex:
+    """
+    The rows of a transaction store that each user is the sender or the
+    receiver of, for paging through one user's transactions.
+
+    The rows are kept in compressed sparse row form: one array with the rows
+    of every user, grouped by user and in order, and one array with where
+    each user's rows start. Rows added to the store after the arrays were
+    built are kept in small per-user lists until there are
+    `merge_threshold` of them, and then the arrays are built again.
+    """
+
+    def __init__(self, merge_threshold: int = 100_000) -> None:
+        # Guards the index while it is updated or read
+        self.lock: threading.Lock = threading.Lock()
+        self.merge_threshold: int = merge_threshold
+        # The user list of the store the index was built from, and how many
+        # of its rows are in the index. None until it is built.
+        self.users: List[str] | None = None
+        self.row_count: int = 0
+        # The rows of user ID u are rows[offsets[u]:offsets[u + 1]]
+        self.offsets: npt.NDArray[np.int64] = np.zeros(1, dtype=np.int64)
+        self.rows: npt.NDArray[np.int64] = np.zeros(0, dtype=np.int64)
+        # Rows added since the arrays were built, by user ID
+        self.recent_rows: Dict[int, List[int]] = {}
+        self.recent_row_count: int = 0
+
+    def is_built(self) -> bool:
+        return self.users is not None
+
+    # region Update
+    def update(self, store: "TransactionStore") -> None:
+        """
+        Brings the index up to date with the store, building it first if it
+        has not been built from the store as it is now.
+        """
+        with self.lock:
+            users: List[str] = store.users
+            row_count: int = store.row_count
+            if (users is not self.users or row_count < self.row_count or
+                    self.recent_row_count + row_count - self.row_count >
+                    self.merge_threshold):
+                self.build(store, users, row_count)
+                return
+            senders: List[int] = (
+                store.get_column("senders")[self.row_count:row_count].tolist())
+            receivers: List[int] = (
+                store.get_column("receivers")[
+                    self.row_count:row_count].tolist())
+            for row, sender, receiver in zip(
+                    range(self.row_count, row_count), senders, receivers):
+                self.recent_rows.setdefault(sender, []).append(row)
+                if receiver != sender:
+                    self.recent_rows.setdefault(receiver, []).append(row)
+            self.recent_row_count += row_count - self.row_count
+            self.row_count = row_count
+
+    def build(self,
+              store: "TransactionStore",
+              users: List[str],
+              row_count: int) -> None:
+        print("Building the transaction history index...")
+        senders: npt.NDArray[np.generic] = (
+            store.get_column("senders")[:row_count])
+        receivers: npt.NDArray[np.generic] = (
+            store.get_column("receivers")[:row_count])
+        all_rows: npt.NDArray[np.int64] = np.arange(row_count, dtype=np.int64)
+        # A transaction to oneself is listed once
+        to_others: npt.NDArray[np.bool_] = receivers != senders
+        user_ids: npt.NDArray[np.int64] = np.concatenate(
+            (senders, receivers[to_others])).astype(np.int64)
+        rows: npt.NDArray[np.int64] = np.concatenate(
+            (all_rows, all_rows[to_others]))
+        # Grouped by user, and in order within each user
+        order: npt.NDArray[np.intp] = np.lexsort((rows, user_ids))
+        self.rows = rows[order]
+        self.offsets = np.zeros(len(users) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(user_ids, minlength=len(users)),
+                  out=self.offsets[1:])
+        self.recent_rows = {}
+        self.recent_row_count = 0
+        self.users = users
+        self.row_count = row_count
+        print(f"Transaction history index built ({row_count} transactions).")
+    # endregion
+
+    # region Read
+    def get_user_rows(self,
+                      user_id: int,
+                      before: int | None = None,
+                      limit: int = 50) -> npt.NDArray[np.int64]:
+        """
+        Gets the rows of a user's transactions, newest first.
+
+        Args:
+            user_id (int): The user ID in the store.
+            before (int | None, optional): Only get rows before this row.
+                Default is None, which starts from the newest row.
+            limit (int, optional): The most rows to get. Default is 50.
+
+        Returns:
+            npt.NDArray[np.int64]: The rows.
+        """
+        with self.lock:
+            stop: int = self.row_count if before is None else min(
+                before, self.row_count)
+            recent_rows: List[int] = self.recent_rows.get(user_id, [])
+            # The recent rows come after every row in the arrays
+            recent_stop: int = bisect.bisect_left(recent_rows, stop)
+            newest_rows: List[int] = (
+                recent_rows[max(recent_stop - limit, 0):recent_stop])
+            older_limit: int = limit - len(newest_rows)
+            older_rows: npt.NDArray[np.int64] = np.zeros(0, dtype=np.int64)
+            if older_limit > 0 and user_id + 1 < len(self.offsets):
+                user_rows: npt.NDArray[np.int64] = self.rows[
+                    self.offsets[user_id]:self.offsets[user_id + 1]]
+                older_stop: int = int(np.searchsorted(user_rows, stop))
+                older_rows = user_rows[
+                    max(older_stop - older_limit, 0):older_stop]
+            return np.concatenate(
+                (older_rows, np.array(newest_rows, dtype=np.int64)))[::-1]
+    # endregion
+# endregion
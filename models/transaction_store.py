@@ -0,0 +1,363 @@
+# region Imports
+# Standard library
+import os
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Third party
+import numpy as np
+import numpy.typing as npt
+# endregion
+
+# region Transaction store class
+
+
+class TransactionStore:
+    """
+    Columnar copy of the transactions on the chain, for queries over many
+    transactions at once.
+
+    Each column is a file of fixed-width values that is memory-mapped for
+    reading. Senders and receivers are stored as int32 IDs, which index into
+    a dictionary file with one user per line, and methods as small codes
+    into a dictionary file with one method per line. Amounts that do not
+    fit in the amounts column, which older versions allowed as huge
+    transactions, are stored as 0 there and kept exactly in a separate file
+    of row and amount pairs.
+
+    The store is derived from the chain: it records how many blocks it
+    covers and the hash of the last one, so that it can be brought up to
+    date, or rebuilt, from the blockchain file.
+    """
+    COLUMN_TYPES: Dict[str, npt.DTypeLike] = {
+        "timestamps": np.float64,
+        "senders": np.int32,
+        "receivers": np.int32,
+        "amounts": np.int64,
+        "methods": np.uint16,
+    }
+    MIN_AMOUNT: int = int(np.iinfo(np.int64).min)
+    MAX_AMOUNT: int = int(np.iinfo(np.int64).max)
+
+    def __init__(self, directory: Path) -> None:
+        self.directory: Path = directory
+        self.metadata_path: Path = directory / "metadata.json"
+        self.users_path: Path = directory / "users.txt"
+        self.methods_path: Path = directory / "methods.txt"
+        self.large_amounts_path: Path = directory / "large_amounts.txt"
+        self.users: List[str] = []
+        self.user_ids: Dict[str, int] = {}
+        self.methods: List[str] = []
+        self.method_codes: Dict[str, int] = {}
+        # Amounts that do not fit in the amounts column, by row
+        self.large_amounts: Dict[int, int] = {}
+        self.row_count: int = 0
+        # The blocks covered by the store
+        self.chain_length: int = 0
+        self.last_block_hash: str | None = None
+        # Memory-mapped columns, replaced when rows are added
+        self.columns: Dict[str, npt.NDArray[np.generic]] = {}
+        # The user list, the row count and the balances by user ID as of the
+        # last get_balances call, published in one assignment. The balances
+        # are Python integers in an object array once the store has large
+        # amounts.
+        self.balances: Tuple[List[str], int, npt.NDArray[Any]] = (
+            self.users, 0, np.zeros(0, dtype=np.int64))
+        self.load()
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    # region Load
+    def load(self) -> None:
+        """
+        Loads the dictionaries and the metadata. Rows and dictionary
+        entries written after the metadata was last saved are cut off.
+        """
+        self.users = []
+        self.user_ids = {}
+        self.methods = []
+        self.method_codes = {}
+        self.large_amounts = {}
+        self.row_count = 0
+        self.chain_length = 0
+        self.last_block_hash = None
+        self.columns = {}
+        paths: List[Path] = [self.metadata_path, self.users_path,
+                             self.methods_path] + [
+            self.get_column_path(name) for name in self.COLUMN_TYPES]
+        if not all(os.path.exists(path) for path in paths):
+            self.clear()
+            return
+        with open(self.metadata_path, "r") as file:
+            metadata: Dict[str, int | str | None] = json.load(file)
+        self.row_count = int(metadata["row_count"] or 0)
+        self.chain_length = int(metadata["chain_length"] or 0)
+        last_block_hash: int | str | None = metadata["last_block_hash"]
+        self.last_block_hash = (
+            str(last_block_hash) if last_block_hash is not None else None)
+        self.users = self.read_dictionary(
+            self.users_path, int(metadata["user_count"] or 0))
+        self.user_ids = {user: user_id
+                         for user_id, user in enumerate(self.users)}
+        self.methods = self.read_dictionary(
+            self.methods_path, int(metadata["method_count"] or 0))
+        self.method_codes = {method: code
+                             for code, method in enumerate(self.methods)}
+        self.large_amounts = self.read_large_amounts()
+        for name, column_type in self.COLUMN_TYPES.items():
+            path: Path = self.get_column_path(name)
+            size: int = self.row_count * np.dtype(column_type).itemsize
+            if os.path.getsize(path) != size:
+                with open(path, "r+b") as file:
+                    file.truncate(size)
+
+    def read_dictionary(self, path: Path, count: int) -> List[str]:
+        with open(path, "r", encoding="utf-8") as file:
+            entries: List[str] = file.read().splitlines()[:count]
+        # Cut off entries added after the metadata was saved
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("".join(entry + "\n" for entry in entries))
+        return entries
+
+    def read_large_amounts(self) -> Dict[int, int]:
+        # Stores written before large amounts were kept have no file
+        if not os.path.exists(self.large_amounts_path):
+            open(self.large_amounts_path, "wb").close()
+        large_amounts: Dict[int, int] = {}
+        with open(self.large_amounts_path, "r", encoding="utf-8") as file:
+            for line in file.read().splitlines():
+                row: str
+                amount: str
+                row, amount = line.split("\t")
+                # Cut off rows added after the metadata was saved
+                if int(row) < self.row_count:
+                    large_amounts[int(row)] = int(amount)
+        with open(self.large_amounts_path, "w", encoding="utf-8") as file:
+            file.write("".join(f"{row}\t{amount}\n"
+                               for row, amount in large_amounts.items()))
+        return large_amounts
+
+    def clear(self) -> None:
+        """
+        Removes every row and dictionary entry.
+        """
+        self.columns = {}
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+        os.makedirs(self.directory)
+        for path in [self.users_path, self.methods_path,
+                     self.large_amounts_path] + [
+                self.get_column_path(name) for name in self.COLUMN_TYPES]:
+            open(path, "wb").close()
+        self.users = []
+        self.user_ids = {}
+        self.methods = []
+        self.method_codes = {}
+        self.large_amounts = {}
+        self.row_count = 0
+        self.chain_length = 0
+        self.last_block_hash = None
+        self.save_metadata()
+
+    def get_column_path(self, name: str) -> Path:
+        return self.directory / f"{name}.bin"
+    # endregion
+
+    # region Write
+    def append(self,
+               transactions: List[Tuple[float, str, str, int, str]],
+               chain_length: int,
+               last_block_hash: str | None) -> None:
+        """
+        Appends the transactions of blocks appended to the chain.
+
+        Args:
+            transactions (List[Tuple[float, str, str, int, str]]): The
+                timestamp, sender, receiver, amount and method of each
+                transaction.
+            chain_length (int): The length of the chain including the
+                blocks.
+            last_block_hash (str | None): The hash of the last block.
+        """
+        new_users: List[str] = []
+        new_methods: List[str] = []
+        senders: List[int] = []
+        receivers: List[int] = []
+        amounts: List[int] = []
+        methods: List[int] = []
+        new_large_amounts: Dict[int, int] = {}
+        for row, (_, sender, receiver, amount, method) in enumerate(
+                transactions, self.row_count):
+            for user in (sender, receiver):
+                if user not in self.user_ids:
+                    self.user_ids[user] = len(self.users)
+                    self.users.append(user)
+                    new_users.append(user)
+            if method not in self.method_codes:
+                self.method_codes[method] = len(self.methods)
+                self.methods.append(method)
+                new_methods.append(method)
+            senders.append(self.user_ids[sender])
+            receivers.append(self.user_ids[receiver])
+            if self.MIN_AMOUNT <= amount <= self.MAX_AMOUNT:
+                amounts.append(amount)
+            else:
+                amounts.append(0)
+                new_large_amounts[row] = amount
+            methods.append(self.method_codes[method])
+        column_values: Dict[str, npt.NDArray[np.generic]] = {
+            "timestamps": np.array(
+                [transaction[0] for transaction in transactions],
+                dtype=self.COLUMN_TYPES["timestamps"]),
+            "senders": np.array(
+                senders, dtype=self.COLUMN_TYPES["senders"]),
+            "receivers": np.array(
+                receivers, dtype=self.COLUMN_TYPES["receivers"]),
+            "amounts": np.array(
+                amounts, dtype=self.COLUMN_TYPES["amounts"]),
+            "methods": np.array(
+                methods, dtype=self.COLUMN_TYPES["methods"]),
+        }
+        # The dictionaries and the columns are written before the metadata,
+        # so that anything written without the metadata is ignored
+        for path, entries in ((self.users_path, new_users),
+                              (self.methods_path, new_methods)):
+            if entries:
+                with open(path, "a", encoding="utf-8") as file:
+                    file.write("".join(entry + "\n" for entry in entries))
+        if new_large_amounts:
+            print(f"Amounts that do not fit in 64 bits: "
+                  f"{len(new_large_amounts)}. They are stored separately.")
+            with open(self.large_amounts_path, "a", encoding="utf-8") as file:
+                file.write("".join(
+                    f"{row}\t{amount}\n"
+                    for row, amount in new_large_amounts.items()))
+            # Replaced rather than updated, for readers iterating over it
+            self.large_amounts = {**self.large_amounts, **new_large_amounts}
+        if transactions:
+            for name, values in column_values.items():
+                with open(self.get_column_path(name), "ab") as file:
+                    file.write(values.tobytes())
+        self.row_count += len(transactions)
+        self.chain_length = chain_length
+        self.last_block_hash = last_block_hash
+        self.save_metadata()
+
+    def save_metadata(self) -> None:
+        metadata: Dict[str, int | str | None] = {
+            "row_count": self.row_count,
+            "user_count": len(self.users),
+            "method_count": len(self.methods),
+            "chain_length": self.chain_length,
+            "last_block_hash": self.last_block_hash,
+        }
+        temporary_path: Path = self.metadata_path.with_suffix(".tmp")
+        with open(temporary_path, "w") as file:
+            json.dump(metadata, file)
+        # Replace the old metadata in one step
+        os.replace(temporary_path, self.metadata_path)
+    # endregion
+
+    # region Read
+    def get_column(self, name: str) -> npt.NDArray[np.generic]:
+        """
+        Gets a column as a read-only memory-mapped array of `len(self)`
+        values.
+        """
+        row_count: int = self.row_count
+        column: npt.NDArray[np.generic] | None = self.columns.get(name)
+        if column is not None and len(column) == row_count:
+            return column
+        column_type: npt.DTypeLike = self.COLUMN_TYPES[name]
+        if row_count == 0:
+            # Empty files cannot be memory-mapped
+            column = np.empty(0, dtype=column_type)
+        else:
+            column = np.memmap(self.get_column_path(name),
+                               dtype=column_type,
+                               mode="r",
+                               shape=(row_count,))
+        self.columns[name] = column
+        return column
+
+    def get_amounts(self, rows: npt.NDArray[np.int64]) -> List[int]:
+        """
+        Gets the exact amounts of rows, including amounts that do not fit in
+        the amounts column.
+        """
+        amounts: List[int] = self.get_column("amounts")[rows].tolist()
+        large_amounts: Dict[int, int] = self.large_amounts
+        if not large_amounts:
+            return amounts
+        return [large_amounts.get(row, amount)
+                for row, amount in zip(rows.tolist(), amounts)]
+
+    def get_user_id(self, user: str) -> int | None:
+        return self.user_ids.get(user)
+
+    def get_balances(
+            self,
+            undeducted_methods: Tuple[str, ...]) -> npt.NDArray[Any]:
+        """
+        Gets the balance of every user, indexed by user ID. Only the rows
+        added since the last call are summed; the rest is reused.
+
+        Args:
+            undeducted_methods (Tuple[str, ...]): Methods whose sends are
+                not deducted from the sender's balance.
+
+        Returns:
+            npt.NDArray[Any]: The balances, as int64 values, or as Python
+                integers once the store has amounts that do not fit in 64
+                bits. Users the store does not know of yet when the call
+                starts are not included.
+        """
+        # Rows are counted before users, so every user in them is included
+        users: List[str] = self.users
+        row_count: int = self.row_count
+        user_count: int = len(users)
+        cached_users: List[str]
+        start: int
+        balances: npt.NDArray[Any]
+        cached_users, start, balances = self.balances
+        if cached_users is not users or start > row_count:
+            # The store has been loaded again or cleared since
+            start = 0
+            balances = np.zeros(0, dtype=np.int64)
+        if start == row_count and len(balances) == user_count:
+            return balances
+        balances = np.concatenate(
+            (balances,
+             np.zeros(user_count - len(balances), dtype=balances.dtype)))
+        senders: npt.NDArray[np.generic] = (
+            self.get_column("senders")[start:row_count])
+        receivers: npt.NDArray[np.generic] = (
+            self.get_column("receivers")[start:row_count])
+        amounts: npt.NDArray[np.generic] = (
+            self.get_column("amounts")[start:row_count])
+        large_amounts: Dict[int, int] = self.large_amounts
+        large_rows: List[int] = [row for row in large_amounts
+                                 if start <= row < row_count]
+        if large_rows or balances.dtype == object:
+            # Summed as Python integers, which cannot overflow
+            balances = balances.astype(object)
+            amounts = amounts.astype(object)
+            for row in large_rows:
+                amounts[row - start] = large_amounts[row]
+        methods: npt.NDArray[np.generic] = (
+            self.get_column("methods")[start:row_count])
+        undeducted_codes: List[int] = [
+            self.method_codes[method] for method in undeducted_methods
+            if method in self.method_codes]
+        deducted: npt.NDArray[np.bool_] = ~np.isin(methods, undeducted_codes)
+        # Unbuffered, so that a user who appears more than once in the
+        # rows gets every amount
+        np.add.at(balances, receivers, amounts)
+        np.subtract.at(balances, senders[deducted], amounts[deducted])
+        self.balances = (users, row_count, balances)
+        return balances
+    # endregion
+# endregion
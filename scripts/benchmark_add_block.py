@@ -0,0 +1,119 @@
+# Benchmarks the CPU time one /add_block request spends in the blockchain:
+# the way the request used to be handled (data validated item by item, the
+# last block read back and parsed again, and the block validated again to
+# serialize it) against the current pipeline, which validates the data once
+# and gets the serialized block back from add_block.
+#
+# Run from the directory the blockchain is normally started from, e.g.
+#   python sponsorblockchain/scripts/benchmark_add_block.py 1000
+# The blocks are added to a temporary blockchain.
+
+# region Imports
+# Standard library
+import os
+import sys
+import time
+import tempfile
+import contextlib
+from io import StringIO
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# Make the sponsorblockchain package (and the application it is part of)
+# importable, and keep the module-level blockchain out of the real data
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.chdir(tempfile.mkdtemp())
+
+# Local
+from sponsorblockchain.models.block import Block  # noqa: E402
+from sponsorblockchain.models.blockchain import Blockchain  # noqa: E402
+from sponsorblockchain.sponsorblockchain_types import (  # noqa: E402
+    BlockData, BlockModel, Transaction)
+# endregion
+
+# region Benchmark
+
+
+def make_request_data(index: int,
+                      transaction_count: int) -> List[Dict[str, Any]]:
+    # What the JSON body of a request is parsed into
+    return [{"transaction": {"sender": f"{index:064x}",
+                             "receiver": f"{index + position + 1:064x}",
+                             "amount": position + 1,
+                             "method": "slot_machine"}}
+            for position in range(transaction_count)]
+
+
+def parse_items(data: List[Any]) -> BlockData:
+    # How parse_block_data used to validate each transaction
+    data_parsed: BlockData = []
+    for item in data:
+        if isinstance(item, str):
+            data_parsed.append(item)
+            continue
+        transaction: Any = item["transaction"]
+        if isinstance(transaction, Transaction):
+            print("Transaction is already a Transaction object.")
+            data_parsed.append({"transaction": transaction})
+        else:
+            print("Found transaction as a dictionary.")
+            data_parsed.append(
+                {"transaction": Transaction.model_validate(transaction)})
+    return data_parsed
+
+
+def handle_request_before(blockchain: Blockchain,
+                          data: List[Dict[str, Any]]) -> str:
+    data_parsed: BlockData = parse_items(data)
+    new_block: Block = blockchain.add_block(data=data_parsed)[0]
+    # The last block read back from the blockchain file
+    last_block_json: str | None = blockchain.get_last_block_json()
+    assert last_block_json is not None
+    last_block_model: BlockModel = BlockModel.model_validate_json(
+        last_block_json)
+    parse_items(last_block_model.data)
+    return BlockModel(index=new_block.index,
+                      timestamp=new_block.timestamp,
+                      data=new_block.data,
+                      previous_block_hash=new_block.previous_block_hash,
+                      nonce=new_block.nonce,
+                      block_hash=new_block.block_hash).model_dump_json()
+
+
+def handle_request_after(blockchain: Blockchain,
+                         data: List[Dict[str, Any]]) -> str:
+    data_parsed: BlockData = blockchain.parse_block_data(data)
+    return blockchain.add_block(data=data_parsed)[1]
+
+
+def benchmark(request_count: int, transaction_count: int) -> None:
+    handlers: List[Tuple[str, Callable[[Blockchain, List[Dict[str, Any]]],
+                                       str]]] = [
+        ("Before", handle_request_before),
+        ("After", handle_request_after)]
+    for label, handler in handlers:
+        directory = Path(tempfile.mkdtemp())
+        with contextlib.redirect_stdout(StringIO()):
+            blockchain = Blockchain(
+                blockchain_path=str(directory / "blockchain.json"),
+                transactions_path=str(directory / "transactions.tsv"))
+            requests: List[List[Dict[str, Any]]] = [
+                make_request_data(index, transaction_count)
+                for index in range(request_count)]
+            start: float = time.process_time()
+            for data in requests:
+                handler(blockchain, data)
+            elapsed: float = time.process_time() - start
+            blockchain.close()
+        print(f"{label}, {transaction_count} transactions per block: "
+              f"{elapsed / request_count * 1_000_000:,.0f} µs CPU per "
+              f"request")
+# endregion
+
+
+if __name__ == "__main__":
+    count: int = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    for transactions_per_block in (1, 10, 100):
+        benchmark(request_count=count,
+                  transaction_count=transactions_per_block)
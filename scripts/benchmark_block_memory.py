@@ -0,0 +1,89 @@
+# Benchmarks the memory it takes to hold a range of blocks: as Block objects
+# with Transaction models in their data, the way get_blocks loads them, and
+# as BlockRecord tuples, the way the scans over the chain read them.
+#
+# Run from the directory the blockchain is normally started from, e.g.
+#   python sponsorblockchain/scripts/benchmark_block_memory.py 1000000
+# The blocks are added to a temporary blockchain first.
+
+# region Imports
+# Standard library
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import contextlib
+from io import StringIO
+from pathlib import Path
+from typing import Any, Callable, List
+
+# Make the sponsorblockchain package (and the application it is part of)
+# importable, and keep the module-level blockchain out of the real data
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.chdir(tempfile.mkdtemp())
+
+# Local
+from sponsorblockchain.models.blockchain import Blockchain  # noqa: E402
+from sponsorblockchain.sponsorblockchain_types import (  # noqa: E402
+    BlockData, Transaction)
+# endregion
+
+# region Benchmark
+
+
+def create_blockchain(block_count: int,
+                      batch_size: int = 10_000) -> Blockchain:
+    directory = Path(tempfile.mkdtemp())
+    with contextlib.redirect_stdout(StringIO()):
+        blockchain = Blockchain(
+            blockchain_path=str(directory / "blockchain.json"),
+            transactions_path=str(directory / "transactions.tsv"))
+        for batch_start in range(0, block_count, batch_size):
+            data_list: List[BlockData] = [
+                [{"transaction": Transaction(sender=f"{index:064x}",
+                                             receiver=f"{index + 1:064x}",
+                                             amount=index + 1,
+                                             method="slot_machine")}]
+                for index in range(batch_start,
+                                   min(batch_start + batch_size,
+                                       block_count))]
+            blockchain.add_blocks(data_list)
+    return blockchain
+
+
+def measure(label: str, block_count: int, load: Callable[[], Any]) -> None:
+    # Timed without tracing, which slows down every allocation
+    start: float = time.perf_counter()
+    blocks: Any = load()
+    elapsed: float = time.perf_counter() - start
+    del blocks
+    tracemalloc.start()
+    blocks = load()
+    size: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del blocks
+    print(f"{label}: {size / 1024 ** 2:,.0f} MiB, "
+          f"{size / block_count:,.0f} bytes per block, "
+          f"loaded in {elapsed:.1f} s")
+
+
+def benchmark(block_count: int) -> None:
+    print(f"Adding {block_count:,} blocks...")
+    blockchain: Blockchain = create_blockchain(block_count)
+    # The genesis block is loaded too
+    chain_length: int = blockchain.get_chain_length()
+    measure("Block", chain_length,
+            lambda: [blockchain.load_block(line.decode())
+                     for line in blockchain.iter_block_lines(
+                         0, chain_length)])
+    measure("BlockRecord", chain_length,
+            lambda: [block.to_record()
+                     for block in blockchain.iter_blocks()])
+    blockchain.close()
+# endregion
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,85 @@
+# Benchmarks serial and parallel full-chain validation on generated chains.
+#
+# Run from the directory the blockchain is normally started from, e.g.
+#   python sponsorblockchain/scripts/benchmark_chain_validation.py 100000
+# The chains are generated in a temporary directory.
+
+# region Imports
+# Standard library
+import os
+import sys
+import time
+import tempfile
+import contextlib
+from io import StringIO
+from pathlib import Path
+from typing import List
+
+# Make the sponsorblockchain package (and the application it is part of)
+# importable, and keep the module-level blockchain out of the real data
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.chdir(tempfile.mkdtemp())
+
+# Local
+from sponsorblockchain.models.block import Block  # noqa: E402
+from sponsorblockchain.sponsorblockchain_types import (  # noqa: E402
+    BlockModel, Transaction)
+from sponsorblockchain.models.blockchain import Blockchain  # noqa: E402
+# endregion
+
+# region Benchmark
+
+
+def generate_chain(path: Path, block_count: int) -> None:
+    """
+    Writes a valid chain of `block_count` blocks with one transaction each.
+    """
+    previous_block_hash: str = "0"
+    with open(path, "w") as file:
+        for index in range(block_count):
+            transaction = Transaction(sender=f"{index % 1000:064x}",
+                                      receiver=f"{index % 997:064x}",
+                                      amount=index % 100 + 1,
+                                      method="slot_machine")
+            block = Block(index=index,
+                          data=[{"transaction": transaction}],
+                          previous_block_hash=previous_block_hash)
+            block_model = BlockModel(
+                index=block.index,
+                timestamp=block.timestamp,
+                data=block.data,
+                previous_block_hash=block.previous_block_hash,
+                nonce=block.nonce,
+                block_hash=block.block_hash)
+            file.write(block_model.model_dump_json() + "\n")
+            previous_block_hash = block.block_hash
+
+
+def benchmark(block_count: int) -> None:
+    directory = Path(tempfile.mkdtemp())
+    blockchain_path: Path = directory / "blockchain.json"
+    print(f"Generating {block_count} blocks...")
+    generate_chain(blockchain_path, block_count)
+    with contextlib.redirect_stdout(StringIO()):
+        blockchain = Blockchain(
+            blockchain_path=str(blockchain_path),
+            transactions_path=str(directory / "transactions.tsv"))
+    for parallel in (False, True):
+        start: float = time.perf_counter()
+        with contextlib.redirect_stdout(StringIO()):
+            is_valid: bool = blockchain.is_chain_valid(full=True,
+                                                       parallel=parallel)
+        elapsed: float = time.perf_counter() - start
+        mode: str = "parallel" if parallel else "serial"
+        print(f"{block_count} blocks, {mode}: {elapsed:.2f} s "
+              f"(valid: {is_valid})")
+# endregion
+
+
+if __name__ == "__main__":
+    block_counts: List[int] = (
+        [int(argument) for argument in sys.argv[1:]] or [100_000, 1_000_000])
+    print(f"CPUs: {os.cpu_count()}")
+    for block_count in block_counts:
+        benchmark(block_count)
@@ -0,0 +1,110 @@
+# Benchmarks proof-of-work mining: hashes per second of the old
+# rebuild-everything loop, of the midstate search in one process and of the
+# process pool, and how long blocks take to mine at a given difficulty.
+#
+# Run from the directory the blockchain is normally started from, e.g.
+#   python sponsorblockchain/scripts/benchmark_mining.py 5
+# Nothing is written to the blockchain.
+
+# region Imports
+# Standard library
+import os
+import sys
+import time
+import hashlib
+import tempfile
+import concurrent.futures
+from pathlib import Path
+from typing import List
+
+# Make the sponsorblockchain package (and the application it is part of)
+# importable, and keep the module-level blockchain out of the real data
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.chdir(tempfile.mkdtemp())
+
+# Local
+from sponsorblockchain.models.block import Block  # noqa: E402
+from sponsorblockchain.models.miner import (  # noqa: E402
+    Miner, search_nonces)
+from sponsorblockchain.sponsorblockchain_types import (  # noqa: E402
+    Transaction)
+# endregion
+
+# region Benchmark
+# More leading zeros than a hash can have, so that no nonce is found
+IMPOSSIBLE_DIFFICULTY: int = 65
+
+
+def make_block(index: int) -> Block:
+    transaction = Transaction(sender=f"{index:064x}",
+                              receiver=f"{index + 1:064x}",
+                              amount=index + 1,
+                              method="slot_machine")
+    return Block(index=index,
+                 data=[{"transaction": transaction}],
+                 previous_block_hash=f"{index:064x}")
+
+
+def benchmark_hash_rates(nonce_count: int, processes: int) -> None:
+    block: Block = make_block(0)
+    # The loop Block.mine_block used to run
+    start: float = time.perf_counter()
+    for nonce in range(nonce_count):
+        block_contents: str = (f"{block.index}{block.timestamp}{block.data}"
+                               f"{block.previous_block_hash}{nonce}")
+        hashlib.sha256(block_contents.encode()).hexdigest().startswith(
+            "0" * IMPOSSIBLE_DIFFICULTY)
+    elapsed: float = time.perf_counter() - start
+    print(f"Rebuilt string, 1 process: {nonce_count / elapsed:,.0f} H/s")
+    prefix: bytes = block.get_hash_prefix()
+    start = time.perf_counter()
+    search_nonces(prefix, IMPOSSIBLE_DIFFICULTY, 0, nonce_count)
+    elapsed = time.perf_counter() - start
+    print(f"Midstate, 1 process: {nonce_count / elapsed:,.0f} H/s")
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes) as executor:
+        # Start the workers before timing
+        list(executor.map(search_nonces, [prefix] * processes,
+                          [IMPOSSIBLE_DIFFICULTY] * processes,
+                          [0] * processes, [1] * processes))
+        start = time.perf_counter()
+        list(executor.map(
+            search_nonces,
+            [prefix] * processes,
+            [IMPOSSIBLE_DIFFICULTY] * processes,
+            [worker * nonce_count for worker in range(processes)],
+            [(worker + 1) * nonce_count for worker in range(processes)]))
+        elapsed = time.perf_counter() - start
+    print(f"Midstate, {processes} processes: "
+          f"{nonce_count * processes / elapsed:,.0f} H/s")
+
+
+def benchmark_mining(difficulty: int, block_count: int,
+                     processes: int) -> None:
+    miner = Miner(processes=processes)
+    try:
+        for label, block_miner in (("1 process", None),
+                                   (f"{processes} processes", miner)):
+            start: float = time.perf_counter()
+            for index in range(block_count):
+                block: Block = make_block(index)
+                block.mine_block(difficulty, block_miner)
+                assert block.block_hash == block.calculate_hash()
+            elapsed: float = time.perf_counter() - start
+            print(f"Difficulty {difficulty}, {label}: "
+                  f"{elapsed / block_count:.2f} s per block")
+    finally:
+        miner.close()
+# endregion
+
+
+if __name__ == "__main__":
+    difficulties: List[int] = (
+        [int(argument) for argument in sys.argv[1:]] or [5])
+    process_count: int = os.cpu_count() or 1
+    print(f"CPUs: {process_count}")
+    benchmark_hash_rates(nonce_count=500_000, processes=process_count)
+    for mining_difficulty in difficulties:
+        benchmark_mining(mining_difficulty, block_count=5,
+                         processes=process_count)
@@ -0,0 +1,138 @@
+# Checks that transactions with amounts that do not fit in 64 bits, which
+# older versions allowed as huge transactions, are still loaded and summed
+# exactly, and that a blockchain with them still starts.
+#
+# Run from the directory the blockchain is normally started from, e.g.
+#   python sponsorblockchain/scripts/check_large_amounts.py
+# Everything is written to temporary files.
+
+# region Imports
+# Standard library
+import os
+import sys
+import shutil
+import tempfile
+import contextlib
+from io import StringIO
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# Make the sponsorblockchain package (and the application it is part of)
+# importable, and keep the module-level blockchain out of the real data
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.chdir(tempfile.mkdtemp())
+
+# Third party
+import numpy as np  # noqa: E402
+
+# Local
+from sponsorblockchain.models.block import Block  # noqa: E402
+from sponsorblockchain.models.blockchain import Blockchain  # noqa: E402
+from sponsorblockchain.models.ledger import Ledger  # noqa: E402
+from sponsorblockchain.models.transaction_store import (  # noqa: E402
+    TransactionStore)
+from sponsorblockchain.sponsorblockchain_types import (  # noqa: E402
+    Transaction)
+# endregion
+
+# region Checks
+HUGE_AMOUNT: int = 10**20
+
+
+def write_transactions_file(path: Path,
+                            rows: List[Tuple[str, str, int, str]]) -> None:
+    with open(path, "w") as file:
+        file.write("Time\tSender\tReceiver\tAmount\tMethod\n")
+        for sender, receiver, amount, method in rows:
+            file.write(f"1.5\t{sender}\t{receiver}\t{amount}\t{method}\n")
+
+
+def check_ledger() -> bool:
+    path: Path = Path(tempfile.mkdtemp()) / "transactions.tsv"
+    write_transactions_file(path, [("a", "b", 5, "slot_machine"),
+                                   ("a", "b", HUGE_AMOUNT, "slot_machine"),
+                                   ("b", "c", 2, "reaction")])
+    ledger = Ledger(path)
+    with contextlib.redirect_stdout(StringIO()):
+        ledger.load()
+    return (ledger.get_balance("a") == -(HUGE_AMOUNT + 5) and
+            ledger.get_balance("b") == HUGE_AMOUNT + 5 and
+            ledger.get_balance("c") == 2 and
+            ledger.transaction_count == 3)
+
+
+def check_transaction_store() -> bool:
+    directory: Path = Path(tempfile.mkdtemp()) / "store"
+    store = TransactionStore(directory)
+    with contextlib.redirect_stdout(StringIO()):
+        store.append([(1.5, "a", "b", 5, "slot_machine"),
+                      (1.5, "a", "b", HUGE_AMOUNT, "slot_machine")],
+                     chain_length=1, last_block_hash="0")
+        store.append([(1.5, "b", "c", -HUGE_AMOUNT, "reaction")],
+                     chain_length=2, last_block_hash="1")
+    # Loaded again, as on the next start
+    store = TransactionStore(directory)
+    balances: Dict[str, int] = dict(zip(
+        store.users, store.get_balances(("reaction",)).tolist()))
+    return (store.get_amounts(np.arange(3)) ==
+            [5, HUGE_AMOUNT, -HUGE_AMOUNT] and
+            balances == {"a": -(HUGE_AMOUNT + 5),
+                         "b": HUGE_AMOUNT + 5,
+                         "c": -HUGE_AMOUNT})
+
+
+def check_blockchain_start() -> bool:
+    directory: Path = Path(tempfile.mkdtemp())
+    blockchain_path: Path = directory / "blockchain.json"
+    transactions_path: Path = directory / "transactions.tsv"
+    with contextlib.redirect_stdout(StringIO()):
+        blockchain = Blockchain(blockchain_path=str(blockchain_path),
+                                transactions_path=str(transactions_path))
+        genesis_block: Block | None = blockchain.get_last_block()
+        blockchain.close()
+    if genesis_block is None:
+        return False
+    # A block written before huge transactions were capped. There is no
+    # transactions file (none was added through this blockchain) and no
+    # transaction store, so the store is built from the chain on start.
+    block = Block(index=1,
+                  data=[{"transaction": Transaction(
+                      sender="a", receiver="b", amount=HUGE_AMOUNT,
+                      method="slot_machine")}],
+                  previous_block_hash=genesis_block.block_hash)
+    with open(blockchain_path, "a") as file:
+        file.write(blockchain.serialize_block(block) + "\n")
+    shutil.rmtree(blockchain.transaction_store.directory)
+    try:
+        with contextlib.redirect_stdout(StringIO()):
+            blockchain = Blockchain(blockchain_path=str(blockchain_path),
+                                    transactions_path=str(transactions_path))
+            top_balances: List[Tuple[str, int]] = (
+                blockchain.get_top_balances(1))
+            balances: Dict[str, int | None] = blockchain.get_balances(
+                users=["a", "b"])
+            user_transactions: (
+                List[Tuple[int, float, str, str, int, str]] | None) = (
+                blockchain.get_user_transactions(user="b"))
+            blockchain.close()
+    except OverflowError:
+        return False
+    return (top_balances == [("b", HUGE_AMOUNT)] and
+            balances == {"a": -HUGE_AMOUNT, "b": HUGE_AMOUNT} and
+            user_transactions is not None and
+            user_transactions[0][4] == HUGE_AMOUNT)
+# endregion
+
+
+if __name__ == "__main__":
+    checks: List[Tuple[str, Callable[[], bool]]] = [
+        ("Ledger", check_ledger),
+        ("Transaction store", check_transaction_store),
+        ("Blockchain start", check_blockchain_start)]
+    all_passed: bool = True
+    for label, check in checks:
+        passed: bool = check()
+        print(f"{label}: {'passed' if passed else 'FAILED'}")
+        all_passed = all_passed and passed
+    sys.exit(0 if all_passed else 1)
@@ -0,0 +1,102 @@
+# Checks that migrate_blockchain writes version 1 blocks byte for byte in the
+# format they had before block versions were added, without "version" and
+# "merkle_root" fields.
+#
+# Run from the directory the blockchain is normally started from, e.g.
+#   python sponsorblockchain/scripts/check_migrate_blockchain.py
+# Everything is written to temporary files.
+
+# region Imports
+# Standard library
+import os
+import sys
+import json
+import tempfile
+import contextlib
+from io import StringIO
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Make the sponsorblockchain package (and the application it is part of)
+# importable, and keep the module-level blockchain out of the real data
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.chdir(tempfile.mkdtemp())
+
+# Local
+from sponsorblockchain.models.block import Block  # noqa: E402
+from sponsorblockchain.models.blockchain import Blockchain  # noqa: E402
+from sponsorblockchain.sponsorblockchain_types import (  # noqa: E402
+    Transaction)
+from sponsorblockchain.utils.migrate_blockchain import (  # noqa: E402
+    migrate_blockchain)
+# endregion
+
+# region Checks
+# Blocks as the legacy format stored them, with hashes from before the
+# Pydantic models
+LEGACY_BLOCKS: List[Dict[str, Any]] = [
+    {"index": 0, "timestamp": 1700000000.25, "data": ["Genesis"],
+     "previous_block_hash": "0", "nonce": 0, "block_hash": "a" * 64},
+    {"index": 1, "timestamp": 1700000001.5,
+     "data": [{"transaction": {"sender": "a", "receiver": "b",
+                               "amount": 5, "method": "slot_machine"}},
+              "note"],
+     "previous_block_hash": "a" * 64, "nonce": 0, "block_hash": "b" * 64},
+    {"index": 2, "timestamp": 1700000002.75, "data": ["ünïcode"],
+     "previous_block_hash": "b" * 64, "nonce": 0, "block_hash": "c" * 64}]
+
+
+def get_expected_lines() -> List[bytes]:
+    """
+    Gets the lines migrate_blockchain wrote before block versions were
+    added: compact JSON with only the legacy fields, in order.
+    """
+    lines: List[bytes] = []
+    # The first block is linked to its own old hash
+    previous_block_hash: str = LEGACY_BLOCKS[0]["block_hash"]
+    for legacy_block in LEGACY_BLOCKS:
+        data: List[Any] = [
+            {"transaction": Transaction(**item["transaction"])}
+            if isinstance(item, dict) else item
+            for item in legacy_block["data"]]
+        block = Block(index=legacy_block["index"],
+                      timestamp=legacy_block["timestamp"],
+                      data=data,
+                      previous_block_hash=previous_block_hash)
+        line: str = json.dumps(
+            {"index": block.index,
+             "timestamp": block.timestamp,
+             "data": legacy_block["data"],
+             "previous_block_hash": block.previous_block_hash,
+             "nonce": block.nonce,
+             "block_hash": block.block_hash},
+            separators=(",", ":"), ensure_ascii=False)
+        lines.append(line.encode() + b"\n")
+        previous_block_hash = block.block_hash
+    return lines
+
+
+def check_migration() -> bool:
+    directory: Path = Path(tempfile.mkdtemp())
+    blockchain_path: Path = directory / "blockchain.json"
+    with open(blockchain_path, "w", encoding="utf-8") as file:
+        file.write("".join(json.dumps(legacy_block) + "\n"
+                           for legacy_block in LEGACY_BLOCKS))
+    with contextlib.redirect_stdout(StringIO()):
+        blockchain = Blockchain(
+            blockchain_path=str(blockchain_path),
+            transactions_path=str(directory / "transactions.tsv"))
+        new_blockchain: Blockchain = migrate_blockchain(blockchain)
+        blockchain.close()
+        new_blockchain.close()
+    with open(blockchain_path, "rb") as file:
+        migrated_lines: List[bytes] = file.readlines()
+    return migrated_lines == get_expected_lines()
+# endregion
+
+
+if __name__ == "__main__":
+    passed: bool = check_migration()
+    print(f"Migration: {'passed' if passed else 'FAILED'}")
+    sys.exit(0 if passed else 1)
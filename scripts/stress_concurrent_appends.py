@@ -0,0 +1,107 @@
+# Adds blocks from many threads at once, the way Waitress handles requests,
+# and checks that the chain, the transactions file and the balances are
+# still consistent afterwards.
+#
+# Run from the directory the blockchain is normally started from, e.g.
+#   python sponsorblockchain/scripts/stress_concurrent_appends.py 5000 32
+# (number of blocks, number of threads). The chain is generated in a
+# temporary directory.
+
+# region Imports
+# Standard library
+import os
+import sys
+import time
+import random
+import tempfile
+import contextlib
+import concurrent.futures
+from io import StringIO
+from pathlib import Path
+from typing import Dict, List
+
+# Make the sponsorblockchain package (and the application it is part of)
+# importable, and keep the module-level blockchain out of the real data
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.chdir(tempfile.mkdtemp())
+
+# Local
+from sponsorblockchain.models.block import Block  # noqa: E402
+from sponsorblockchain.sponsorblockchain_types import (  # noqa: E402
+    Transaction)
+from sponsorblockchain.models.blockchain import Blockchain  # noqa: E402
+# endregion
+
+# region Stress test
+
+
+def stress(block_count: int, thread_count: int) -> bool:
+    directory = Path(tempfile.mkdtemp())
+    with contextlib.redirect_stdout(StringIO()):
+        blockchain = Blockchain(
+            blockchain_path=str(directory / "blockchain.json"),
+            transactions_path=str(directory / "transactions.tsv"))
+    users: List[str] = [f"{user:064x}" for user in range(50)]
+    expected_balances: Dict[str, int] = dict.fromkeys(users, 0)
+    submissions: List[Transaction] = []
+    for _ in range(block_count):
+        sender: str = random.choice(users)
+        receiver: str = random.choice(users)
+        amount: int = random.randint(1, 100)
+        submissions.append(Transaction(sender=sender,
+                                       receiver=receiver,
+                                       amount=amount,
+                                       method="slot_machine"))
+        expected_balances[sender] -= amount
+        expected_balances[receiver] += amount
+
+    def submit(transaction: Transaction) -> None:
+        blockchain.add_block(data=[{"transaction": transaction}])
+        # Readers run alongside the writers
+        blockchain.get_last_block()
+        blockchain.get_balance(user=transaction.receiver)
+
+    print(f"Adding {block_count} blocks from {thread_count} threads...")
+    start: float = time.perf_counter()
+    with contextlib.redirect_stdout(StringIO()):
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=thread_count) as executor:
+            for future in concurrent.futures.as_completed(
+                    executor.submit(submit, transaction)
+                    for transaction in submissions):
+                future.result()
+    elapsed: float = time.perf_counter() - start
+    print(f"Added in {elapsed:.2f} s "
+          f"({block_count / elapsed:.0f} blocks per second).")
+
+    with contextlib.redirect_stdout(StringIO()):
+        is_chain_valid: bool = blockchain.is_chain_valid(full=True)
+        _, is_transactions_file_valid = (
+            blockchain.is_transactions_file_valid())
+    # The genesis block comes first
+    chain_length: int = blockchain.get_chain_length()
+    last_block: Block | None = blockchain.get_last_block()
+    balances_match: bool = all(
+        (blockchain.get_balance(user=user) or 0) == balance
+        for user, balance in expected_balances.items())
+    print(f"Chain valid: {is_chain_valid}")
+    print(f"Transactions file valid: {is_transactions_file_valid}")
+    print(f"Chain length: {chain_length} (expected {block_count + 1})")
+    print(f"Last block index: "
+          f"{last_block.index if last_block else None}")
+    print(f"Balances match: {balances_match}")
+    return (is_chain_valid and is_transactions_file_valid and
+            chain_length == block_count + 1 and
+            last_block is not None and last_block.index == block_count and
+            balances_match)
+# endregion
+
+
+if __name__ == "__main__":
+    block_count: int = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    thread_count: int = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    if not stress(block_count, thread_count):
+        print("Stress test failed.")
+        sys.exit(1)
+    print("Stress test passed.")
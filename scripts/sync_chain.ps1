@@ -0,0 +1,79 @@
+try {
+    # https://www.powershellgallery.com/packages/Set-PsEnv
+    Import-Module Set-PsEnv
+    # https://www.powershellgallery.com/packages/InteractiveMenu
+    Import-Module InteractiveMenu
+    
+    Set-PsEnv
+
+    if (-not $Env:SERVER_URL_LOCAL) {
+        $message = "SERVER_URL_LOCAL is not set. " + `
+            "Set it with the the .env file and restart your console. " + `
+            "Make sure you are running this script from " + `
+            "this script's directory."
+        Write-Host $message
+        exit 1
+    } elseif (-not $Env:SERVER_URL_PRODUCTION) {
+        $message = "SERVER_URL_PRODUCTION is not set. " + `
+            "Add it to a file named `.env` in the script's directory " + `
+            "and restart your console. " + `
+            "Make sure you are running this script from " + `
+            "this script's directory."
+        Write-Host "SERVER_URL_PRODUCTION is not set. "
+    }
+    $answerItems = @(
+        Get-InteractiveChooseMenuOption `
+            -Value "$Env:SERVER_URL_LOCAL" `
+            -Label "$Env:SERVER_URL_LOCAL" `
+            -Info "Local server"
+        Get-InteractiveChooseMenuOption `
+            -Value "$Env:SERVER_URL_PRODUCTION" `
+            -Label "$Env:SERVER_URL_PRODUCTION" `
+            -Info "Production server"
+    )
+    $question = "Pick server"
+    $serverUrl = Get-InteractiveMenuChooseUserSelection -Question $question -Answers $answerItems
+    $chainPath = "blockchain_downloaded.json"
+    $lastLine = $null
+    if (Test-Path $chainPath) {
+        $lastLine = Get-Content $chainPath -Tail 1
+    }
+    if (-not $lastLine) {
+        Invoke-RestMethod -Uri "$serverUrl/download_chain" `
+            -Method 'Get' `
+            -OutFile $chainPath
+        Write-Host "Blockchain downloaded successfully."
+        exit 0
+    }
+    $lastBlockHash = ($lastLine | ConvertFrom-Json).block_hash
+    $newBlocksPath = "blockchain_downloaded_new_blocks.json"
+    try {
+        # Only the blocks after the last downloaded block are sent
+        Invoke-WebRequest -Uri "$serverUrl/get_blocks_since?hash=$lastBlockHash" `
+            -Method 'Get' `
+            -OutFile $newBlocksPath
+    } catch {
+        if ($_.Exception.Response.StatusCode -eq 404) {
+            $message = "The last downloaded block is not on the chain. " + `
+                "The whole blockchain will be downloaded."
+            Write-Host $message
+            Invoke-RestMethod -Uri "$serverUrl/download_chain" `
+                -Method 'Get' `
+                -OutFile $chainPath
+            Write-Host "Blockchain downloaded successfully."
+            exit 0
+        }
+        throw
+    }
+    $newBlocks = [System.IO.File]::ReadAllText(
+        (Resolve-Path $newBlocksPath))
+    [System.IO.File]::AppendAllText((Resolve-Path $chainPath), $newBlocks)
+    Remove-Item $newBlocksPath
+    $newBlockCount = ($newBlocks -split "`n" | Where-Object { $_ }).Count
+    Write-Host "Blockchain synced successfully ($newBlockCount new blocks)."
+} catch {
+    Write-Host "Failed to sync blockchain."
+    Write-Host $_
+} finally {
+    Read-Host "Press Enter to exit..."
+}
\ No newline at end of file
@@ -2,8 +2,11 @@
 # Standard Library
 import os
 import json
+import concurrent.futures
+from pathlib import Path
 from sys import exit as sys_exit
-from typing import Tuple, Dict, Any, Callable, TYPE_CHECKING
+from typing import (Tuple, Dict, List, Any, Callable, Generator, Iterable,
+                    TYPE_CHECKING, cast)
 
 # Third party
 import lazyimports
@@ -17,26 +20,44 @@ if __name__ == "__main__" or __package__ == "":
     # Running as a script or from the parent directory
     if TYPE_CHECKING:
         from models.block import Block
+        from models.mempool import Receipt
     with lazyimports.lazy_imports(
-            "sponsorblockchain_type_aliases:BlockData",
-            "sponsorblockchain_type_aliases:BlockModel",):
-        from sponsorblockchain.sponsorblockchain_types import (BlockData, BlockModel)
+            "sponsorblockchain_type_aliases:BlockData",):
+        from sponsorblockchain.sponsorblockchain_types import (BlockData)
     with lazyimports.lazy_imports(
             "models.blockchain:Blockchain"):
         from models.blockchain import Blockchain
+    with lazyimports.lazy_imports(
+            "models.chain_writer:FsyncPolicy"):
+        from models.chain_writer import FsyncPolicy
+    with lazyimports.lazy_imports(
+            "models.compressed_file_cache:CompressedFileCache"):
+        from models.compressed_file_cache import CompressedFileCache
+    with lazyimports.lazy_imports("models.mempool:Mempool"):
+        from models.mempool import Mempool
 else:
     # Running as a package
     if TYPE_CHECKING:
         from sponsorblockchain.models.block import Block
+        from sponsorblockchain.models.mempool import Receipt
     with lazyimports.lazy_imports(
             "sponsorblockchain.sponsorblockchain_type_aliases:BlockData",
-            "sponsorblockchain.sponsorblockchain_type_aliases:BlockDataLegacy",
-            "sponsorblockchain.sponsorblockchain_type_aliases:BlockModel"):
-        from sponsorblockchain.sponsorblockchain_types import (
-            BlockData, BlockModel)
+            "sponsorblockchain.sponsorblockchain_type_aliases:BlockDataLegacy"):
+        from sponsorblockchain.sponsorblockchain_types import BlockData
     with lazyimports.lazy_imports(
             "sponsorblockchain.models.blockchain:Blockchain"):
         from sponsorblockchain.models.blockchain import Blockchain
+    with lazyimports.lazy_imports(
+            "sponsorblockchain.models.chain_writer:FsyncPolicy"):
+        from sponsorblockchain.models.chain_writer import FsyncPolicy
+    with lazyimports.lazy_imports(
+            "sponsorblockchain.models.compressed_file_cache:"
+            "CompressedFileCache"):
+        from sponsorblockchain.models.compressed_file_cache import (
+            CompressedFileCache)
+    with lazyimports.lazy_imports(
+            "sponsorblockchain.models.mempool:Mempool"):
+        from sponsorblockchain.models.mempool import Mempool
     sponsorblockcasino_extension_register_routes_import: str = (
         "sponsorblockchain.extensions.sponsorblockcasino_extension:"
         "register_routes")
@@ -58,12 +79,137 @@ else:
     print("Will not register extension routes because "
           "the blockchain is not running as a package.")
 
-blockchain: Blockchain = Blockchain()
+# When appended blocks are flushed to disk: "always", "group" or "none"
+try:
+    fsync_policy: FsyncPolicy = FsyncPolicy(
+        os.getenv("BLOCKCHAIN_FSYNC_POLICY", "none").lower())
+except ValueError:
+    print("ERROR: BLOCKCHAIN_FSYNC_POLICY must be "
+          "\"always\", \"group\" or \"none\".")
+    sys_exit(1)
+fsync_interval_ms: int = int(os.getenv("BLOCKCHAIN_FSYNC_INTERVAL_MS", "50"))
+fsync_max_blocks: int = int(os.getenv("BLOCKCHAIN_FSYNC_MAX_BLOCKS", "100"))
+# The format of new blocks: 1, 2 for blocks with a Merkle root, or 3 for
+# blocks with a Merkle root and a header hashed as compact bytes
+block_version: int = int(os.getenv("BLOCKCHAIN_BLOCK_VERSION", "1"))
+# Processes for mining blocks with a high difficulty (0 for one per CPU)
+mining_processes: int = int(os.getenv("BLOCKCHAIN_MINING_PROCESSES", "0"))
+blockchain: Blockchain = Blockchain(fsync_policy=fsync_policy,
+                                    fsync_interval_ms=fsync_interval_ms,
+                                    fsync_max_blocks=fsync_max_blocks,
+                                    block_version=block_version,
+                                    mining_processes=mining_processes or None)
 # blockchain = migrate_blockchain(blockchain)
 # The send_file method does not work for me
 # without resolving the paths (Flask bug?)
 blockchain_path_resolved: str = str(blockchain.blockchain_path.resolve())
 transactions_path_resolved: str = str(blockchain.transactions_path.resolve())
+# Gzip-compressed copies of the files for /download_chain and
+# /download_transactions
+compressed_file_cache = CompressedFileCache(
+    blockchain.blockchain_path.resolve().parent / "download_cache")
+# With the mempool, /add_block queues its data and a background assembler
+# seals the data of many requests into one block
+mempool: "Mempool | None" = None
+if os.getenv("BLOCKCHAIN_MEMPOOL", "false").lower() == "true":
+    mempool = Mempool(
+        blockchain=blockchain,
+        max_transactions=int(
+            os.getenv("BLOCKCHAIN_MEMPOOL_MAX_TRANSACTIONS", "100")),
+        max_delay_ms=int(os.getenv("BLOCKCHAIN_MEMPOOL_MAX_DELAY_MS", "200")),
+        difficulty=int(os.getenv("BLOCKCHAIN_MEMPOOL_DIFFICULTY", "0")))
+# The longest time /add_block waits for its data to be sealed. After that,
+# the receipt is returned to be polled with /get_receipt.
+mempool_wait_timeout: float = float(
+    os.getenv("BLOCKCHAIN_MEMPOOL_WAIT_TIMEOUT", "30"))
+# endregion
+
+# region Response helpers
+
+
+def chain_json_chunks(
+        block_lines: Iterable[bytes],
+        length: int) -> Generator[bytes, None, None]:
+    """
+    Yields the JSON document returned by /get_chain piece by piece, with the
+    stored blocks spliced into it as they are.
+
+    Args:
+        block_lines (Iterable[bytes]): The blocks as stored in the
+            blockchain file.
+        length (int): The number of blocks in `block_lines`.
+    """
+    yield f'{{"length": {length}, "chain": ['.encode()
+    separator: bytes = b""
+    for line in block_lines:
+        yield separator + line
+        separator = b","
+    yield b"]}\n"
+
+
+def balances_json_chunks(
+        balance_batches: Iterable[List[Tuple[str, int]]]
+) -> Generator[bytes, None, None]:
+    """
+    Yields the JSON document returned by /get_balances for all users piece
+    by piece, one batch of users at a time.
+    """
+    yield b'{"balances": {'
+    separator: bytes = b""
+    for batch in balance_batches:
+        if not batch:
+            continue
+        yield separator + ", ".join(
+            f"{json.dumps(user)}: {balance}"
+            for user, balance in batch).encode()
+        separator = b", "
+    yield b"}}\n"
+
+
+def receipt_json(receipt: "Receipt") -> Dict[str, Any]:
+    """
+    Describes a mempool receipt for /add_block and /get_receipt.
+    """
+    receipt_dict: Dict[str, Any] = {"receipt": receipt.receipt_id,
+                                    "status": receipt.get_status()}
+    if receipt.get_status() == "sealed":
+        block: Block = receipt.block.result()
+        receipt_dict.update({"block_index": block.index,
+                             "block_hash": block.block_hash,
+                             "position": receipt.position})
+    elif receipt.get_status() == "failed":
+        receipt_dict["message"] = str(receipt.block.exception())
+    return receipt_dict
+
+
+def send_download(path: str) -> Response:
+    """
+    Sends a file as an attachment. The ETag changes whenever a block or a
+    transaction is added, so clients that send it back in If-None-Match get
+    a 304 response if nothing has changed. Ranges are supported so that an
+    interrupted download can be resumed, and the file is sent
+    gzip-compressed to clients that accept it.
+    """
+    etag: str = blockchain.get_etag()
+    response: Response
+    if request.accept_encodings["gzip"] > 0:
+        compressed_path: Path = compressed_file_cache.get(Path(path), etag)
+        response = send_file(
+            str(compressed_path),
+            as_attachment=True,
+            download_name=Path(path).name,
+            conditional=True,
+            # Each encoding has its own ETag, since the bytes differ
+            etag=f"{etag}-gzip")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = send_file(
+            path,
+            as_attachment=True,
+            conditional=True,
+            etag=etag)
+    response.vary.add("Accept-Encoding")
+    return response
 # endregion
 
 # region API Routes
@@ -113,68 +259,236 @@ def add_block() -> Tuple[Response, int]:
         return jsonify({"message": message}), 400
     allow_huge_transaction: Any = request.get_json().get(
         "allow_huge_transaction", False)
+    if mempool is not None:
+        # The data is sealed into a block with the data of other requests.
+        # Unless "wait" is false, the response waits for the block.
+        try:
+            receipt: Receipt = mempool.submit(
+                data=data_parsed,
+                allow_huge_transaction=allow_huge_transaction)
+        except ValueError as e:
+            message = f"The block could not be added: {e}"
+            print(message)
+            return jsonify({"message": message}), 400
+        except RuntimeError as e:
+            # The server is shutting down
+            message = f"The block could not be added: {e}"
+            print(message)
+            return jsonify({"message": message}), 503
+        if request_data.get("wait", True) is False:
+            message = "The data has been queued."
+            print(message)
+            return jsonify({"message": message,
+                            **receipt_json(receipt)}), 202
+        try:
+            sealed_block: Block = receipt.block.result(
+                timeout=mempool_wait_timeout)
+        except concurrent.futures.TimeoutError:
+            message = ("The data has been queued, but it has not been "
+                       "sealed yet.")
+            print(message)
+            return jsonify({"message": message,
+                            **receipt_json(receipt)}), 202
+        except Exception as e:
+            message = f"An error occurred while adding the block: {e}"
+            print(message)
+            return jsonify({"message": message}), 500
+        message = "Block added successfully."
+        print(message)
+        return jsonify({"message": message,
+                        "block": (receipt.block_json or
+                                  blockchain.serialize_block(sealed_block)),
+                        **receipt_json(receipt)}), 200
     try:
-        blockchain.add_block(data=data_parsed,
-                             allow_huge_transaction=allow_huge_transaction)
+        added: Tuple[Block, str] = blockchain.add_block(
+            data=data_parsed, allow_huge_transaction=allow_huge_transaction)
+    except ValueError as e:
+        message = f"The block could not be added: {e}"
+        print(message)
+        return jsonify({"message": message}), 400
     except Exception as e:
         message = f"An error occurred while adding the block: {e}"
         print(message)
         return jsonify({"message": message}), 500
+    new_block_json: str = added[1]
+    message = "Block added successfully."
+    print(message)
+    return jsonify({"message": message,
+                    "block": new_block_json}), 200
+
+
+@app.route("/add_blocks", methods=["POST"])
+# API Route: Add several blocks to the blockchain at once
+def add_blocks() -> Tuple[Response, int]:
+    print("Received request to add blocks.")
+    message: str | None = None
+    token: str | None = request.headers.get("token")
+    if not token:
+        message = "Token is required."
+        print(message)
+        return jsonify({"message": message}), 400
+    if token != SERVER_TOKEN:
+        message = "Invalid token."
+        print(message)
+        return jsonify({"message": message}), 400
     try:
-        last_block: None | Block = blockchain.get_last_block()
+        request_data: Any = request.get_json()
     except Exception as e:
-        message = f"An error occurred while retrieving the last block: {e}"
+        message = f"Request data could not be retrieved: {e}"
         print(message)
-        return jsonify({"message": message}), 500
-    if last_block is None:
-        message = "The last block is None."
+        return jsonify({"message": message}), 400
+    if "blocks" not in request_data:
+        message = "'blocks' key not found in request."
         print(message)
-        return jsonify({"message": message}), 500
-    last_block_data = last_block.data
-    try:
-        last_block_data_parsed: BlockData = (
-            blockchain.parse_block_data(block_data=last_block_data))
-    except ValidationError as e:
-        message = f"Last block data validation error: {e}"
+        return jsonify({"message": message}), 400
+    blocks: Any = request_data.get("blocks")
+    if not blocks or not isinstance(blocks, list):
+        message = "The 'blocks' key must be a non-empty list."
         print(message)
-        return jsonify({"message": message}), 500
-    last_block_json: str
+        return jsonify({"message": message}), 400
+    # Validate the data of every block before adding any of them
+    data_list: List[BlockData] = []
+    for position, block_payload in enumerate(cast(List[Any], blocks)):
+        data: Any = (block_payload.get("data")
+                     if isinstance(block_payload, dict) else None)
+        if not data:
+            message = f"Block {position}: The 'data' key is missing or empty."
+            print(message)
+            return jsonify({"message": message}), 400
+        try:
+            data_list.append(blockchain.parse_block_data(block_data=data))
+        except ValidationError as e:
+            message = f"Block {position}: Data validation error: {e}"
+            print(message)
+            return jsonify({"message": message}), 400
+        except Exception as e:
+            message = f"Block {position}: Data parsing error: {e}"
+            print(message)
+            return jsonify({"message": message}), 400
+    allow_huge_transaction: Any = request_data.get(
+        "allow_huge_transaction", False)
     try:
-        last_block_modelled = BlockModel(
-            index=last_block.index,
-            timestamp=last_block.timestamp,
-            data=last_block_data_parsed,
-            previous_block_hash=last_block.previous_block_hash,
-            nonce=last_block.nonce,
-            block_hash=last_block.block_hash
-        )
-        last_block_json = last_block_modelled.model_dump_json()
-    except ValidationError as e:
-        message = f"Last block model validation error: {e}"
+        added_blocks: List[Block] = blockchain.add_blocks(
+            data_list=data_list,
+            allow_huge_transaction=allow_huge_transaction)
+    except ValueError as e:
+        message = f"The blocks could not be added: {e}"
         print(message)
-        return jsonify({"message": message}), 500
-    if last_block_data_parsed != data_parsed:
-        message = "The last block data does not match the provided data."
+        return jsonify({"message": message}), 400
+    except Exception as e:
+        message = f"An error occurred while adding the blocks: {e}"
         print(message)
         return jsonify({"message": message}), 500
-    else:
-        message = "Block added successfully."
-        print(message)
-        return jsonify({"message": message,
-                        "block": last_block_json}), 200
+    message = f"{len(added_blocks)} blocks added successfully."
+    print(message)
+    return jsonify({
+        "message": message,
+        "blocks": [{"index": block.index, "block_hash": block.block_hash}
+                   for block in added_blocks]}), 200
 
 
 @app.route("/get_chain", methods=["GET"])
 # API Route: Get the blockchain
+# Query parameters:
+#   start: Height of the first block to return (default 0)
+#   limit: The most blocks to return (default all of them)
+#   format: "json" for one JSON document (default), or "ndjson" for one
+#       block per line, which is always streamed
+#   stream: "true" to stream the JSON document instead of building it first
 def get_chain() -> Tuple[Response, int]:
     print("Received request to get the blockchain.")
+    message: str
+    try:
+        start: int = int(request.args.get("start", "0"))
+        limit: int | None = (
+            int(request.args["limit"]) if "limit" in request.args else None)
+    except ValueError:
+        message = "'start' and 'limit' must be integers."
+        print(message)
+        return jsonify({"message": message}), 400
+    if start < 0 or (limit is not None and limit < 0):
+        message = "'start' and 'limit' cannot be negative."
+        print(message)
+        return jsonify({"message": message}), 400
+    output_format: str = request.args.get("format", "json").lower()
+    if output_format not in ("json", "ndjson"):
+        message = "'format' must be 'json' or 'ndjson'."
+        print(message)
+        return jsonify({"message": message}), 400
+    stream: bool = request.args.get("stream", "false").lower() == "true"
     print("Retrieving blockchain...")
-    with open(blockchain_path_resolved, "r") as file:
-        chain_data: list[dict[str, Any]] = [
-            json.loads(line) for line in file.readlines()]
-        print("Blockchain retrieved.")
-        print("Blockchain will be returned.")
-        return jsonify({"length": len(chain_data), "chain": chain_data}), 200
+    # Blocks added while the response is being sent are not included
+    chain_length: int = blockchain.get_chain_length()
+    stop: int = chain_length if limit is None else (
+        min(start + limit, chain_length))
+    stop = max(stop, start)
+    # The stored lines are sent as they are, without decoding them
+    block_lines: Generator[bytes, None, None] = (
+        blockchain.iter_block_lines(start, stop))
+    print("Blockchain will be returned.")
+    if output_format == "ndjson":
+        return Response((line + b"\n" for line in block_lines),
+                        mimetype="application/x-ndjson"), 200
+    chunks: Generator[bytes, None, None] = chain_json_chunks(
+        block_lines, length=stop - start)
+    if stream:
+        return Response(chunks, mimetype="application/json"), 200
+    return Response(b"".join(chunks), mimetype="application/json"), 200
+
+
+@app.route("/get_blocks_since", methods=["GET"])
+# API Route: Get the blocks added after a given block, for syncing a copy
+# of the blockchain
+# Query parameters (one of index and hash):
+#   index: Height of the last block the caller already has
+#   hash: Hash of the last block the caller already has
+#   limit: The most blocks to return (default all of them)
+# The blocks are streamed as NDJSON, one block per line
+def get_blocks_since() -> Tuple[Response, int]:
+    print("Received request to get the blocks since a given block.")
+    message: str
+    index_argument: str | None = request.args.get("index")
+    block_hash: str | None = request.args.get("hash")
+    if (index_argument is None) == (block_hash is None):
+        message = "Either 'index' or 'hash' is required, but not both."
+        print(message)
+        return jsonify({"message": message}), 400
+    try:
+        limit: int | None = (
+            int(request.args["limit"]) if "limit" in request.args else None)
+        index: int | None = (
+            int(index_argument) if index_argument is not None else None)
+    except ValueError:
+        message = "'index' and 'limit' must be integers."
+        print(message)
+        return jsonify({"message": message}), 400
+    if (index is not None and index < 0) or (limit is not None and limit < 0):
+        message = "'index' and 'limit' cannot be negative."
+        print(message)
+        return jsonify({"message": message}), 400
+    # Blocks added while the response is being sent are not included
+    chain_length: int = blockchain.get_chain_length()
+    if block_hash is not None:
+        index = blockchain.find_block_height(block_hash)
+        if index is None:
+            message = f"Block hash {block_hash} is not on the chain."
+            print(message)
+            return jsonify({"message": message}), 404
+    elif index is not None and index >= chain_length:
+        message = f"Index {index} is not on the chain."
+        print(message)
+        return jsonify({"message": message}), 404
+    start: int = cast(int, index) + 1
+    stop: int = chain_length if limit is None else (
+        min(start + limit, chain_length))
+    block_lines: Generator[bytes, None, None] = (
+        blockchain.iter_block_lines(start, stop))
+    print(f"{max(stop - start, 0)} blocks will be returned.")
+    response = Response((line + b"\n" for line in block_lines),
+                        mimetype="application/x-ndjson")
+    # Lets the caller tell whether it has caught up
+    response.headers["X-Chain-Length"] = str(chain_length)
+    return response, 200
 
 
 @app.route("/upload_chain", methods=["POST"])
@@ -202,8 +516,7 @@ def upload_chain() -> Tuple[Response, int]:
         print(message)
         return jsonify({"message": message}), 400
     try:
-        with open(blockchain_path_resolved, "wb") as file:
-            file.write(file_content)
+        blockchain.replace_blockchain_file(file_content)
         print("File written to disk.")
     except Exception as e:
         message = f"An error occurred while writing the file: {e}"
@@ -214,7 +527,7 @@ def upload_chain() -> Tuple[Response, int]:
 
 @app.route("/download_chain", methods=["GET"])
 # API Route: Download the blockchain
-def download_chain() -> Tuple[Response | Any, int]:
+def download_chain() -> Tuple[Response, int] | Response:
     print("Received request to download the blockchain.")
     file_exists: bool = os.path.exists(blockchain_path_resolved)
     if not file_exists:
@@ -223,20 +536,21 @@ def download_chain() -> Tuple[Response | Any, int]:
         return jsonify({"message": message}), 404
     else:
         print("Blockchain will be sent as a file.")
-        return send_file(
-            blockchain_path_resolved,
-            as_attachment=True), 200
+        # The status depends on the request (200, 206 or 304)
+        return send_download(blockchain_path_resolved)
 
 
 @app.route("/get_last_block", methods=["GET"])
 # API Route: Get the last block of the blockchain
 def get_last_block() -> Tuple[Response, int]:
     print("Received request to get the last block.")
-    last_block: None | Block = blockchain.get_last_block()
-    if last_block:
+    last_block_json: None | str = blockchain.get_last_block_json()
+    if last_block_json:
         print("Last block found.")
         print("Last block will be returned.")
-        return jsonify({"block": last_block.__dict__}), 200
+        # The block is already serialized, so it is spliced in as it is
+        return Response(f'{{"block": {last_block_json}}}\n',
+                        mimetype="application/json"), 200
     else:
         message = "No blocks found."
         print(message)
@@ -247,7 +561,9 @@ def get_last_block() -> Tuple[Response, int]:
 # API Route: Validate the blockchain
 def validate_chain() -> Tuple[Response | Dict[str, str], int]:
     print("Received request to validate the blockchain.")
-    is_valid: bool = blockchain.is_chain_valid()
+    full: bool = request.args.get("full", "false").lower() == "true"
+    parallel: bool = request.args.get("parallel", "false").lower() == "true"
+    is_valid: bool = blockchain.is_chain_valid(full=full, parallel=parallel)
     message: str = "The blockchain is valid." if is_valid else (
         "The blockchain is not valid.")
     print(message)
@@ -292,12 +608,15 @@ def shutdown() -> Tuple[Response, int]:
         return jsonify({"message": message}), 500
 
     print("The blockchain app will now exit.")
+    if mempool is not None:
+        mempool.close()
+    blockchain.close()
     sys_exit(0)
 
 
 @app.route("/download_transactions", methods=["GET"])
 # API Route: Download the transactions file
-def download_transactions() -> Tuple[Response | Any, int]:
+def download_transactions() -> Tuple[Response, int] | Response:
     print("Received request to download the transactions file.")
     file_exists: bool = os.path.exists(transactions_path_resolved)
     if not file_exists:
@@ -306,9 +625,8 @@ def download_transactions() -> Tuple[Response | Any, int]:
         return jsonify({"message": message}), 404
     else:
         print("Transactions file will be sent as a file.")
-        return send_file(
-            transactions_path_resolved,
-            as_attachment=True), 200
+        # The status depends on the request (200, 206 or 304)
+        return send_download(transactions_path_resolved)
 
 
 @app.route("/get_balance", methods=["GET"])
@@ -332,7 +650,8 @@ def get_balance() -> Tuple[Response, int]:
         print(message)
         return jsonify({"message": message}), 400
 
-    # Validate the transactions file
+    # Validate the transactions file (only what has been added since the
+    # last validation is compared)
     blockchain.is_transactions_file_valid()
 
     # Retrieve the balance
@@ -355,6 +674,249 @@ def get_balance() -> Tuple[Response, int]:
         message = "No transactions found for user."
         print(message)
         return jsonify({"message": message}), 404
+
+
+@app.route("/get_balances", methods=["GET", "POST"])
+# API Route: Get the balances of many users at once
+# GET returns the balance of every user with transactions, streamed.
+# POST takes a JSON body with one of:
+#   users: List of hashed user IDs
+#   users_unhashed: List of unhashed user IDs
+#   all: true to return every user, like GET
+# Users without transactions have a balance of null.
+def get_balances() -> Tuple[Response, int]:
+    print("Received request to get the balances of many users.")
+    message: str
+    body: Any = {"all": True}
+    if request.method == "POST":
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            message = "A JSON object is required."
+            print(message)
+            return jsonify({"message": message}), 400
+        body = cast(Dict[str, Any], body)
+    options: List[str] = [option for option in ("users", "users_unhashed")
+                          if option in body]
+    if body.get("all") is True:
+        options.append("all")
+    if len(options) != 1:
+        message = "Exactly one of users, users_unhashed or all is required."
+        print(message)
+        return jsonify({"message": message}), 400
+    # The balances come from the blocks, so the transactions file does not
+    # need to be validated first
+    if options[0] == "all":
+        print("The balances of all users will be returned.")
+        return Response(
+            balances_json_chunks(blockchain.iter_all_balances()),
+            mimetype="application/json"), 200
+    users: Any = body[options[0]]
+    if (not isinstance(users, list) or not all(
+            isinstance(user, (str, int)) and not isinstance(user, bool)
+            for user in cast(List[Any], users))):
+        message = f"{options[0]} must be a list of user IDs."
+        print(message)
+        return jsonify({"message": message}), 400
+    balances: Dict[str, int | None]
+    if options[0] == "users":
+        balances = blockchain.get_balances(
+            users=[str(user) for user in cast(List[str | int], users)])
+    else:
+        balances = blockchain.get_balances(
+            users_unhashed=cast(List[str | int], users))
+    print(f"The balances of {len(balances)} users will be returned.")
+    return jsonify({"balances": balances}), 200
+
+
+@app.route("/get_top_balances", methods=["GET"])
+# API Route: Get the users with the highest balances
+# Query parameters:
+#   n: The number of users to return (default 10)
+def get_top_balances() -> Tuple[Response, int]:
+    print("Received request to get the top balances.")
+    message: str
+    try:
+        n: int = int(request.args.get("n", "10"))
+    except ValueError:
+        message = "'n' must be an integer."
+        print(message)
+        return jsonify({"message": message}), 400
+    if n < 0:
+        message = "'n' cannot be negative."
+        print(message)
+        return jsonify({"message": message}), 400
+    top_balances: List[Tuple[str, int]] = blockchain.get_top_balances(n)
+    # Users with the same balance share a rank
+    ranked_balances: List[Dict[str, str | int]] = []
+    for position, (user, balance) in enumerate(top_balances):
+        rank: int = position + 1
+        if position > 0 and balance == top_balances[position - 1][1]:
+            rank = cast(int, ranked_balances[-1]["rank"])
+        ranked_balances.append(
+            {"rank": rank, "user": user, "balance": balance})
+    print(f"{len(ranked_balances)} balances will be returned.")
+    return jsonify({"balances": ranked_balances}), 200
+
+
+@app.route("/get_rank", methods=["GET"])
+# API Route: Get where a user is on the balance leaderboard
+# Query parameters (one of user and user_unhashed):
+#   user: Hashed user ID
+#   user_unhashed: Unhashed user ID
+def get_rank() -> Tuple[Response, int]:
+    print("Received request to get the rank of a user.")
+    user: str | None = request.args.get("user")
+    user_unhashed: str | None = request.args.get("user_unhashed")
+    message: str
+    if (user is None) == (user_unhashed is None):
+        message = "Either user or user_unhashed is required, but not both."
+        print(message)
+        return jsonify({"message": message}), 400
+    rank: Tuple[int, int, int] | None = blockchain.get_rank(
+        user=user, user_unhashed=user_unhashed)
+    if rank is None:
+        message = "No transactions found for user."
+        print(message)
+        return jsonify({"message": message}), 404
+    print(f"Rank: {rank[0]} of {rank[2]}")
+    return jsonify({"rank": rank[0],
+                    "balance": rank[1],
+                    "user_count": rank[2]}), 200
+
+
+@app.route("/get_transactions", methods=["GET"])
+# API Route: Get the transactions a user has sent or received, newest first
+# Query parameters (one of user and user_unhashed):
+#   user: Hashed user ID
+#   user_unhashed: Unhashed user ID
+#   before: Only return transactions with a lower position than this. Pass
+#       next_before from the previous response to get the next page.
+#   limit: The most transactions to return (default 50, at most 1000)
+def get_transactions() -> Tuple[Response, int]:
+    print("Received request to get the transactions of a user.")
+    user: str | None = request.args.get("user")
+    user_unhashed: str | None = request.args.get("user_unhashed")
+    message: str
+    if (user is None) == (user_unhashed is None):
+        message = "Either user or user_unhashed is required, but not both."
+        print(message)
+        return jsonify({"message": message}), 400
+    try:
+        before: int | None = (
+            int(request.args["before"]) if "before" in request.args
+            else None)
+        limit: int = int(request.args.get("limit", "50"))
+    except ValueError:
+        message = "'before' and 'limit' must be integers."
+        print(message)
+        return jsonify({"message": message}), 400
+    if (before is not None and before < 0) or not 0 < limit <= 1000:
+        message = ("'before' cannot be negative and 'limit' must be "
+                   "between 1 and 1000.")
+        print(message)
+        return jsonify({"message": message}), 400
+    transactions: List[Tuple[int, float, str, str, int, str]] | None = (
+        blockchain.get_user_transactions(user=user,
+                                         user_unhashed=user_unhashed,
+                                         before=before,
+                                         limit=limit))
+    if transactions is None:
+        message = "No transactions found for user."
+        print(message)
+        return jsonify({"message": message}), 404
+    print(f"{len(transactions)} transactions will be returned.")
+    return jsonify({
+        "transactions": [
+            {"position": position, "timestamp": timestamp, "sender": sender,
+             "receiver": receiver, "amount": amount, "method": method}
+            for position, timestamp, sender, receiver, amount, method
+            in transactions],
+        # None once there are no older transactions
+        "next_before": (
+            transactions[-1][0] if len(transactions) == limit else None)
+    }), 200
+
+
+@app.route("/get_transaction_proof", methods=["GET"])
+# API Route: Get a proof that an entry of a block's data is in the block
+# Query parameters:
+#   index: Height of the block
+#   position: Position of the entry in the block data
+# Only blocks of version 2 or later have a Merkle root to prove against.
+# The proof lists the sibling hashes from the leaf up; hashing the leaf with
+# them gives the Merkle root, and hashing the header (as Block.calculate_hash
+# does for the block's version) gives the block hash.
+def get_transaction_proof() -> Tuple[Response, int]:
+    print("Received request to get a transaction proof.")
+    message: str
+    try:
+        index: int = int(request.args["index"])
+        position: int = int(request.args["position"])
+    except (KeyError, ValueError):
+        message = "'index' and 'position' are required and must be integers."
+        print(message)
+        return jsonify({"message": message}), 400
+    block: Block | None = blockchain.get_block(index)
+    if block is None:
+        message = f"Index {index} is not on the chain."
+        print(message)
+        return jsonify({"message": message}), 404
+    if block.merkle_root is None:
+        message = f"Block {index} does not have a Merkle root."
+        print(message)
+        return jsonify({"message": message}), 400
+    if not 0 <= position < len(block.data):
+        message = f"Block {index} has no entry at position {position}."
+        print(message)
+        return jsonify({"message": message}), 404
+    proof: List[Tuple[str, str]] = block.get_merkle_proof(position)
+    print("The proof will be returned.")
+    return jsonify({
+        "header": {"version": block.version,
+                   "index": block.index,
+                   "timestamp": block.timestamp,
+                   "merkle_root": block.merkle_root,
+                   "previous_block_hash": block.previous_block_hash,
+                   "nonce": block.nonce,
+                   "block_hash": block.block_hash},
+        "position": position,
+        # The entry as it was hashed
+        "leaf": block.get_merkle_leaves()[position].decode(),
+        "proof": [{"hash": sibling_hash, "side": side}
+                  for sibling_hash, side in proof]
+    }), 200
+
+
+@app.route("/get_receipt", methods=["GET"])
+# API Route: Get the status of data queued by /add_block in mempool mode
+# Query parameters:
+#   id: The receipt ID
+#   wait: Seconds to wait for the data to be sealed (default 0, at most 30)
+def get_receipt() -> Tuple[Response, int]:
+    print("Received request to get a receipt.")
+    message: str
+    if mempool is None:
+        message = "The mempool is not enabled."
+        print(message)
+        return jsonify({"message": message}), 404
+    receipt_id: str | None = request.args.get("id")
+    try:
+        wait: float = float(request.args.get("wait", "0"))
+    except ValueError:
+        message = "'wait' must be a number."
+        print(message)
+        return jsonify({"message": message}), 400
+    receipt: Receipt | None = (
+        mempool.get_receipt(receipt_id) if receipt_id else None)
+    if receipt is None:
+        message = "Receipt not found."
+        print(message)
+        return jsonify({"message": message}), 404
+    if wait > 0:
+        # Whether the data was sealed or not is in the receipt
+        concurrent.futures.wait([receipt.block], timeout=min(wait, 30))
+    print(f"Receipt status: {receipt.get_status()}")
+    return jsonify(receipt_json(receipt)), 200
 # endregion
 
 
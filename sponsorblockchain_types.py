@@ -3,7 +3,7 @@
 from typing import List, Dict
 
 # Third party
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 # endregion
 
 
@@ -24,6 +24,9 @@ class Transaction(BaseModel):
 
 
 BlockData = List[str | Dict[str, Transaction]]
+# Validates block data in one pass. Building it is the slow part, so it is
+# built once.
+BlockDataAdapter: TypeAdapter[BlockData] = TypeAdapter(BlockData)
 
 
 class BlockModel(BaseModel):
@@ -37,6 +40,27 @@ class BlockModel(BaseModel):
     previous_block_hash: str
     nonce: int
     block_hash: str
+    # Left out of version 1 blocks, which are stored as they always were
+    version: int = 1
+    merkle_root: str | None = None
+
+    class Config:
+        extra: str = "forbid"
+
+
+class ValidationCheckpoint(BaseModel):
+    """
+    Pydantic model for the record of how much of the blockchain file has
+    been validated, used for serializing and deserializing the checkpoint
+    file.
+    """
+    # Index and hash of the last validated block
+    index: int
+    block_hash: str
+    # Size of the validated part of the blockchain file, in bytes
+    offset: int
+    # SHA-256 digest of the validated part of the blockchain file
+    digest: str
 
     class Config:
         extra: str = "forbid"
@@ -63,9 +63,12 @@ def start_flask_app_waitress() -> None:
     host = "*"
     # Use the environment variable or default to 8000
     port: str = os_environ.get("PORT", "8080")
+    # Number of threads handling requests, Waitress' default is 4
+    threads: str = os_environ.get("WAITRESS_THREADS", "4")
     command: List[str] = [
         program,
         f"--listen={host}:{port}",
+        f"--threads={threads}",
         f"{app_name}:app"
     ]
     waitress_process = subprocess.Popen(
@@ -180,17 +180,9 @@ def migrate_blockchain(blockchain: Blockchain) -> Blockchain:
                     data=block_data_parsed,
                     previous_block_hash=previous_block_hash
                 )
-                new_block_data: BlockData | BlockDataLegacy = new_block.data
-                new_block_model_instance = BlockModel(
-                    # index=i,
-                    index=new_block.index,
-                    timestamp=new_block.timestamp,
-                    data=new_block_data,
-                    previous_block_hash=new_block.previous_block_hash,
-                    nonce=new_block.nonce,
-                    block_hash=new_block.block_hash
-                )
-                block_json: str = new_block_model_instance.model_dump_json()
+                # Serialized like every other block, so that version 1
+                # blocks are written without the version and Merkle root
+                block_json: str = new_blockchain.serialize_block(new_block)
                 print(f"New block data:        {new_block.data}")
                 print(f"New block data (json): {block_json}")
                 new_file.write(block_json + "\n")